@@ -1,66 +1,31 @@
 import pandas as pd
-from shapely.geometry import Point, Polygon
-from pyproj import Transformer
-
-# 定义转换器，将 WGS 84 UTM Zone 50S 转换为 WGS 84
-transformer = Transformer.from_crs("epsg:32750", "epsg:4326")
+import numpy as np
+from Intersection_Loader import load_intersections
+from Truck_Dataset import TruckDataset
+from Intersection_Index import IntersectionIndex
 
 # 加载路口数据集
 intersection_file_path = 'B4_intersections_unique_valid.csv'
-intersection_data = pd.read_csv(intersection_file_path, header=None, names=["IntersectionID", "Coordinates"])
-
-# 处理 Coordinates 列
-intersection_data['Coordinates'] = intersection_data['Coordinates'].str.replace('LINESTRING\(', '', regex=True).str.replace('\)', '', regex=True)
-
-# 定义一个函数，将坐标分割为单独的经度和纬度列表
-def split_coordinates(coord_string):
-    latitudes = []
-    longitudes = []
-    for coord in coord_string.split(','):
-        try:
-            lon, lat = map(float, coord.split())
-            latitudes.append(lat)
-            longitudes.append(lon)
-        except ValueError:
-            continue
-    return latitudes, longitudes
-
-# 应用函数以拆分坐标
-intersection_data['Latitude'], intersection_data['Longitude'] = zip(*intersection_data['Coordinates'].apply(split_coordinates))
-
-# 移除空的列表
-intersection_data = intersection_data[intersection_data['Latitude'].map(len) > 0]
+# 投影模式：路口边界只投影一次到 UTM（米），之后直接与车辆的 X/Y 比较
+intersections = load_intersections(intersection_file_path, projected=True)
 
 # 加载车辆移动数据集
 truck_file_path = 'B4_truck_movements_01.csv'
 truck_data = pd.read_csv(truck_file_path)
 
-# 将车辆移动数据集中的坐标从 UTM 转换为经纬度
-truck_data['Latitude'], truck_data['Longitude'] = transformer.transform(truck_data['X'].values, truck_data['Y'].values)
+# 按 (Truck, TimeStamp) 排序一次，之后每辆卡车的轨迹都是零拷贝的数组视图
+truck_dataset = TruckDataset.from_frame(truck_data)
 
-# 定义一个字典来存储每个路口通过的卡车信息
-intersection_truck_pass = {}
-
-# 遍历每个路口
-for intersection_id in intersection_data['IntersectionID'].unique():
-    intersection_info = intersection_data[intersection_data['IntersectionID'] == intersection_id]
-    if intersection_info.empty:
-        continue
+# 建立所有路口的空间索引，一次扫描把每个采样点分配到所在路口
+intersection_index = IntersectionIndex(intersections)
+truck_rows = np.repeat(np.arange(len(truck_dataset)), truck_dataset.counts())
+passed = intersection_index.passed_matrix(truck_rows, truck_dataset.column('X'), truck_dataset.column('Y'), len(truck_dataset))
 
-    # 创建路口的多边形
-    polygon = Polygon(zip(intersection_info.iloc[0]['Longitude'], intersection_info.iloc[0]['Latitude']))
-
-    # 检查每辆卡车是否通过该路口
-    for truck_id in truck_data['Truck'].unique():
-        truck_movements = truck_data[truck_data['Truck'] == truck_id]
-        truck_path = [Point(lon, lat) for lon, lat in zip(truck_movements['Longitude'], truck_movements['Latitude'])]
-        
-        passed_through_intersection = any(polygon.contains(point) for point in truck_path)
-        
-        if passed_through_intersection:
-            if intersection_id not in intersection_truck_pass:
-                intersection_truck_pass[intersection_id] = []
-            intersection_truck_pass[intersection_id].append(truck_id)
+# 定义一个字典来存储每个路口通过的卡车信息（按路口顺序，卡车按首次出现的顺序）
+intersection_truck_pass = {}
+for column, intersection_id in enumerate(intersection_index.ids):
+    if passed[:, column].any():
+        intersection_truck_pass[intersection_id] = truck_dataset.trucks[passed[:, column]].tolist()
 
 # 将结果写入CSV文件
 output_data = {'IntersectionID': [], 'Trucks': []}
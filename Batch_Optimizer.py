@@ -0,0 +1,186 @@
+import argparse
+import ast
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# 批量模式不显示任何窗口
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+from Curve_Parameterization import PARAMETERIZATIONS, parameterization_from_name
+from Intersection_Geometry_Cache import load_geometry
+from Intersection_Loader import INTERSECTION_FILE_PATH
+from Movement_Scheduler import optimize_movement
+from Optimizer_Engines import ENGINES, engine_from_name
+from Optimizer_Model import movement_endpoints
+from Optimizer_Result_Cache import RESULT_CACHE_DIR, OptimizerResultCache, result_key
+
+# 每完成一个 路口/转向 就追加一行的检查点文件
+# ConfigKey 为该次优化的键（与优化结果缓存的键相同，见 Optimizer_Result_Cache.result_key），
+# 包含路口几何、转向、曲线参数化、权重、引擎和随机种子，任何一项变化后检查点中的结果不再沿用
+CHECKPOINT_FILE_PATH = 'Optimized_paths_checkpoint.csv'
+CHECKPOINT_COLUMNS = ['IntersectionID', 'Direction', 'ConfigKey', 'Loss', 'Seconds', 'Points', 'Path']
+
+
+def read_checkpoint(checkpoint_path=CHECKPOINT_FILE_PATH):
+    if not os.path.exists(checkpoint_path):
+        return pd.DataFrame(columns=CHECKPOINT_COLUMNS)
+    checkpoint = pd.read_csv(checkpoint_path, dtype={'IntersectionID': str, 'Direction': str, 'ConfigKey': str})
+    # 旧版本的检查点没有 ConfigKey 列，其中的结果都视为设置已变化
+    if 'ConfigKey' not in checkpoint:
+        checkpoint.insert(2, 'ConfigKey', None)
+    # Path 与 Pass_INI 文件的 Coordinates 列一样以列表的文本形式保存
+    checkpoint['Path'] = [ast.literal_eval(path) for path in checkpoint['Path']]
+    return checkpoint
+
+
+def _append_checkpoint(checkpoint_path, intersection_id, config_key, movement):
+    row = pd.DataFrame([[intersection_id, movement.direction, config_key, movement.loss, movement.seconds, len(movement.path),
+                         str(movement.path)]], columns=CHECKPOINT_COLUMNS)
+    row.to_csv(checkpoint_path, mode='a', header=not os.path.exists(checkpoint_path), index=False)
+
+
+def _write_checkpoint(checkpoint_path, checkpoint):
+    checkpoint = checkpoint[CHECKPOINT_COLUMNS].copy()
+    checkpoint['Path'] = [str(path) for path in checkpoint['Path']]
+    checkpoint.to_csv(checkpoint_path, index=False)
+
+
+def _format_seconds(seconds):
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f'{hours:d}:{minutes:02d}:{seconds:02d}'
+
+
+# 一个 路口/转向 的随机种子：seed 加上 (路口, 转向, 序号) 的稳定哈希（SHA-256，不受 PYTHONHASHSEED 影响），seed 为 None 时为 None
+def task_seed(seed, intersection_id, direction, index=0):
+    if seed is None:
+        return None
+    digest = hashlib.sha256(f'{intersection_id}/{direction}/{index}'.encode()).hexdigest()
+    return (seed + int(digest[:8], 16)) % 2 ** 32
+
+
+# 优化路口数据集中所有路口的所有转向
+#   intersection_ids —— 只处理这些路口，默认为全部
+#   workers          —— 同时优化的 路口/转向 数，默认为 CPU 核数
+#   parameterization —— 曲线参数化（见 Curve_Parameterization.py），默认为 n_points 个自由控制点
+#   cache            —— 可选的 OptimizerResultCache，几何等都没有变化的 路口/转向 直接取缓存结果
+#   engine           —— 可选的优化引擎（见 Optimizer_Engines.py），默认为 differential_evolution
+# 检查点中 ConfigKey 与本次设置相同的 路口/转向 直接跳过，中断后重新运行即可从中断处继续；失败的任务不写入检查点，下次运行时重试
+# 本次要处理的 路口/转向 在检查点中设置不同的旧结果会从检查点中删除，不与新结果混在一起
+# intersection_ids 中有路口数据集里不存在的路口时，不开始任何优化，抛出 ValueError
+# 返回 (检查点中的全部结果, 统计信息)
+def optimize_all(intersection_file_path=INTERSECTION_FILE_PATH, intersection_ids=None, checkpoint_path=CHECKPOINT_FILE_PATH,
+                 n_points=10, workers=None, de_workers=1, seed=None, parameterization=None, cache=None, engine=None,
+                 verbose=True):
+    geometry = load_geometry(intersection_file_path)
+    if intersection_ids is None:
+        intersection_ids = list(geometry)
+    unknown = [intersection_id for intersection_id in intersection_ids if intersection_id not in geometry]
+    if unknown:
+        raise ValueError(f"Unknown intersection IDs (not in {intersection_file_path}): {', '.join(unknown)}")
+
+    # 每个任务的随机种子由 (路口, 转向) 确定（见 task_seed），与处理哪些路口、以什么顺序处理无关，键在续跑时保持不变
+    tasks = []
+    for intersection_id in intersection_ids:
+        intersection_polygon = geometry[intersection_id].projected_polygon
+        for direction, points in movement_endpoints(intersection_polygon).items():
+            for index, (start_point, end_point) in enumerate(points):
+                movement_seed = task_seed(seed, intersection_id, direction, index)
+                config_key = result_key(intersection_polygon, start_point, end_point, n_points, movement_seed, parameterization,
+                                        engine=engine)
+                tasks.append((intersection_id, intersection_polygon, direction, start_point, end_point, movement_seed, config_key))
+
+    # 本次要处理的 路口/转向 在检查点中的旧结果，ConfigKey 不同（或没有 ConfigKey）时删除
+    checkpoint = read_checkpoint(checkpoint_path)
+    task_keys = {(intersection_id, direction, config_key) for intersection_id, _, direction, *_, config_key in tasks}
+    task_movements = {(intersection_id, direction) for intersection_id, direction, _ in task_keys}
+    rows = list(zip(checkpoint['IntersectionID'], checkpoint['Direction'], checkpoint['ConfigKey']))
+    stale = np.array([row[:2] in task_movements and row not in task_keys for row in rows], dtype=bool)
+    if stale.any() or checkpoint['ConfigKey'].isna().any():
+        if verbose and stale.any():
+            print(f"Dropping {int(stale.sum())} movements optimized with different settings from {checkpoint_path}")
+        checkpoint = checkpoint[~stale]
+        _write_checkpoint(checkpoint_path, checkpoint)
+
+    finished = set(zip(checkpoint['IntersectionID'], checkpoint['Direction'], checkpoint['ConfigKey']))
+    tasks = [task for task in tasks if (task[0], task[2], task[6]) not in finished]
+    skipped = len(task_keys & finished)
+
+    total = len(tasks) + skipped
+    if verbose:
+        print(f"{skipped} of {total} movements already in {checkpoint_path}, {len(tasks)} to optimize")
+
+    workers = workers or os.cpu_count() or 1
+    done, failed, cached = 0, 0, 0
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=max(1, min(workers, len(tasks))))
+    try:
+        futures = {
+            executor.submit(optimize_movement, intersection_polygon, direction, start_point, end_point, n_points, de_workers,
+                            movement_seed, parameterization, cache, engine): (intersection_id, direction, config_key)
+            for intersection_id, intersection_polygon, direction, start_point, end_point, movement_seed, config_key in tasks
+        }
+        for future in as_completed(futures):
+            intersection_id, direction, config_key = futures[future]
+            try:
+                movement = future.result()
+            except Exception as e:
+                failed += 1
+                if verbose:
+                    print(f"{intersection_id} {direction} failed: {e}")
+                continue
+
+            _append_checkpoint(checkpoint_path, intersection_id, config_key, movement)
+            done += 1
+            cached += movement.cached
+            if verbose:
+                elapsed = time.perf_counter() - start
+                remaining = len(tasks) - done - failed
+                eta = elapsed / (done + failed) * remaining
+                print(f"[{skipped + done}/{total}] {intersection_id} {direction}: Loss = {movement.loss:.4g} "
+                      f"({'cached' if movement.cached else f'{movement.seconds:.1f} s'}), elapsed {_format_seconds(elapsed)}, ETA {_format_seconds(eta)}")
+    except KeyboardInterrupt:
+        # 中断时不再等待排队中的任务，已完成的结果都已在检查点中
+        if verbose:
+            print(f"Interrupted, {skipped + done} of {total} movements saved in {checkpoint_path}")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    stats = {'skipped': skipped, 'optimized': done - cached, 'cached': cached, 'failed': failed,
+             'seconds': time.perf_counter() - start}
+    return read_checkpoint(checkpoint_path), stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Optimize every turning movement of every intersection, resuming from the checkpoint.')
+    parser.add_argument('intersection_ids', nargs='*', default=None)
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE_PATH)
+    parser.add_argument('--n-points', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--de-workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--parameterization', choices=sorted(PARAMETERIZATIONS), default='free')
+    parser.add_argument('--cache', default=RESULT_CACHE_DIR, help='optimizer result cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='always run the optimizer')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=None, help='optimizer engine (default: differential evolution)')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else OptimizerResultCache(args.cache)
+    parameterization = parameterization_from_name(args.parameterization, args.n_points)
+    try:
+        engine = engine_from_name(args.engine, args.de_workers)
+        results, stats = optimize_all(args.intersections, args.intersection_ids or None, args.checkpoint, args.n_points,
+                                      args.workers, args.de_workers, args.seed, parameterization, cache, engine)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{stats['optimized']} movements optimized, {stats['cached']} taken from the result cache, "
+          f"{stats['skipped']} resumed from checkpoint, {stats['failed']} failed in {_format_seconds(stats['seconds'])}")
+    print(f"{len(results)} movements saved in {args.checkpoint}")
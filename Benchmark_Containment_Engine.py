@@ -0,0 +1,73 @@
+import os
+import time
+
+import numpy as np
+from shapely.geometry import Point
+
+from Containment_Engine import contains_xy, crossing_number, pass_events
+from Intersection_Loader import load_intersections
+from Truck_Dataset import load_truck_dataset
+
+# 对比逐点 Point + polygon.contains 的状态机与一次性掩码 + np.diff 的通过判定
+intersection_file_path = 'B4_intersections_unique_valid.csv'
+intersection_id = 'INT_94'
+file_paths = [f'B4_truck_movements_{i:02d}.csv' for i in range(1, 55)]
+
+intersections = load_intersections(intersection_file_path, projected=True)
+polygon = intersections.polygon(intersection_id)
+ring = intersections.coordinates(intersection_id)
+
+
+# 原有的逐点状态机
+def state_machine_passes(x, y):
+    passes = []
+    entry_idx = None
+    for idx, point in enumerate([Point(px, py) for px, py in zip(x, y)]):
+        if polygon.contains(point):
+            if entry_idx is None:
+                entry_idx = max(0, idx - 1)
+        elif entry_idx is not None:
+            passes.append((entry_idx, idx))
+            entry_idx = None
+    return passes
+
+
+total_rows = 0
+seconds = {'Point + contains': 0.0, 'contains_xy': 0.0, 'crossing_number': 0.0}
+pass_mismatches = 0
+mask_mismatches = 0
+
+for truck_file_path in file_paths:
+    if not os.path.exists(truck_file_path):
+        print(f"File {truck_file_path} does not exist.")
+        continue
+
+    truck_dataset = load_truck_dataset(truck_file_path)
+
+    for truck_id in truck_dataset:
+        truck_movements = truck_dataset[truck_id]
+        x, y = truck_movements['X'], truck_movements['Y']
+        total_rows += len(x)
+
+        start = time.perf_counter()
+        expected = state_machine_passes(x, y)
+        seconds['Point + contains'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        mask = contains_xy(polygon, x, y)
+        entry_indices, exit_indices = pass_events(mask)
+        seconds['contains_xy'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        ray_mask = crossing_number(ring, x, y)
+        seconds['crossing_number'] += time.perf_counter() - start
+
+        if list(zip(entry_indices.tolist(), exit_indices.tolist())) != expected:
+            pass_mismatches += 1
+        mask_mismatches += int(np.count_nonzero(mask != ray_mask))
+
+if total_rows:
+    print(f"Rows: {total_rows}")
+    for name, elapsed in seconds.items():
+        print(f"{name}: {elapsed:.3f} s ({total_rows / elapsed:,.0f} rows/s)")
+    print(f"Trucks with different passes: {pass_mismatches}, crossing_number mask mismatches: {mask_mismatches}")
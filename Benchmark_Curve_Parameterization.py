@@ -0,0 +1,61 @@
+import time
+from functools import partial
+
+import numpy as np
+from scipy.optimize import differential_evolution
+
+from Curve_Parameterization import BezierCurve, FreePoints
+from Intersection_Geometry_Cache import load_geometry
+from Optimizer_Model import CurveObjective, movement_endpoints
+
+# 对比不同曲线参数化达到同一损失所需的目标函数评估次数
+# 原有的自由控制点不经过起点和终点，损失可以趋近于 0，与锚定的曲线不可比；这里用首尾锚定的自由控制点作为对照
+intersection_file_path = 'B4_intersections_unique_valid.csv'
+intersection_id = 'INT_94'
+seed = 0
+
+parameterizations = {
+    'free points (10, anchored)': partial(FreePoints, n_points=10, anchored=True),
+    'quadratic Bezier': partial(BezierCurve, degree=2),
+    'cubic Bezier': partial(BezierCurve, degree=3),
+    'quartic Bezier': partial(BezierCurve, degree=4),
+}
+
+
+# 记录每次调用后的累计评估次数和当前最优损失
+class CountingObjective:
+    def __init__(self, objective_function):
+        self.objective_function = objective_function
+        self.evaluations = 0
+        self.best = np.inf
+        self.history = []
+
+    def __call__(self, population):
+        loss = self.objective_function(population)
+        self.evaluations += np.size(loss)
+        self.best = min(self.best, float(np.min(loss)))
+        self.history.append((self.evaluations, self.best))
+        return loss
+
+
+intersection_polygon = load_geometry(intersection_file_path)[intersection_id].projected_polygon
+
+for direction, points in movement_endpoints(intersection_polygon).items():
+    start_point, end_point = points[0]
+    runs = {}
+    for name, parameterization in parameterizations.items():
+        parameterization = parameterization(intersection_polygon, start_point, end_point)
+        objective_function = CountingObjective(CurveObjective(intersection_polygon, parameterization))
+        start = time.perf_counter()
+        # 与 Optimizer_Model.optimizer 相同的设置
+        result = differential_evolution(objective_function, parameterization.bounds, strategy='best1bin', maxiter=1000,
+                                        popsize=15, tol=0.01, updating='deferred', vectorized=True, seed=seed)
+        runs[name] = (parameterization.n_params, result.fun, objective_function, time.perf_counter() - start)
+
+    # 所有参数化都能达到的损失（最差的最终损失），统计各自第一次达到它时的评估次数
+    target = max(loss for _, loss, _, _ in runs.values())
+    print(f"Direction: {direction}, target loss {target:.4f}")
+    for name, (n_params, loss, objective_function, seconds) in runs.items():
+        reached = next(evaluations for evaluations, best in objective_function.history if best <= target * (1 + 1e-6))
+        print(f"  {name}: {n_params} params, final loss {loss:.4f}, {reached} evaluations to reach target, "
+              f"{objective_function.evaluations} in total, {seconds:.2f} s")
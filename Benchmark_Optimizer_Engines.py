@@ -0,0 +1,77 @@
+import time
+from functools import partial
+
+import numpy as np
+
+from Curve_Parameterization import BezierCurve, FreePoints
+from Intersection_Geometry_Cache import load_geometry
+from Optimizer_Engines import ENGINES
+from Optimizer_Model import CurveObjective, movement_endpoints
+
+# 对比不同优化引擎在每个路口、每个转向上达到同一目标损失所需的评估次数和时间，按问题规模（参数个数）汇总
+# 目标损失取所有引擎最终损失中最差的一个（即每个引擎都能达到的损失），与 Benchmark_Curve_Parameterization.py 相同
+# 原有的自由控制点不经过起点和终点，损失趋近于 0 且不收敛，这里使用锚定的自由控制点
+# 注意：锚定的自由控制点全部落在路口外时只剩起点和终点两个点参与评分（直线），CMA-ES 常常找到这种解
+intersection_file_path = 'B4_intersections_unique_valid.csv'
+seed = 0
+
+parameterizations = {
+    'cubic Bezier': partial(BezierCurve, degree=3),
+    'free points (10, anchored)': partial(FreePoints, n_points=10, anchored=True),
+}
+
+
+# 记录每次调用后的累计评估次数、用时和当前最优损失
+class CountingObjective:
+    def __init__(self, objective_function):
+        self.objective_function = objective_function
+        self.evaluations = 0
+        self.best = np.inf
+        self.history = []
+        self.start = time.perf_counter()
+
+    def __call__(self, population):
+        loss = self.objective_function(population)
+        self.evaluations += np.size(loss)
+        self.best = min(self.best, float(np.min(loss)))
+        self.history.append((self.evaluations, time.perf_counter() - self.start, self.best))
+        return loss
+
+
+if __name__ == '__main__':
+    geometry = load_geometry(intersection_file_path)
+
+    for name, parameterization in parameterizations.items():
+        # 引擎 -> [(达到目标的评估次数, 达到目标的用时, 最终损失, 总评估次数, 总用时), ...]，每个 路口/转向 一项
+        runs = {engine: [] for engine in ENGINES}
+        n_params = None
+        for intersection_id, bundle in geometry.items():
+            intersection_polygon = bundle.projected_polygon
+            for direction, points in movement_endpoints(intersection_polygon).items():
+                start_point, end_point = points[0]
+                problem = parameterization(intersection_polygon, start_point, end_point)
+                n_params = problem.n_params
+
+                finals = {}
+                for engine_name, engine in ENGINES.items():
+                    objective_function = CountingObjective(CurveObjective(intersection_polygon, problem))
+                    result = engine().minimize(objective_function, problem.bounds, seed=seed)
+                    finals[engine_name] = (float(result.fun), objective_function)
+
+                target = max(loss for loss, _ in finals.values()) * (1 + 1e-6)
+                for engine_name, (loss, objective_function) in finals.items():
+                    evaluations, seconds, _ = next(record for record in objective_function.history if record[2] <= target)
+                    _, total_seconds, _ = objective_function.history[-1]
+                    runs[engine_name].append((evaluations, seconds, loss, objective_function.evaluations, total_seconds))
+
+        print(f"{name}: {n_params} params, {len(runs[next(iter(ENGINES))])} intersection/movement problems")
+        cheapest = None
+        for engine_name, records in runs.items():
+            records = np.array(records)
+            best_count = int(np.sum(records[:, 2] <= np.min([np.array(r)[:, 2] for r in runs.values()], axis=0) * (1 + 1e-6)))
+            print(f"  {engine_name}: median {np.median(records[:, 0]):.0f} evaluations / {np.median(records[:, 1]) * 1000:.1f} ms "
+                  f"to reach target, median final loss {np.median(records[:, 2]):.4f} (best on {best_count} problems), "
+                  f"median {np.median(records[:, 3]):.0f} evaluations / {np.median(records[:, 4]) * 1000:.1f} ms in total")
+            if cheapest is None or np.median(records[:, 1]) < cheapest[1]:
+                cheapest = (engine_name, np.median(records[:, 1]))
+        print(f"  cheapest engine to reach the common target: {cheapest[0]}")
@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+from shapely.geometry import Point
+
+from Containment_Engine import contains_xy
+from Curve_Parameterization import FreePoints
+from Intersection_Geometry_Cache import load_geometry
+from Optimizer_Model import CurveObjective, evaluate_curve_quality
+
+# 对比 differential_evolution 的目标函数：逐个候选解（Point + 标量评分）与整个种群一次评估（vectorized=True）
+intersection_file_path = 'B4_intersections_unique_valid.csv'
+intersection_id = 'INT_94'
+n_points = 10
+popsize = 15
+generations = 20
+
+intersection_polygon = load_geometry(intersection_file_path)[intersection_id].projected_polygon
+x_min, y_min, x_max, y_max = intersection_polygon.bounds
+
+# 与 differential_evolution 相同的种群规模：popsize * 变量个数
+rng = np.random.default_rng(0)
+n_members = popsize * 2 * n_points
+low = np.tile([x_min, y_min], n_points)
+high = np.tile([x_max, y_max], n_points)
+populations = [rng.uniform(low, high, size=(n_members, 2 * n_points)) for _ in range(generations)]
+
+
+# 原有的目标函数：逐个控制点创建 Point 并判断是否在路口内
+def point_objective(coords):
+    points = [(coords[i], coords[i+1]) for i in range(0, len(coords), 2)]
+    points = [point for point in points if intersection_polygon.contains(Point(point[0], point[1]))]
+    if len(points) < 2:
+        return float('inf')
+    return evaluate_curve_quality(np.array(points))
+
+
+# 逐个候选解的数组版本
+def scalar_objective(coords):
+    points = coords.reshape(-1, 2)
+    points = points[contains_xy(intersection_polygon, points[:, 0], points[:, 1])]
+    if len(points) < 2:
+        return float('inf')
+    return evaluate_curve_quality(points)
+
+
+vectorized_objective = CurveObjective(intersection_polygon, FreePoints(intersection_polygon, None, None, n_points))
+
+seconds = {'Point + scalar': 0.0, 'scalar': 0.0, 'vectorized': 0.0}
+losses = {name: [] for name in seconds}
+for population in populations:
+    start = time.perf_counter()
+    losses['Point + scalar'].extend(point_objective(member) for member in population)
+    seconds['Point + scalar'] += time.perf_counter() - start
+
+    start = time.perf_counter()
+    losses['scalar'].extend(scalar_objective(member) for member in population)
+    seconds['scalar'] += time.perf_counter() - start
+
+    start = time.perf_counter()
+    losses['vectorized'].extend(vectorized_objective(population.T).tolist())
+    seconds['vectorized'] += time.perf_counter() - start
+
+evaluations = n_members * generations
+print(f"Evaluations: {evaluations} ({generations} generations x {n_members} members)")
+for name, elapsed in seconds.items():
+    print(f"{name}: {elapsed:.3f} s ({evaluations / elapsed:,.0f} evaluations/s)")
+
+expected = np.array(losses['Point + scalar'])
+for name in ('scalar', 'vectorized'):
+    print(f"{name} matches Point + scalar: {np.allclose(losses[name], expected, rtol=1e-9, atol=0.0, equal_nan=True)}")
@@ -0,0 +1,23 @@
+import os
+
+from Intersection_Loader import load_intersections
+from Parallel_Pass_Driver import extract_pass_events_parallel
+from Pass_Event_Engine import extract_pass_events
+
+# 对比串行与不同工作进程数下的通过事件提取：耗时、加速比，以及结果是否与串行完全一致
+intersection_file_path = 'B4_intersections_unique_valid.csv'
+file_paths = [f'B4_truck_movements_{i:02d}.csv' for i in range(1, 55)]
+
+if __name__ == '__main__':
+    intersections = load_intersections(intersection_file_path, projected=True)
+
+    serial_events, serial_stats = extract_pass_events(file_paths, intersections, verbose=False)
+    serial_csv = serial_events.to_csv(index=False)
+    print(f"serial: {serial_stats['seconds']:.2f} s ({serial_stats['samples_per_second']:,.0f} samples/s)")
+
+    worker_counts = sorted({1, 2, 4, 8, 16, 32, os.cpu_count() or 1})
+    for workers in worker_counts:
+        events, stats = extract_pass_events_parallel(file_paths, intersections, workers=workers, verbose=False)
+        identical = events.to_csv(index=False) == serial_csv
+        print(f"{workers} workers: {stats['seconds']:.2f} s ({stats['samples_per_second']:,.0f} samples/s), "
+              f"speedup {serial_stats['seconds'] / stats['seconds']:.1f}x, identical: {identical}")
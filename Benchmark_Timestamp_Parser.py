@@ -0,0 +1,40 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from Timestamp_Parser import TIMESTAMP_FORMAT, parse_timestamps
+
+# 对比原有 pd.to_datetime 路径与固定宽度解析器在全部 54 个数据集上的耗时
+file_paths = [f'B4_truck_movements_{i:02d}.csv' for i in range(1, 55)]
+
+total_rows = 0
+pandas_seconds = 0.0
+parser_seconds = 0.0
+mismatches = 0
+
+for truck_file_path in file_paths:
+    if not os.path.exists(truck_file_path):
+        print(f"File {truck_file_path} does not exist.")
+        continue
+
+    # 只读取时间戳列，CSV 读取时间不计入对比
+    values = pd.read_csv(truck_file_path, usecols=['TimeStamp'])['TimeStamp']
+
+    start = time.perf_counter()
+    expected = pd.to_datetime(values, format=TIMESTAMP_FORMAT).to_numpy().astype('datetime64[ms]').view(np.int64)
+    pandas_seconds += time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = parse_timestamps(values)
+    parser_seconds += time.perf_counter() - start
+
+    mismatches += int(np.count_nonzero(parsed != expected))
+    total_rows += len(values)
+
+if total_rows:
+    print(f"Rows: {total_rows}")
+    print(f"pd.to_datetime:   {pandas_seconds:.3f} s ({total_rows / pandas_seconds:,.0f} rows/s)")
+    print(f"parse_timestamps: {parser_seconds:.3f} s ({total_rows / parser_seconds:,.0f} rows/s)")
+    print(f"Speedup: {pandas_seconds / parser_seconds:.1f}x, mismatches: {mismatches}")
@@ -0,0 +1,60 @@
+import time
+from functools import partial
+
+import numpy as np
+from scipy.optimize import differential_evolution
+
+from Curve_Parameterization import BezierCurve, FreePoints
+from Intersection_Geometry_Cache import load_geometry
+from Optimizer_Model import CurveObjective, movement_endpoints
+from Warm_Start import assign_movements, historical_passes, warm_start_population
+
+# 对比冷启动（拉丁超立方随机初始种群）与历史通过轨迹热启动的收敛代数、评估次数和最终损失
+# 原有的自由控制点不经过起点和终点，损失趋近于 0 且不收敛，这里与 Benchmark_Curve_Parameterization.py 一样使用锚定的曲线
+intersection_file_path = 'B4_intersections_unique_valid.csv'
+intersection_id = 'INT_94'
+seed = 0
+
+parameterizations = {
+    'free points (10, anchored)': partial(FreePoints, n_points=10, anchored=True),
+    'cubic Bezier': partial(BezierCurve, degree=3),
+}
+
+
+# vectorized=True 时 result.nfev 统计的是调用次数，这里统计实际评估的候选解个数
+class CountingObjective:
+    def __init__(self, objective_function):
+        self.objective_function = objective_function
+        self.evaluations = 0
+
+    def __call__(self, population):
+        loss = self.objective_function(population)
+        self.evaluations += np.size(loss)
+        return loss
+
+
+intersection_polygon = load_geometry(intersection_file_path)[intersection_id].projected_polygon
+endpoints = movement_endpoints(intersection_polygon)
+movements = assign_movements(historical_passes(intersection_id), endpoints)
+
+for direction, points in endpoints.items():
+    start_point, end_point = points[0]
+    passes = movements[direction]
+    print(f"Direction: {direction}, {len(passes)} historical passes")
+
+    for name, parameterization in parameterizations.items():
+        parameterization = parameterization(intersection_polygon, start_point, end_point)
+        objective_function = CurveObjective(intersection_polygon, parameterization)
+
+        for mode in ('cold', 'warm'):
+            init = 'latinhypercube'
+            if mode == 'warm':
+                init = warm_start_population(parameterization, objective_function, passes, popsize=15, seed=seed)
+            counting_objective = CountingObjective(objective_function)
+            start = time.perf_counter()
+            # 与 Optimizer_Model.optimizer 相同的设置
+            result = differential_evolution(counting_objective, parameterization.bounds, strategy='best1bin', maxiter=1000,
+                                            popsize=15, tol=0.01, updating='deferred', vectorized=True, seed=seed, init=init)
+            seconds = time.perf_counter() - start
+            print(f"  {name}, {mode} start: {result.nit} generations, {counting_objective.evaluations} evaluations, "
+                  f"loss {result.fun:.4f}, {seconds:.2f} s")
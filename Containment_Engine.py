@@ -0,0 +1,62 @@
+import numpy as np
+
+try:
+    import shapely
+    _HAS_CONTAINS_XY = hasattr(shapely, 'contains_xy')
+except ImportError:
+    _HAS_CONTAINS_XY = False
+
+
+# 射线法（crossing number）：对每个点统计向右的水平射线与多边形各条边的交点数，奇数即在多边形内
+# ring 为 (M, 2) 的边界坐标，首尾可以相同也可以不同；落在边界上的点不保证判定结果
+def crossing_number(ring, x, y):
+    ring = np.asarray(ring, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    inside = np.zeros(x.shape, dtype=bool)
+    if len(ring) < 3 or x.size == 0:
+        return inside
+
+    # 先用包围盒筛掉大部分点
+    candidates = np.flatnonzero(
+        (x >= ring[:, 0].min()) & (x <= ring[:, 0].max()) & (y >= ring[:, 1].min()) & (y <= ring[:, 1].max())
+    )
+    if candidates.size == 0:
+        return inside
+    px = x[candidates]
+    py = y[candidates]
+
+    x1, y1 = ring[:, 0], ring[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    result = np.zeros(candidates.size, dtype=bool)
+    # 逐边循环、逐点向量化：路口边界只有几十条边，而点的数量是百万级
+    for ax, ay, bx, by in zip(x1, y1, x2, y2):
+        if ay == by:
+            continue
+        straddles = (ay > py) != (by > py)
+        x_cross = ax + (py - ay) * (bx - ax) / (by - ay)
+        result ^= straddles & (px < x_cross)
+    inside[candidates] = result
+    return inside
+
+
+# 一次调用判断所有 (x, y) 是否严格位于多边形内部，返回布尔掩码
+# shapely 2 下使用预处理过的几何 + contains_xy，否则退回到 NumPy 射线法（仅使用外边界）
+def contains_xy(polygon, x, y):
+    if _HAS_CONTAINS_XY:
+        shapely.prepare(polygon)
+        return shapely.contains_xy(polygon, np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    return crossing_number(np.asarray(polygon.exterior.coords), x, y)
+
+
+# 由掩码的跳变（np.diff）得到每次通过路口的进入/离开下标，与原有逐点状态机的结果一致：
+#   进入下标 —— 第一个在路口内的点的前一个点（序列开头则为 0）
+#   离开下标 —— 离开路口后的第一个点
+# 直到序列结束仍未离开的通过不会被记录
+def pass_events(mask):
+    mask = np.asarray(mask, dtype=bool)
+    steps = np.diff(mask.astype(np.int8), prepend=np.int8(0))
+    starts = np.flatnonzero(steps == 1)
+    exit_indices = np.flatnonzero(steps == -1)
+    entry_indices = np.maximum(starts[:len(exit_indices)] - 1, 0)
+    return entry_indices, exit_indices
@@ -0,0 +1,106 @@
+from functools import partial
+
+import numpy as np
+from scipy.special import comb
+
+from Geometry_Kernels import resample_polyline
+
+
+# 候选曲线的参数化：把 differential_evolution 搜索的参数向量映射为曲线上的点
+# 每个参数化类都以 (路口多边形, 起点, 终点) 构造，提供：
+#   bounds       —— 每个参数的 (下界, 上界)
+#   curves(x)    —— x 为 (n_params, S) 的种群（或 (n_params,) 的单个解），返回 (S, n_samples, 2) 的曲线
+#   keep         —— (n_samples,) 的布尔数组，为 True 的点（锚定的起点和终点）即使落在路口边界上也参与评估
+#   fit(points)  —— 把一条实际轨迹 (n, 2) 转换为最接近的参数向量 (n_params,)，用于热启动
+# 其他参数（控制点数、阶数等）可以用 functools.partial 预先绑定
+
+
+# 原有的参数化：n_points 个自由控制点，每个坐标只受路口包围盒约束，不使用起点和终点
+#   anchored=True 时曲线首尾加上起点和终点，与锚定的参数化在同一个目标上比较
+class FreePoints:
+    def __init__(self, intersection_polygon, start_point, end_point, n_points=10, anchored=False):
+        x_min, y_min, x_max, y_max = intersection_polygon.bounds
+        self.n_points = n_points
+        self.n_params = 2 * n_points
+        self.bounds = [(x_min, x_max), (y_min, y_max)] * n_points
+        self.anchors = (np.asarray(start_point, dtype=np.float64), np.asarray(end_point, dtype=np.float64)) if anchored else None
+        self.keep = np.zeros(n_points, dtype=bool)
+        if anchored:
+            self.keep = np.r_[True, self.keep, True]
+
+    def curves(self, x):
+        x = np.asarray(x, dtype=np.float64).reshape(self.n_params, -1)
+        curves = x.T.reshape(-1, self.n_points, 2)
+        if self.anchors is None:
+            return curves
+        start = np.broadcast_to(self.anchors[0], (len(curves), 1, 2))
+        end = np.broadcast_to(self.anchors[1], (len(curves), 1, 2))
+        return np.concatenate([start, curves, end], axis=1)
+
+    # 按弧长均匀取 n_points 个点作为控制点；锚定时首尾两个位置留给起点和终点
+    def fit(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        if self.anchors is None:
+            return resample_polyline(points[:, 0], points[:, 1], self.n_points).ravel()
+        return resample_polyline(points[:, 0], points[:, 1], self.n_points + 2)[1:-1].ravel()
+
+
+# Bezier 曲线：首尾控制点固定为转向的起点和终点，中间 degree - 1 个控制点为自由参数
+# degree 为 2、3、4 时分别有 2、4、6 个参数；曲线在 t ∈ [0, 1] 上均匀取 n_samples 个点
+class BezierCurve:
+    def __init__(self, intersection_polygon, start_point, end_point, degree=3, n_samples=20):
+        x_min, y_min, x_max, y_max = intersection_polygon.bounds
+        self.degree = degree
+        self.n_params = 2 * (degree - 1)
+        self.bounds = [(x_min, x_max), (y_min, y_max)] * (degree - 1)
+        self.start_point = np.asarray(start_point, dtype=np.float64)
+        self.end_point = np.asarray(end_point, dtype=np.float64)
+
+        # Bernstein 基函数矩阵 (n_samples, degree + 1)，只计算一次
+        t = np.linspace(0.0, 1.0, n_samples)[:, None]
+        k = np.arange(degree + 1)[None, :]
+        self.basis = comb(degree, k) * t ** k * (1 - t) ** (degree - k)
+        self.keep = np.zeros(n_samples, dtype=bool)
+        self.keep[[0, -1]] = True
+
+    def curves(self, x):
+        x = np.asarray(x, dtype=np.float64).reshape(self.n_params, -1)
+        n_curves = x.shape[1]
+        control = np.empty((n_curves, self.degree + 1, 2))
+        control[:, 0] = self.start_point
+        control[:, -1] = self.end_point
+        control[:, 1:-1] = x.T.reshape(n_curves, self.degree - 1, 2)
+        # (n_samples, degree + 1) @ (S, degree + 1, 2) -> (S, n_samples, 2)
+        return np.einsum('ik,skd->sid', self.basis, control)
+
+    # 首尾控制点固定，按弧长均匀取样后用最小二乘求中间的控制点
+    def fit(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        samples = resample_polyline(points[:, 0], points[:, 1], len(self.basis))
+        target = samples - np.outer(self.basis[:, 0], self.start_point) - np.outer(self.basis[:, -1], self.end_point)
+        control, *_ = np.linalg.lstsq(self.basis[:, 1:-1], target, rcond=None)
+        return control.ravel()
+
+
+def quadratic_bezier(intersection_polygon, start_point, end_point, n_samples=20):
+    return BezierCurve(intersection_polygon, start_point, end_point, degree=2, n_samples=n_samples)
+
+
+def cubic_bezier(intersection_polygon, start_point, end_point, n_samples=20):
+    return BezierCurve(intersection_polygon, start_point, end_point, degree=3, n_samples=n_samples)
+
+
+# 名称 -> 参数化，供命令行选择
+PARAMETERIZATIONS = {
+    'free': FreePoints,
+    'quadratic': quadratic_bezier,
+    'cubic': cubic_bezier,
+}
+
+
+# 按名称取参数化，供命令行使用：'free' 绑定 n_points，与 Optimizer_Model.optimizer 的默认参数化相同；
+# 直接传入 PARAMETERIZATIONS['free'] 时 optimizer 不再使用 n_points，总是 10 个控制点
+def parameterization_from_name(name, n_points=10):
+    if name == 'free':
+        return partial(FreePoints, n_points=n_points)
+    return PARAMETERIZATIONS[name]
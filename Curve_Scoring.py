@@ -0,0 +1,125 @@
+import numpy as np
+
+from Containment_Engine import contains_xy
+from Geometry_Kernels import boundary_distance, menger_curvature, ragged_reduce, ragged_sum, segment_lengths
+
+# 默认权重：w1 路径长度、w2 通过时间、w3 曲率（1 / 曲率半径）
+DEFAULT_WEIGHTS = {'w1': 0.3, 'w2': 0.3, 'w3': 0.4}
+
+# 距路口边界的最小距离（米）和最短路径长度（米），与 Population_distribution_Analysis.py 的限制条件一致
+MIN_EDGE_CLEARANCE = 6.92
+MIN_PATH_LENGTH = 2.4
+
+
+# 加权损失：w1 * 路径长度 + w2 * 通过时间 + w3 * 曲率
+# 曲率为首、中、尾三点外接圆半径的倒数（与 Loss_Function_Model.compute_loss 一致），转弯越急损失越大，直线为 0
+# 给出 means/stds（键为 PathLength、TimeDiff、Curvature）时先标准化；time_diff 为 NaN 时不计入时间项
+def weighted_loss(path_length, time_diff, curvature, weights=DEFAULT_WEIGHTS, means=None, stds=None):
+    terms = {'PathLength': path_length, 'TimeDiff': time_diff, 'Curvature': curvature}
+    if means is not None:
+        terms = {name: (np.asarray(value, dtype=np.float64) - means[name]) / stds[name] for name, value in terms.items()}
+    time_term = np.nan_to_num(np.asarray(terms['TimeDiff'], dtype=np.float64), nan=0.0)
+    return (weights['w1'] * np.asarray(terms['PathLength'], dtype=np.float64)
+            + weights.get('w2', 0.0) * time_term
+            + weights['w3'] * np.asarray(terms['Curvature'], dtype=np.float64))
+
+
+# 不等长批量评估：第 i 条曲线为采样点 [starts[i], stops[i])，区间可以重叠
+#   x, y       —— 所有曲线拼接后的坐标（UTM 米）
+#   timestamps —— 可选，与 x 对应的 datetime64 或秒数
+#   polygon    —— 可选，路口多边形，用于计算各点到边界的距离（在路口外为负）
+# 返回列名 -> 数组：
+#   Points          —— 点数
+#   PathLength      —— 路径长度
+#   TimeDiff        —— 首尾时间差（秒），没有时间戳时为 NaN
+#   CurvatureRadius —— 首、中、尾三点的外接圆半径，三点共线时为无穷大，点数不足三个时为 0
+#   Curvature       —— 首、中、尾三点的 Menger 曲率 1 / CurvatureRadius，三点共线或点数不足三个时为 0
+#   MeanCurvature / MaxCurvature —— 相邻三点 Menger 曲率的平均值 / 最大值
+#   MinClearance    —— 各点到路口边界的最小距离，没有 polygon 时为 NaN
+#   Loss            —— weighted_loss 的结果
+def score_ragged(x, y, starts, stops, timestamps=None, polygon=None, weights=DEFAULT_WEIGHTS, means=None, stds=None):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    stops = np.asarray(stops, dtype=np.int64)
+    points = np.column_stack([x, y])
+    counts = np.maximum(stops - starts, 0)
+    n_curves = len(counts)
+
+    path_length = ragged_sum(segment_lengths(x, y), starts, stops - 1)
+
+    time_diff = np.full(n_curves, np.nan)
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps)
+        has_points = counts > 0
+        elapsed = timestamps[stops[has_points] - 1] - timestamps[starts[has_points]]
+        if np.issubdtype(elapsed.dtype, np.timedelta64):
+            elapsed = elapsed / np.timedelta64(1, 's')
+        time_diff[has_points] = elapsed
+
+    curvature = np.zeros(n_curves)
+    curvature_radius = np.zeros(n_curves)
+    has_three = counts > 2
+    if has_three.any():
+        first = starts[has_three]
+        mid = first + counts[has_three] // 2
+        last = stops[has_three] - 1
+        curvature[has_three] = menger_curvature(points[first], points[mid], points[last])
+        with np.errstate(divide='ignore'):
+            curvature_radius[has_three] = 1 / curvature[has_three]
+
+    vertex_curvature = np.zeros(0)
+    if len(x) > 2:
+        vertex_curvature = menger_curvature(points[:-2], points[1:-1], points[2:])
+    n_vertices = np.maximum(counts - 2, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_curvature = ragged_sum(vertex_curvature, starts, stops - 2) / n_vertices
+    max_curvature = ragged_reduce(np.maximum, vertex_curvature, starts, stops - 2)
+
+    min_clearance = np.full(n_curves, np.nan)
+    if polygon is not None and len(x):
+        clearance = boundary_distance(np.asarray(polygon.exterior.coords), x, y)
+        clearance[~contains_xy(polygon, x, y)] *= -1
+        min_clearance = ragged_reduce(np.minimum, clearance, starts, stops)
+
+    return {
+        'Points': counts,
+        'PathLength': path_length,
+        'TimeDiff': time_diff,
+        'CurvatureRadius': curvature_radius,
+        'Curvature': curvature,
+        'MeanCurvature': mean_curvature,
+        'MaxCurvature': max_curvature,
+        'MinClearance': min_clearance,
+        'Loss': weighted_loss(path_length, time_diff, curvature, weights, means, stds),
+    }
+
+
+# 批量评估多条候选曲线
+#   curves     —— (n_curves, n_points, 2) 的坐标（UTM 米）
+#   timestamps —— 可选，(n_curves, n_points) 的 datetime64 或秒数
+#   mask       —— 可选，(n_curves, n_points) 的布尔数组，只有为 True 的点参与评估（例如只保留路口内的点）
+# 每条曲线的有效点按顺序压缩为一条折线，再交给 score_ragged 一次算出所有指标
+def score_curves(curves, timestamps=None, mask=None, polygon=None, weights=DEFAULT_WEIGHTS, means=None, stds=None):
+    curves = np.asarray(curves, dtype=np.float64)
+    n_curves, n_points = curves.shape[:2]
+    if mask is None:
+        mask = np.ones((n_curves, n_points), dtype=bool)
+    mask = np.asarray(mask, dtype=bool)
+
+    flat = np.flatnonzero(mask.ravel())
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps).ravel()[flat]
+    stops = np.cumsum(mask.sum(axis=1))
+    starts = stops - mask.sum(axis=1)
+    return score_ragged(curves[..., 0].ravel()[flat], curves[..., 1].ravel()[flat], starts, stops,
+                        timestamps, polygon, weights, means, stds)
+
+
+# 单条曲线的便捷接口：points 为 (n_points, 2)，返回各指标的标量
+def score_curve(points, timestamps=None, polygon=None, weights=DEFAULT_WEIGHTS, means=None, stds=None):
+    points = np.asarray(points, dtype=np.float64).reshape(1, -1, 2)
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps).reshape(1, -1)
+    scores = score_curves(points, timestamps, polygon=polygon, weights=weights, means=means, stds=stds)
+    return {name: values[0] for name, values in scores.items()}
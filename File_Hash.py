@@ -0,0 +1,11 @@
+import hashlib
+
+
+# 文件内容的 SHA-256，按块读取，大文件也不会一次读入内存
+# 用于判断输入文件是否变化：增量提取的清单、路口几何缓存和通过时间代理模型的训练数据
+def file_hash(file_path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,134 @@
+import numpy as np
+
+# 地球半径，单位米
+EARTH_RADIUS = 6371e3
+
+
+# 折线各段的长度（平面坐标，米）
+def segment_lengths(x, y):
+    return np.hypot(np.diff(x), np.diff(y))
+
+
+# 折线的总长度
+def path_length(x, y):
+    return float(segment_lengths(x, y).sum())
+
+
+# 从第一个点起的累计路径长度，长度与 x 相同，第一个元素为 0
+def cumulative_path_length(x, y):
+    lengths = np.zeros(len(x), dtype=np.float64)
+    np.cumsum(segment_lengths(x, y), out=lengths[1:])
+    return lengths
+
+
+# 两组经纬度（度）之间的大圆距离（米），支持广播
+def haversine(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+# 经纬度折线各段的大圆距离（米）
+def haversine_segment_lengths(lon, lat):
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    return haversine(lon[:-1], lat[:-1], lon[1:], lat[1:])
+
+
+# 三点的两倍有向面积（叉积），p1/p2/p3 的最后一维为 (x, y)，前面的维度可以任意
+def _twice_area(p1, p2, p3):
+    return ((p2[..., 0] - p1[..., 0]) * (p3[..., 1] - p1[..., 1])
+            - (p2[..., 1] - p1[..., 1]) * (p3[..., 0] - p1[..., 0]))
+
+
+# Menger 曲率：k = 4 * 面积 / (a * b * c)，三点共线时为 0
+def menger_curvature(p1, p2, p3):
+    p1, p2, p3 = (np.asarray(p, dtype=np.float64) for p in (p1, p2, p3))
+    a = np.hypot(p2[..., 0] - p1[..., 0], p2[..., 1] - p1[..., 1])
+    b = np.hypot(p3[..., 0] - p2[..., 0], p3[..., 1] - p2[..., 1])
+    c = np.hypot(p3[..., 0] - p1[..., 0], p3[..., 1] - p1[..., 1])
+    denominator = a * b * c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        curvature = 2 * np.abs(_twice_area(p1, p2, p3)) / denominator
+    return np.where(denominator > 0, curvature, 0.0)
+
+
+# 三点外接圆半径 R = 1 / k，三点共线时为无穷大
+def circumradius(p1, p2, p3):
+    with np.errstate(divide='ignore'):
+        return 1 / menger_curvature(p1, p2, p3)
+
+
+# 折线每个内部顶点与前后两点的外接圆半径，长度为 len(x) - 2
+def vertex_circumradii(x, y):
+    points = np.column_stack([x, y]).astype(np.float64)
+    return circumradius(points[:-2], points[1:-1], points[2:])
+
+
+# 不等长批量（ragged）：把多个区间 [starts[i], stops[i]) 的下标拼接为一个数组
+# 返回 (拼接后的下标, 长度为 n+1 的偏移量)，第 i 个区间对应 index[offsets[i]:offsets[i+1]]
+def ragged_index(starts, stops):
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.maximum(np.asarray(stops, dtype=np.int64) - starts, 0)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    index = np.arange(offsets[-1], dtype=np.int64) + np.repeat(starts - offsets[:-1], counts)
+    return index, offsets
+
+
+# 对每个区间 [starts[i], stops[i]) 做归约（ufunc 为 np.add、np.minimum、np.maximum 等），区间可以重叠
+# 空区间的结果为 empty
+def ragged_reduce(ufunc, values, starts, stops, empty=np.nan):
+    index, offsets = ragged_index(starts, stops)
+    result = np.full(len(offsets) - 1, empty, dtype=np.float64)
+    non_empty = offsets[1:] > offsets[:-1]
+    if index.size:
+        result[non_empty] = ufunc.reduceat(np.asarray(values)[index], offsets[:-1][non_empty])
+    return result
+
+
+# 对每个区间求和，空区间的和为 0
+def ragged_sum(values, starts, stops):
+    return ragged_reduce(np.add, values, starts, stops, empty=0.0)
+
+
+# 多条轨迹片段的路径长度：第 i 条为采样点 [starts[i], stops[i]) 组成的折线
+def range_path_lengths(x, y, starts, stops):
+    return ragged_sum(segment_lengths(x, y), starts, np.asarray(stops) - 1)
+
+
+# 按偏移量拼接存储的多条折线（例如 TruckDataset 的 offsets）各自的路径长度
+def ragged_path_lengths(x, y, offsets):
+    offsets = np.asarray(offsets, dtype=np.int64)
+    return range_path_lengths(x, y, offsets[:-1], offsets[1:])
+
+
+# 每个点到多边形边界（ring 为 (M, 2) 的边界坐标）的最短距离
+# 逐边循环、逐点向量化，与 Containment_Engine.crossing_number 的做法相同
+def boundary_distance(ring, x, y):
+    ring = np.asarray(ring, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    distance = np.full(x.shape, np.inf)
+    x1, y1 = ring[:, 0], ring[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    for ax, ay, bx, by in zip(x1, y1, x2, y2):
+        dx, dy = bx - ax, by - ay
+        length_squared = dx * dx + dy * dy
+        if length_squared == 0:
+            t = 0.0
+        else:
+            t = np.clip(((x - ax) * dx + (y - ay) * dy) / length_squared, 0.0, 1.0)
+        np.minimum(distance, np.hypot(x - (ax + t * dx), y - (ay + t * dy)), out=distance)
+    return distance
+
+
+# 按弧长把折线重新均匀采样为 n 个点（首尾点保持不变），返回 (n, 2)
+def resample_polyline(x, y, n):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    lengths = cumulative_path_length(x, y)
+    if lengths[-1] == 0:
+        return np.repeat([[x[0], y[0]]], n, axis=0)
+    positions = np.linspace(0.0, lengths[-1], n)
+    return np.column_stack([np.interp(positions, lengths, x), np.interp(positions, lengths, y)])
@@ -0,0 +1,149 @@
+import argparse
+import os
+
+import pandas as pd
+
+from File_Hash import file_hash
+from Intersection_Loader import INTERSECTION_FILE_PATH, load_intersections
+from Parallel_Pass_Driver import extract_pass_events_parallel
+from Pass_Event_Engine import PASS_EVENT_DTYPES, PASS_EVENT_FILE_PATH, read_pass_events, to_pass_ini
+from Truck_Movement_Store import (MOVEMENT_FILE_PATTERN, STORE_DIR, convert_movements, find_movement_files, has_partition,
+                                  partition_name)
+
+# 已处理数据集的清单，以及每个数据集各自的通过事件
+MANIFEST_FILE_PATH = 'Pass_INI_manifest.csv'
+PARTS_DIR = 'Pass_INI_events_parts'
+
+# 清单的列：
+#   File          —— 数据集文件名
+#   Source        —— 实际读取的文件（CSV，或 CSV 不存在时的列式存储分区）；CSV 变化时先重建其分区，再从分区提取
+#   Size/MTime    —— 文件大小和修改时间（纳秒），两者都不变时认为文件未变化，不再计算哈希
+#   SHA256        —— 文件内容哈希，大小或修改时间变化时用来确认内容是否真的改变
+#   Intersections —— 路口数据集的哈希，路口边界变化时所有数据集都要重新处理
+#   Events        —— 该数据集的通过事件数
+MANIFEST_COLUMNS = ['File', 'Source', 'Size', 'MTime', 'SHA256', 'Intersections', 'Events']
+
+
+def source_path(truck_file_path, store_dir=STORE_DIR):
+    if os.path.exists(truck_file_path):
+        return truck_file_path
+    return os.path.join(store_dir, f'{partition_name(truck_file_path)}.npz')
+
+
+def part_path(truck_file_path, parts_dir=PARTS_DIR):
+    return os.path.join(parts_dir, f'{partition_name(truck_file_path)}.csv')
+
+
+def read_manifest(manifest_path=MANIFEST_FILE_PATH):
+    if not os.path.exists(manifest_path):
+        return pd.DataFrame(columns=MANIFEST_COLUMNS)
+    return pd.read_csv(manifest_path, dtype={'File': str, 'Source': str, 'SHA256': str, 'Intersections': str})
+
+
+# 增量提取：只处理新增或内容发生变化的数据集，其余数据集直接使用上次保存的通过事件
+# file_paths 为 None 时按 pattern 查找所有数据集（见 Truck_Movement_Store.find_movement_files），与清单比较后新增的数据集也会被处理
+# 返回 (按 file_paths 顺序合并后的通过事件表, 统计信息)，合并结果与完整重跑一致
+def update_pass_events(file_paths=None, intersection_file_path=INTERSECTION_FILE_PATH,
+                       store_dir=STORE_DIR, manifest_path=MANIFEST_FILE_PATH, parts_dir=PARTS_DIR,
+                       workers=None, verbose=True, pattern=MOVEMENT_FILE_PATTERN):
+    if file_paths is None:
+        file_paths = find_movement_files(pattern, store_dir)
+    intersections_hash = file_hash(intersection_file_path)
+    manifest = read_manifest(manifest_path)
+    previous = {row['File']: row for row in manifest.to_dict('records')}
+
+    entries = {}
+    changed = []
+    for truck_file_path in file_paths:
+        if not os.path.exists(truck_file_path) and not has_partition(truck_file_path, store_dir):
+            if verbose:
+                print(f"File {truck_file_path} does not exist.")
+            continue
+
+        source = source_path(truck_file_path, store_dir)
+        stat = os.stat(source)
+        entry = {'File': truck_file_path, 'Source': source, 'Size': stat.st_size, 'MTime': stat.st_mtime_ns,
+                 'SHA256': None, 'Intersections': intersections_hash, 'Events': 0}
+        old = previous.get(truck_file_path)
+
+        unchanged = (
+            old is not None and old['Source'] == source and old['Intersections'] == intersections_hash
+            and os.path.exists(part_path(truck_file_path, parts_dir))
+        )
+        if unchanged and old['Size'] == entry['Size'] and old['MTime'] == entry['MTime']:
+            entry['SHA256'] = old['SHA256']
+        else:
+            entry['SHA256'] = file_hash(source)
+            # 只是修改时间变化（例如重新复制），内容相同时无需重新处理
+            unchanged = unchanged and old['SHA256'] == entry['SHA256']
+
+        if unchanged:
+            entry['Events'] = old['Events']
+        else:
+            changed.append(truck_file_path)
+        entries[truck_file_path] = entry
+
+    # 只对新增或变化的数据集提取通过事件，每个数据集的事件单独保存
+    os.makedirs(parts_dir, exist_ok=True)
+    if changed:
+        # 已有分区的数据集 CSV 变化后，先重建分区，保证提取读取的数据与清单中记录哈希的 CSV 一致
+        # 只是路口数据集变化时 CSV 没有变化，分区仍是最新的，convert_movements 会跳过，不重建整个列式存储
+        stale = [
+            truck_file_path for truck_file_path in changed
+            if os.path.exists(truck_file_path)
+            and os.path.exists(os.path.join(store_dir, f'{partition_name(truck_file_path)}.npz'))
+        ]
+        if stale:
+            convert_movements(stale, store_dir)
+        intersections = load_intersections(intersection_file_path, projected=True)
+        events, _ = extract_pass_events_parallel(changed, intersections, store_dir, workers=workers, verbose=verbose)
+        for truck_file_path in changed:
+            file_events = events[events['File'] == os.path.basename(truck_file_path)]
+            file_events.to_csv(part_path(truck_file_path, parts_dir), index=False)
+            entries[truck_file_path]['Events'] = len(file_events)
+
+    # 本次未指定但仍存在的数据集保留在清单中；文件已被删除的数据集，同时删除其保存的通过事件
+    kept = {
+        truck_file_path: row for truck_file_path, row in previous.items()
+        if truck_file_path not in entries and (os.path.exists(truck_file_path) or has_partition(truck_file_path, store_dir))
+    }
+    removed = [truck_file_path for truck_file_path in previous if truck_file_path not in entries and truck_file_path not in kept]
+    for truck_file_path in removed:
+        if os.path.exists(part_path(truck_file_path, parts_dir)):
+            os.remove(part_path(truck_file_path, parts_dir))
+
+    manifest = pd.DataFrame(list(entries.values()) + list(kept.values()), columns=MANIFEST_COLUMNS)
+    manifest.to_csv(manifest_path, index=False)
+
+    # 按 file_paths 的顺序拼接所有数据集的通过事件
+    parts = [read_pass_events(part_path(truck_file_path, parts_dir)) for truck_file_path in entries]
+    if parts:
+        events = pd.concat(parts, ignore_index=True).astype(PASS_EVENT_DTYPES)
+    else:
+        events = pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in PASS_EVENT_DTYPES.items()})
+
+    stats = {'processed': len(changed), 'skipped': len(entries) - len(changed), 'removed': len(removed), 'events': len(events)}
+    return events, stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Update the consolidated pass events, processing only new or changed movement files.')
+    parser.add_argument('files', nargs='*', default=None, help='default: every file matching --pattern')
+    parser.add_argument('--pattern', default=MOVEMENT_FILE_PATTERN)
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--manifest', default=MANIFEST_FILE_PATH)
+    parser.add_argument('--parts-dir', default=PARTS_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=PASS_EVENT_FILE_PATH)
+    parser.add_argument('--intersection-id', default=None, help='also write Pass_INI_ALL.csv for this intersection')
+    args = parser.parse_args()
+
+    events, stats = update_pass_events(args.files or None, args.intersections, args.store_dir, args.manifest,
+                                       args.parts_dir, workers=args.workers, pattern=args.pattern)
+    events.to_csv(args.output, index=False)
+    if args.intersection_id is not None:
+        to_pass_ini(events[events['IntersectionID'] == args.intersection_id]).to_csv('Pass_INI_ALL.csv', index=False)
+
+    print(f"{stats['processed']} files processed, {stats['skipped']} unchanged, {stats['removed']} removed")
+    print(f"{stats['events']} pass events saved to {args.output}")
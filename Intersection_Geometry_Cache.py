@@ -0,0 +1,116 @@
+import argparse
+import hashlib
+import os
+import pickle
+
+import numpy as np
+from shapely.geometry import Polygon
+
+from Curve_Scoring import MIN_EDGE_CLEARANCE
+from File_Hash import file_hash
+from Intersection_Loader import INTERSECTION_FILE_PATH, load_intersections
+from Projected_Mode import project
+
+try:
+    import shapely
+    _HAS_PREPARE = hasattr(shapely, 'prepare')
+except ImportError:
+    _HAS_PREPARE = False
+
+# 缓存格式的版本号，IntersectionGeometry 的字段变化时加一，旧缓存自动失效
+CACHE_VERSION = 1
+
+# 默认预先计算的边界缩进距离（米）
+CLEARANCE_DISTANCES = (MIN_EDGE_CLEARANCE,)
+
+
+# 路口数据集对应的缓存文件，例如 B4_intersections_unique_valid.csv -> B4_intersections_unique_valid_geometry.pkl
+def cache_path(intersection_file_path=INTERSECTION_FILE_PATH):
+    return f'{os.path.splitext(intersection_file_path)[0]}_geometry.pkl'
+
+
+# 单个路口预先计算好的几何数据
+#   polygon           —— 原始多边形（经度, 纬度），与 load_intersections(...).polygon(id) 一致
+#   projected_polygon —— 投影到 UTM（米）的多边形，已 prepare，可直接用于 contains_xy
+#   buffers           —— 缩进距离（米）-> 向内缩进后的 UTM 多边形，已 prepare
+#   bounds            —— UTM 包围盒 (x_min, y_min, x_max, y_max)
+#   content_hash      —— 边界坐标的 SHA-256，边界不变时保持不变
+class IntersectionGeometry:
+    def __init__(self, intersection_id, coordinates, clearances=CLEARANCE_DISTANCES):
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        x, y = project(coordinates[:, 0], coordinates[:, 1])
+
+        self.intersection_id = intersection_id
+        self.polygon = Polygon(coordinates)
+        self.projected_polygon = Polygon(np.column_stack([x, y]))
+        self.buffers = {float(clearance): self.projected_polygon.buffer(-clearance) for clearance in clearances}
+        self.bounds = self.projected_polygon.bounds
+        self.content_hash = hashlib.sha256(coordinates.tobytes()).hexdigest()
+        self.prepare()
+
+    # shapely 的预处理结果不会被序列化，从缓存读回后需要重新 prepare
+    def prepare(self):
+        if _HAS_PREPARE:
+            shapely.prepare(self.projected_polygon)
+            for buffered_polygon in self.buffers.values():
+                shapely.prepare(buffered_polygon)
+        return self
+
+    # 向内缩进 clearance 米的多边形，不在缓存中的距离计算一次后保留
+    def buffer(self, clearance=MIN_EDGE_CLEARANCE):
+        clearance = float(clearance)
+        if clearance not in self.buffers:
+            self.buffers[clearance] = self.projected_polygon.buffer(-clearance)
+            if _HAS_PREPARE:
+                shapely.prepare(self.buffers[clearance])
+        return self.buffers[clearance]
+
+
+# 为路口数据集中的每个路口建立 IntersectionGeometry，重复的 ID 取第一个匹配的行
+def build_geometry(intersection_file_path=INTERSECTION_FILE_PATH, clearances=CLEARANCE_DISTANCES):
+    intersections = load_intersections(intersection_file_path)
+    geometry = {}
+    for intersection_id in intersections:
+        if intersection_id not in geometry:
+            geometry[intersection_id] = IntersectionGeometry(intersection_id, intersections.coordinates(intersection_id), clearances)
+    return geometry
+
+
+# 加载路口几何缓存，返回 IntersectionID -> IntersectionGeometry
+# 路口数据集内容、缩进距离或缓存版本变化时重新计算并覆盖缓存
+def load_geometry(intersection_file_path=INTERSECTION_FILE_PATH, clearances=CLEARANCE_DISTANCES, path=None, rebuild=False):
+    path = path or cache_path(intersection_file_path)
+    source_hash = file_hash(intersection_file_path)
+    clearances = tuple(sorted({float(clearance) for clearance in clearances}))
+
+    if not rebuild and os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception:
+            # 缓存损坏、被截断或由不兼容的版本写入（可能抛出任意异常）时重新计算
+            cached = None
+        if (
+            isinstance(cached, dict) and cached.get('version') == CACHE_VERSION
+            and cached.get('source_hash') == source_hash and cached.get('clearances') == clearances
+        ):
+            return {intersection_id: bundle.prepare() for intersection_id, bundle in cached['geometry'].items()}
+
+    geometry = build_geometry(intersection_file_path, clearances)
+    # 先写临时文件再原子替换，与 Optimizer_Result_Cache 相同，中断或并发写入时不会留下不完整的缓存
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        pickle.dump({'version': CACHE_VERSION, 'source_hash': source_hash, 'clearances': clearances, 'geometry': geometry}, f)
+    os.replace(temporary, path)
+    return geometry
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or refresh the cached intersection geometry.')
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--clearance', type=float, nargs='*', default=list(CLEARANCE_DISTANCES))
+    parser.add_argument('--rebuild', action='store_true')
+    args = parser.parse_args()
+
+    geometry = load_geometry(args.intersections, args.clearance, rebuild=args.rebuild)
+    print(f"{len(geometry)} intersections cached in {cache_path(args.intersections)}")
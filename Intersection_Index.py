@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from Containment_Engine import contains_xy
+
+try:
+    import shapely
+    from shapely.strtree import STRtree
+    _HAS_STRTREE_QUERY = hasattr(shapely, 'points')
+except ImportError:
+    _HAS_STRTREE_QUERY = False
+
+
+# 所有路口边界的空间索引（STRtree），一次调用把整条轨迹的每个采样点分配到所在的路口
+#   ids      —— 去重后的 IntersectionID，按在文件中首次出现的顺序排列
+#   polygons —— 与 ids 对应的路口多边形（与 intersections.polygon(id) 一致，取第一个匹配的行）
+# locate_all(x, y) 返回所有 (采样点下标, 路口下标) 对，位于重叠或嵌套路口内的采样点对每个路口各出现一次；
+# locate(x, y) 返回每个采样点所在路口在 ids 中的下标，不在任何路口内为 -1，路口相互重叠时只取 ids 中靠前的路口
+class IntersectionIndex:
+    def __init__(self, intersections):
+        self.ids = pd.unique(intersections.ids)
+        self.polygons = [intersections.polygon(intersection_id) for intersection_id in self.ids]
+        self.bounds = np.array([polygon.bounds for polygon in self.polygons], dtype=np.float64).reshape(-1, 4)
+        self._tree = STRtree(self.polygons) if _HAS_STRTREE_QUERY else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    # 返回 (sample_indices, polygon_indices)，按采样点下标排序
+    def locate_all(self, x, y):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+
+        if self._tree is not None:
+            # 'within'：采样点位于路口内部，与 polygon.contains(point) 的判定一致
+            sample_indices, polygon_indices = self._tree.query(shapely.points(x, y), predicate='within')
+        else:
+            # 没有 shapely 2 时按包围盒筛选后逐个路口判断
+            sample_pieces, polygon_pieces = [], []
+            for polygon_index in range(len(self.ids)):
+                x_min, y_min, x_max, y_max = self.bounds[polygon_index]
+                candidates = np.flatnonzero((x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max))
+                if candidates.size:
+                    inside = candidates[contains_xy(self.polygons[polygon_index], x[candidates], y[candidates])]
+                    sample_pieces.append(inside)
+                    polygon_pieces.append(np.full(len(inside), polygon_index, dtype=np.int64))
+            sample_indices = np.concatenate(sample_pieces) if sample_pieces else np.zeros(0, dtype=np.int64)
+            polygon_indices = np.concatenate(polygon_pieces) if polygon_pieces else np.zeros(0, dtype=np.int64)
+
+        order = np.lexsort((polygon_indices, sample_indices))
+        return sample_indices[order].astype(np.int64), polygon_indices[order].astype(np.int64)
+
+    def locate(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        located = np.full(x.size, len(self.ids), dtype=np.int64)
+        sample_indices, polygon_indices = self.locate_all(x, y)
+        np.minimum.at(located, sample_indices, polygon_indices)
+        located[located == len(self.ids)] = -1
+        return located.reshape(x.shape)
+
+    # 每辆卡车经过了哪些路口：返回 (卡车数, 路口数) 的布尔矩阵
+    # truck_rows 为每个采样点所属卡车的行号；重叠路口内的采样点对每个路口都计入
+    def passed_matrix(self, truck_rows, x, y, n_trucks):
+        sample_indices, polygon_indices = self.locate_all(x, y)
+        passed = np.zeros((n_trucks, len(self.ids)), dtype=bool)
+        passed[np.asarray(truck_rows)[sample_indices], polygon_indices] = True
+        return passed
@@ -0,0 +1,159 @@
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import Polygon
+
+from Projected_Mode import GEOGRAPHIC_CRS, PROJECTED_CRS, project
+
+# 路口边界数据集的默认路径
+INTERSECTION_FILE_PATH = 'B4_intersections_unique_valid.csv'
+
+# WKT 中的数字（用于格式不规范时的兜底解析）
+_NUMBER_PATTERN = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+# 所有路口边界的扁平存储：
+#   coords  —— 形状为 (N, 2) 的 float64 数组，每行是 WKT 顺序的 (x, y)：
+#              crs 为 EPSG:4326 时是 (经度, 纬度)，投影到 EPSG:32750 后是 UTM 米
+#   offsets —— 长度为 n+1 的 int64 数组，第 i 个路口的坐标为 coords[offsets[i]:offsets[i+1]]
+#   ids     —— 每个路口的 IntersectionID
+class IntersectionTable:
+    def __init__(self, ids, coords, offsets, crs=GEOGRAPHIC_CRS):
+        self.ids = np.asarray(ids, dtype=object)
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.crs = crs
+
+        # IntersectionID -> 行号，重复的 ID 保留所有行，按出现顺序排列
+        self._rows = {}
+        for row, intersection_id in enumerate(self.ids):
+            self._rows.setdefault(intersection_id, []).append(row)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, intersection_id):
+        return intersection_id in self._rows
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    # 第一个匹配的行号（与原脚本中 intersection_info.iloc[0] 一致）
+    def row(self, intersection_id):
+        rows = self._rows.get(intersection_id)
+        if rows is None:
+            raise KeyError(intersection_id)
+        return rows[0]
+
+    # 同一 IntersectionID 的所有行号（原始数据集中可能有重复）
+    def rows(self, intersection_id):
+        return list(self._rows.get(intersection_id, []))
+
+    def row_coordinates(self, row):
+        return self.coords[self.offsets[row]:self.offsets[row + 1]]
+
+    # 以下方法返回的都是 coords 的视图，不复制数据
+    def coordinates(self, intersection_id):
+        return self.row_coordinates(self.row(intersection_id))
+
+    def longitudes(self, intersection_id):
+        return self.coordinates(intersection_id)[:, 0]
+
+    def latitudes(self, intersection_id):
+        return self.coordinates(intersection_id)[:, 1]
+
+    def bounds(self, intersection_id):
+        coords = self.coordinates(intersection_id)
+        x_min, y_min = coords.min(axis=0)
+        x_max, y_max = coords.max(axis=0)
+        return x_min, y_min, x_max, y_max
+
+    def polygon(self, intersection_id):
+        return Polygon(self.coordinates(intersection_id))
+
+    # 每个路口的边界是否闭合（首尾坐标相同）
+    def is_closed(self):
+        first = self.coords[self.offsets[:-1]]
+        last = self.coords[self.offsets[1:] - 1]
+        return np.all(first == last, axis=1)
+
+    # 按行号筛选，返回新的 IntersectionTable
+    def subset(self, rows):
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        counts = np.diff(self.offsets)[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        if len(rows):
+            index = np.concatenate([np.arange(self.offsets[r], self.offsets[r + 1]) for r in rows])
+        else:
+            index = np.zeros(0, dtype=np.int64)
+        return IntersectionTable(self.ids[rows], self.coords[index], offsets, crs=self.crs)
+
+    # 投影模式：一次性把所有边界坐标转换到 UTM（米），返回新的 IntersectionTable
+    def to_projected(self):
+        if self.crs == PROJECTED_CRS:
+            return self
+        x, y = project(self.coords[:, 0], self.coords[:, 1])
+        return IntersectionTable(self.ids, np.column_stack([x, y]), self.offsets, crs=PROJECTED_CRS)
+
+    def to_wkt(self, row):
+        coords = self.row_coordinates(row)
+        return 'LINESTRING(' + ', '.join(f'{x} {y}' for x, y in coords) + ')'
+
+
+# 将 WKT LINESTRING 字符串列解析为扁平坐标数组和偏移量数组
+def parse_linestrings(coordinates):
+    body = (
+        pd.Series(coordinates, dtype=object).fillna('').astype(str)
+        .str.replace(r'^\s*LINESTRING\s*\(', '', regex=True)
+        .str.replace(r'\)\s*$', '', regex=True)
+        .str.strip()
+    )
+
+    # 快速路径：整列拼接为一个字符串，一次性交给 NumPy 解析
+    pair_counts = np.where(body.str.len().to_numpy() > 0, body.str.count(',').to_numpy() + 1, 0)
+    flat = None
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            flat = np.fromstring(' '.join(body).replace(',', ' '), dtype=np.float64, sep=' ')
+        except (ValueError, DeprecationWarning):
+            flat = None
+
+    # 兜底路径：格式不规范（例如缺少坐标分量）时按数字正则逐行计数
+    if flat is None or flat.size != 2 * pair_counts.sum():
+        number_counts = body.str.count(_NUMBER_PATTERN.pattern).to_numpy()
+        pair_counts = number_counts // 2
+        numbers = np.asarray(_NUMBER_PATTERN.findall(' '.join(body)), dtype=np.float64)
+        # 丢弃每行末尾不成对的数字
+        keep = np.ones(numbers.size, dtype=bool)
+        ends = np.cumsum(number_counts)
+        keep[ends[number_counts % 2 == 1] - 1] = False
+        flat = numbers[keep]
+
+    offsets = np.zeros(len(pair_counts) + 1, dtype=np.int64)
+    np.cumsum(pair_counts, out=offsets[1:])
+    return flat.reshape(-1, 2), offsets
+
+
+# 加载路口边界数据集，返回 IntersectionTable
+# 坐标统一为 WKT 的 (经度, 纬度) 顺序，没有有效坐标的行会被移除
+# projected=True 时返回投影到 UTM（米）的边界，可直接与车辆数据的 X/Y 比较
+def load_intersections(file_path=INTERSECTION_FILE_PATH, projected=False):
+    data = pd.read_csv(file_path, header=None, names=["IntersectionID", "Coordinates"], dtype=str)
+
+    # 文件首行可能是表头
+    data = data[data['IntersectionID'] != 'IntersectionID']
+
+    coords, offsets = parse_linestrings(data['Coordinates'].to_numpy())
+    table = IntersectionTable(data['IntersectionID'].to_numpy(), coords, offsets)
+
+    # 移除空的边界
+    non_empty = np.diff(table.offsets) > 0
+    if not non_empty.all():
+        table = table.subset(non_empty)
+    return table.to_projected() if projected else table
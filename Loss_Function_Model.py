@@ -1,68 +1,58 @@
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import haversine_distances
+from Intersection_Loader import load_intersections
+from Timestamp_Parser import parse_timestamps, to_datetime64
+from Geometry_Kernels import ragged_path_lengths, ragged_sum, vertex_circumradii
 
-# 加载数据
-intersections_df = pd.read_csv('/mnt/data/B4_intersections_unique_valid.csv')
+# 加载数据（投影模式：路口边界与车辆的 X/Y 同为 UTM 米）
+intersections = load_intersections('/mnt/data/B4_intersections_unique_valid.csv', projected=True)
 truck_movements_df = pd.read_csv('/mnt/data/B4_truck_movements_01.csv')
 
 # 转换时间戳为日期时间格式
-truck_movements_df['TimeStamp'] = pd.to_datetime(truck_movements_df['TimeStamp'], format='%d %b %Y %H:%M:%S:%f')
+truck_movements_df['TimeStamp'] = to_datetime64(parse_timestamps(truck_movements_df['TimeStamp']))
 
 # 损失函数模型的参数
 def compute_loss(path_length, time_diff, curvature_radius, w1=0.3, w2=0.3, w3=0.4):
     return w1 * path_length + w2 * time_diff + w3 * (1 / (curvature_radius + 1e-5))  # 避免除以零
 
-# 计算路径长度
-def calculate_path_length(coords):
-    total_length = 0.0
-    for i in range(1, len(coords)):
-        total_length += haversine_distances([coords[i-1], coords[i]])[0][1] * 6371000  # 转换为米
-    return total_length
-
-# 计算曲率半径（这里假设使用每个点的曲率半径的平均值）
-def calculate_curvature_radius(coords):
-    radii = []
-    for i in range(1, len(coords)-1):
-        p1, p2, p3 = coords[i-1], coords[i], coords[i+1]
-        a = haversine_distances([p1, p2])[0][1] * 6371000
-        b = haversine_distances([p2, p3])[0][1] * 6371000
-        c = haversine_distances([p3, p1])[0][1] * 6371000
-        s = (a + b + c) / 2
-        area = np.sqrt(s * (s - a) * (s - b) * (s - c))
-        radius = (a * b * c) / (4 * area + 1e-5)  # 避免除以零
-        radii.append(radius)
-    return np.mean(radii)
-
-# 计算每条道路曲线的评分
-def evaluate_curves(intersections_df, truck_movements_df):
-    results = []
-    for index, row in intersections_df.iterrows():
-        intersection_id = row['IntersectionID']
-        geo_string = row['Coordinates']
-        coords = [tuple(map(float, coord.split())) for coord in geo_string.split('(')[1].strip(')').split(',')]
-        
-        path_length = calculate_path_length(coords)
-        curvature_radius = calculate_curvature_radius(coords)
-        
-        # 过滤经过这个路口的卡车数据
-        trucks_at_intersection = truck_movements_df[
-            (truck_movements_df['X'] >= min([c[0] for c in coords])) &
-            (truck_movements_df['X'] <= max([c[0] for c in coords])) &
-            (truck_movements_df['Y'] >= min([c[1] for c in coords])) &
-            (truck_movements_df['Y'] <= max([c[1] for c in coords]))
-        ]
-        
-        time_diff = (trucks_at_intersection['TimeStamp'].max() - trucks_at_intersection['TimeStamp'].min()).total_seconds()
-        
-        loss = compute_loss(path_length, time_diff, curvature_radius)
-        results.append((intersection_id, path_length, time_diff, curvature_radius, loss))
-    
-    results_df = pd.DataFrame(results, columns=['IntersectionID', 'PathLength', 'TimeDiff', 'CurvatureRadius', 'Loss'])
+# 计算每条道路曲线的评分（所有路口的边界按偏移量拼接，一次计算）
+def evaluate_curves(intersections, truck_movements_df):
+    x, y = intersections.coords[:, 0], intersections.coords[:, 1]
+    starts, stops = intersections.offsets[:-1], intersections.offsets[1:]
+
+    path_lengths = ragged_path_lengths(x, y, intersections.offsets)
+
+    # 每个顶点与前后两点的外接圆半径，只对同一路口内的三点求平均
+    radii = vertex_circumradii(x, y)
+    n_vertices = np.maximum(stops - starts - 2, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        curvature_radii = ragged_sum(radii, starts, stops - 2) / n_vertices
+
+    # 过滤经过这个路口的卡车数据（包围盒），计算首尾时间差
+    truck_x = truck_movements_df['X'].to_numpy()
+    truck_y = truck_movements_df['Y'].to_numpy()
+    timestamps = truck_movements_df['TimeStamp'].to_numpy()
+    time_diffs = np.full(len(intersections), np.nan)
+    for row in range(len(intersections)):
+        coords = intersections.row_coordinates(row)
+        x_min, y_min = coords.min(axis=0)
+        x_max, y_max = coords.max(axis=0)
+        at_intersection = (truck_x >= x_min) & (truck_x <= x_max) & (truck_y >= y_min) & (truck_y <= y_max)
+        if at_intersection.any():
+            time_diffs[row] = (timestamps[at_intersection].max() - timestamps[at_intersection].min()) / np.timedelta64(1, 's')
+
+    losses = compute_loss(path_lengths, time_diffs, curvature_radii)
+    results_df = pd.DataFrame({
+        'IntersectionID': intersections.ids,
+        'PathLength': path_lengths,
+        'TimeDiff': time_diffs,
+        'CurvatureRadius': curvature_radii,
+        'Loss': losses,
+    })
     return results_df
 
 # 评估曲线
-results_df = evaluate_curves(intersections_df, truck_movements_df)
+results_df = evaluate_curves(intersections, truck_movements_df)
 print(results_df)
 
 # 保存结果到CSV文件
@@ -0,0 +1,152 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from Curve_Parameterization import PARAMETERIZATIONS, parameterization_from_name
+from Intersection_Geometry_Cache import load_geometry
+from Intersection_Loader import INTERSECTION_FILE_PATH
+from Optimizer_Engines import ENGINES, engine_from_name
+from Optimizer_Model import movement_endpoints, optimizer
+from Optimizer_Result_Cache import RESULT_CACHE_DIR, OptimizerResultCache, cached_optimizer
+
+
+# 一个转向的优化结果
+#   path    —— 优化后位于路口内的控制点 [(x, y), ...]（UTM 米）
+#   loss    —— 最优损失
+#   seconds —— 该转向优化所用的时间
+#   cached  —— 结果是否直接取自优化结果缓存
+class MovementResult:
+    def __init__(self, direction, start_point, end_point, path, loss, seconds, cached=False):
+        self.direction = direction
+        self.start_point = start_point
+        self.end_point = end_point
+        self.path = path
+        self.loss = loss
+        self.seconds = seconds
+        self.cached = cached
+
+
+# 一个路口所有转向的优化结果，按转向的原有顺序排列
+#   seconds —— 整个路口的实际耗时（并行时约等于最慢的转向）
+class CurveSetResult:
+    def __init__(self, intersection_id, movements, seconds, workers):
+        self.intersection_id = intersection_id
+        self.movements = list(movements)
+        self.seconds = seconds
+        self.workers = workers
+
+    def __len__(self):
+        return len(self.movements)
+
+    def __iter__(self):
+        return iter(self.movements)
+
+    def __getitem__(self, direction):
+        for movement in self.movements:
+            if movement.direction == direction:
+                return movement
+        raise KeyError(direction)
+
+    # 每个转向一行：IntersectionID, Direction, Loss, Seconds, Points, Path
+    def to_frame(self):
+        return pd.DataFrame({
+            'IntersectionID': [self.intersection_id] * len(self.movements),
+            'Direction': [movement.direction for movement in self.movements],
+            'Loss': [movement.loss for movement in self.movements],
+            'Seconds': [movement.seconds for movement in self.movements],
+            'Points': [len(movement.path) for movement in self.movements],
+            'Path': [movement.path for movement in self.movements],
+        })
+
+
+# 优化一个转向（在工作进程中执行），返回 MovementResult
+#   cache  —— 可选的 OptimizerResultCache（见 Optimizer_Result_Cache.py），命中时不再优化
+#   engine —— 可选的优化引擎（见 Optimizer_Engines.py），默认为 differential_evolution
+def optimize_movement(intersection_polygon, direction, start_point, end_point, n_points, de_workers, seed, parameterization=None,
+                      cache=None, engine=None):
+    start = time.perf_counter()
+    cached = False
+    if cache is None:
+        path, loss = optimizer(intersection_polygon, start_point, end_point, n_points=n_points, workers=de_workers, seed=seed,
+                               parameterization=parameterization, engine=engine)
+    else:
+        path, loss, cached = cached_optimizer(cache, intersection_polygon, start_point, end_point, n_points=n_points,
+                                              workers=de_workers, seed=seed, parameterization=parameterization,
+                                              engine=engine)
+    return MovementResult(direction, start_point, end_point, path, float(loss), time.perf_counter() - start, cached)
+
+
+# 同时优化一个路口的所有转向
+#   workers    —— 同时优化的转向数，默认为 min(转向数, CPU 核数)；为 1 时在当前进程中依次执行
+#   de_workers —— 每个转向内部 differential_evolution 的 workers（见 Optimizer_Model.optimizer）
+#   seed       —— 随机种子，每个转向使用 seed + 序号
+#   parameterization —— 曲线参数化（见 Curve_Parameterization.py），默认为 n_points 个自由控制点
+#   cache      —— 可选的 OptimizerResultCache，路口几何、转向、参数化、权重和优化器设置都不变的转向直接取缓存结果
+#   engine     —— 可选的优化引擎（见 Optimizer_Engines.py），默认为 differential_evolution
+def schedule_movements(intersection_polygon, intersection_id=None, directions=None, n_points=10, workers=None,
+                       de_workers=1, seed=None, parameterization=None, cache=None, engine=None):
+    endpoints = movement_endpoints(intersection_polygon)
+    tasks = [
+        (direction, start_point, end_point)
+        for direction, points in endpoints.items() if directions is None or direction in directions
+        for start_point, end_point in points
+    ]
+    seeds = [None if seed is None else seed + i for i in range(len(tasks))]
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) or 1
+
+    start = time.perf_counter()
+    if workers <= 1:
+        movements = [
+            optimize_movement(intersection_polygon, direction, start_point, end_point, n_points, de_workers, task_seed,
+                              parameterization, cache, engine)
+            for (direction, start_point, end_point), task_seed in zip(tasks, seeds)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(optimize_movement, intersection_polygon, direction, start_point, end_point,
+                                n_points, de_workers, task_seed, parameterization, cache, engine)
+                for (direction, start_point, end_point), task_seed in zip(tasks, seeds)
+            ]
+            movements = [future.result() for future in futures]
+
+    return CurveSetResult(intersection_id, movements, time.perf_counter() - start, workers)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Optimize all turning movements of one intersection concurrently.')
+    parser.add_argument('intersection_id', nargs='?', default='INT_94')
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--directions', nargs='*', default=None)
+    parser.add_argument('--n-points', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--de-workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--parameterization', choices=sorted(PARAMETERIZATIONS), default='free')
+    parser.add_argument('--output', default=None, help='save the per-movement results as CSV')
+    parser.add_argument('--cache', default=RESULT_CACHE_DIR, help='optimizer result cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='always run the optimizer')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=None, help='optimizer engine (default: differential evolution)')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else OptimizerResultCache(args.cache)
+    try:
+        engine = engine_from_name(args.engine, args.de_workers)
+    except ValueError as e:
+        parser.error(str(e))
+    parameterization = parameterization_from_name(args.parameterization, args.n_points)
+    intersection_polygon = load_geometry(args.intersections)[args.intersection_id].projected_polygon
+    curve_set = schedule_movements(intersection_polygon, args.intersection_id, args.directions, args.n_points,
+                                   args.workers, args.de_workers, args.seed, parameterization, cache, engine)
+
+    for movement in curve_set:
+        print(f"Direction: {movement.direction}, Loss: {movement.loss}, {movement.seconds:.1f} s"
+              f"{' (cached)' if movement.cached else ''}")
+    slowest = max((movement.seconds for movement in curve_set), default=0.0)
+    print(f"{len(curve_set)} movements in {curve_set.seconds:.1f} s with {curve_set.workers} workers "
+          f"(slowest movement {slowest:.1f} s)")
+    if args.output:
+        curve_set.to_frame().to_csv(args.output, index=False)
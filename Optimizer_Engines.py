@@ -0,0 +1,194 @@
+import numpy as np
+from scipy.optimize import OptimizeResult, differential_evolution, minimize
+
+
+# 优化引擎：在参数的 bounds 内最小化曲线目标函数（见 Optimizer_Model.CurveObjective）
+# 每个引擎提供：
+#   minimize(objective_function, bounds, seed=None, init='latinhypercube', callback=None)
+#       objective_function 可以一次评估 (n_params, S) 的整个种群，返回 (S,) 的损失；单个 (n_params,) 的解返回标量
+#       init 为 'latinhypercube' 或 (S, n_params) 的初始种群（例如 Warm_Start.warm_start_population 的结果）
+#       callback 每一代结束时以 OptimizeResult 调用（字段与 differential_evolution 的 intermediate_result 相同），
+#       抛出 StopIteration 即提前结束；返回 OptimizeResult（x, fun, nit, nfev, message）
+#   describe() —— 引擎及其设置，用于优化结果缓存的键（见 Optimizer_Result_Cache.py）
+
+
+# 原有的 scipy differential_evolution；默认设置与 Optimizer_Model.de_settings 相同
+#   workers —— 为 1 时整个种群一次向量化评估，大于 1 时种群分给进程池逐个评估
+class DifferentialEvolutionEngine:
+    name = 'de'
+
+    def __init__(self, strategy='best1bin', maxiter=1000, popsize=15, tol=0.01, polish=True, workers=1):
+        self.strategy = strategy
+        self.maxiter = maxiter
+        self.popsize = popsize
+        self.tol = tol
+        self.polish = polish
+        self.workers = workers
+
+    def describe(self):
+        return {'engine': self.name, 'strategy': self.strategy, 'maxiter': self.maxiter, 'popsize': self.popsize,
+                'tol': self.tol, 'polish': self.polish}
+
+    def minimize(self, objective_function, bounds, seed=None, init='latinhypercube', callback=None):
+        # vectorized=True 要求 updating='deferred'：每一代的候选解全部生成后再一起评估
+        return differential_evolution(objective_function, bounds, strategy=self.strategy, maxiter=self.maxiter,
+                                      popsize=self.popsize, tol=self.tol, polish=self.polish, updating='deferred',
+                                      vectorized=self.workers == 1, workers=self.workers, seed=seed, init=init,
+                                      callback=callback)
+
+
+# 不经过 differential_evolution 自带的 L-BFGS-B 局部优化，改为在 DE 结束后用 scipy.optimize.minimize 的
+# 无梯度方法（默认 Nelder-Mead）从 DE 的最优解继续优化；目标函数含有路口内判断，在路口边界处不连续，数值梯度不可靠
+#   de_maxiter —— DE 阶段的最大代数，可以小于单独使用 DE 时的代数，剩下的精细搜索交给局部优化
+#   workers    —— DE 阶段的 workers，见 DifferentialEvolutionEngine
+class PolishedDifferentialEvolutionEngine:
+    name = 'de-polish'
+
+    def __init__(self, method='Nelder-Mead', de_maxiter=1000, popsize=15, tol=0.01, local_maxiter=None, workers=1):
+        self.method = method
+        self.de = DifferentialEvolutionEngine(maxiter=de_maxiter, popsize=popsize, tol=tol, polish=False, workers=workers)
+        self.local_maxiter = local_maxiter
+
+    def describe(self):
+        return {'engine': self.name, 'method': self.method, 'de': self.de.describe(), 'local_maxiter': self.local_maxiter}
+
+    def minimize(self, objective_function, bounds, seed=None, init='latinhypercube', callback=None):
+        result = self.de.minimize(objective_function, bounds, seed=seed, init=init, callback=callback)
+        options = {} if self.local_maxiter is None else {'maxiter': self.local_maxiter}
+        local = minimize(objective_function, result.x, method=self.method, bounds=bounds, options=options)
+        if local.fun < result.fun:
+            result.x, result.fun = np.clip(local.x, *np.array(bounds, dtype=np.float64).T), float(local.fun)
+        result.nfev += local.nfev
+        result.message = f'{result.message} Polished with {self.method}: {local.message}'
+        return result
+
+
+# NumPy 实现的 CMA-ES（(mu/mu_w, lambda)，秩一与秩 mu 更新，累积步长控制）
+# 在归一化到 [0, 1] 的参数空间中搜索；超出范围的候选解截断到范围内评估，损失加上与截断点距离平方的惩罚
+#   sigma   —— 初始步长（归一化空间）
+#   popsize —— 每一代的候选解个数 lambda，默认为 4 + 3 ln(n_params)
+#   tol     —— 最近 10 + 30 n / lambda 代的最优损失与当前种群的损失之差都不超过 tol * max(1, |最优损失|) 时结束；
+#              种群较小，不使用 differential_evolution 按种群标准差判断收敛的方式，否则会过早结束
+#   tolx    —— 步长（归一化空间）小于 tolx 时结束
+# init 为初始种群时以其第一个解（热启动时为损失最低的历史轨迹）作为初始均值，否则在范围内均匀随机取一点
+class CMAESEngine:
+    name = 'cmaes'
+
+    def __init__(self, sigma=0.3, popsize=None, maxiter=1000, tol=1e-6, tolx=1e-8):
+        self.sigma = sigma
+        self.popsize = popsize
+        self.maxiter = maxiter
+        self.tol = tol
+        self.tolx = tolx
+
+    def describe(self):
+        return {'engine': self.name, 'sigma': self.sigma, 'popsize': self.popsize, 'maxiter': self.maxiter,
+                'tol': self.tol, 'tolx': self.tolx}
+
+    def minimize(self, objective_function, bounds, seed=None, init='latinhypercube', callback=None):
+        rng = np.random.default_rng(seed)
+        low, high = np.array(bounds, dtype=np.float64).T
+        width = np.where(high > low, high - low, 1.0)
+        n = len(low)
+
+        # 策略参数（Hansen 的默认设置）
+        lam = self.popsize or 4 + int(3 * np.log(n))
+        mu = lam // 2
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        weights /= weights.sum()
+        mueff = 1.0 / np.sum(weights ** 2)
+        cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+        cs = (mueff + 2) / (n + mueff + 5)
+        c1 = 2 / ((n + 1.3) ** 2 + mueff)
+        cmu = min(1 - c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff))
+        damps = 1 + 2 * max(0.0, np.sqrt((mueff - 1) / (n + 1)) - 1) + cs
+        chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+        history_length = 10 + int(np.ceil(30 * n / lam))
+
+        if isinstance(init, str):
+            mean = rng.uniform(0.0, 1.0, n)
+        else:
+            mean = np.clip((np.asarray(init, dtype=np.float64)[0] - low) / width, 0.0, 1.0)
+        sigma = self.sigma
+        pc, ps = np.zeros(n), np.zeros(n)
+        B, D = np.eye(n), np.ones(n)
+        C = np.eye(n)
+
+        best_x, best_fun = low + mean * width, np.inf
+        nfev, nit = 0, 0
+        history = []
+        message = 'Maximum number of iterations has been exceeded.'
+        success = False
+        while nit < self.maxiter:
+            nit += 1
+            z = mean + sigma * (rng.standard_normal((lam, n)) * D) @ B.T
+            clipped = np.clip(z, 0.0, 1.0)
+            population = low + clipped * width
+            energies = np.asarray(objective_function(population.T), dtype=np.float64)
+            nfev += lam
+
+            i = int(np.argmin(energies))
+            if energies[i] < best_fun:
+                best_x, best_fun = population[i].copy(), float(energies[i])
+
+            history.append(float(energies[i]))
+            finite = np.isfinite(energies)
+            scale = max(1.0, float(np.median(np.abs(energies[finite])))) if finite.any() else 1.0
+            penalized = energies + scale * np.sum((z - clipped) ** 2, axis=1)
+            selected = z[np.argsort(penalized, kind='stable')[:mu]]
+
+            old_mean = mean
+            mean = weights @ selected
+            y = (mean - old_mean) / sigma
+            ps = (1 - cs) * ps + np.sqrt(cs * (2 - cs) * mueff) * (B @ ((B.T @ y) / D))
+            hsig = np.linalg.norm(ps) / np.sqrt(1 - (1 - cs) ** (2 * nit)) / chi_n < 1.4 + 2 / (n + 1)
+            pc = (1 - cc) * pc + hsig * np.sqrt(cc * (2 - cc) * mueff) * y
+            steps = (selected - old_mean) / sigma
+            C = ((1 - c1 - cmu) * C + c1 * (np.outer(pc, pc) + (1 - hsig) * cc * (2 - cc) * C)
+                 + cmu * (steps.T * weights) @ steps)
+            sigma *= np.exp((cs / damps) * (np.linalg.norm(ps) / chi_n - 1))
+            C = (C + C.T) / 2
+            eigenvalues, B = np.linalg.eigh(C)
+            D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+            recent = np.r_[history[-history_length:], energies]
+            spread = np.ptp(recent) if len(history) >= history_length and np.isfinite(recent).all() else np.inf
+            tolerance = self.tol * max(1.0, abs(best_fun))
+            convergence = tolerance / spread if spread > 0 else np.inf
+            if callback is not None:
+                try:
+                    callback(OptimizeResult(x=best_x, fun=best_fun, nit=nit, nfev=nfev, population=population,
+                                            population_energies=energies, convergence=convergence))
+                except StopIteration:
+                    message = 'callback function requested stop early'
+                    break
+            if spread <= tolerance:
+                message = 'Optimization terminated successfully.'
+                success = True
+                break
+            if sigma * D.max() < self.tolx:
+                message = 'Step size fell below tolx.'
+                success = True
+                break
+
+        return OptimizeResult(x=best_x, fun=best_fun, nit=nit, nfev=nfev, message=message, success=success)
+
+
+# 名称 -> 引擎，供命令行选择
+ENGINES = {
+    'de': DifferentialEvolutionEngine,
+    'de-polish': PolishedDifferentialEvolutionEngine,
+    'cmaes': CMAESEngine,
+}
+
+
+# 按名称建立引擎，供命令行使用；name 为 None 时返回 None（即 Optimizer_Model.optimizer 的默认 differential_evolution）
+# workers 交给基于 DE 的引擎；CMA-ES 每一代只有十几个候选解，始终在当前进程中向量化评估，workers 不为 1 时抛出 ValueError
+def engine_from_name(name, workers=1):
+    if name is None:
+        return None
+    if name in ('de', 'de-polish'):
+        return ENGINES[name](workers=workers)
+    if workers != 1:
+        raise ValueError(f"Engine {name} does not support --de-workers {workers}")
+    return ENGINES[name]()
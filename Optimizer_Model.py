@@ -1,145 +1,197 @@
-import pandas as pd
+import time
+from functools import partial
 import numpy as np
-from shapely.geometry import Point, Polygon
-from scipy.optimize import differential_evolution
 import matplotlib.pyplot as plt
-
-# 加载数据集
+from Intersection_Loader import load_intersections
+from Intersection_Geometry_Cache import load_geometry
+from Containment_Engine import contains_xy
+from Curve_Scoring import score_curve, score_curves, weighted_loss
+from Curve_Parameterization import FreePoints
+from Signed_Distance_Field import signed_distance
+from Warm_Start import warm_start_population
+from Optimizer_Engines import DifferentialEvolutionEngine
+
+# 数据集路径；只在运行本脚本或绘图时加载，导入 optimizer / CurveObjective 的模块（包括各个工作进程）不读取文件
 intersection_file_path = 'B4_intersections_unique_valid.csv'
-intersection_data = pd.read_csv(intersection_file_path, header=None, names=["IntersectionID", "Coordinates"])
-
-# 处理 Coordinates 列
-intersection_data['Coordinates'] = intersection_data['Coordinates'].str.replace('LINESTRING\\(', '', regex=True).str.replace('\\)', '', regex=True)
-
-# 定义一个函数，将坐标分割为单独的经度和纬度列表
-def split_coordinates(coord_string):
-    latitudes = []
-    longitudes = []
-    for coord in coord_string.split(','):
-        try:
-            lon, lat = map(float, coord.split())
-            latitudes.append(lat)
-            longitudes.append(lon)
-        except ValueError:
-            continue
-    return latitudes, longitudes
-
-# 应用函数以拆分坐标
-intersection_data['Latitude'], intersection_data['Longitude'] = zip(*intersection_data['Coordinates'].apply(split_coordinates))
-
-# 移除空的列表
-intersection_data = intersection_data[intersection_data['Latitude'].map(len) > 0]
 
 # 设置权重和损失函数
 weights = {'w1': 0.3, 'w2': 0.3, 'w3': 0.4}
 
+# 默认引擎 differential_evolution 的搜索设置（优化结果缓存的键也包含这些设置，见 Optimizer_Result_Cache.py）
+de_settings = {'strategy': 'best1bin', 'maxiter': 1000, 'popsize': 15, 'tol': 0.01}
+
 # 评估曲线质量
 def evaluate_curve_quality(points):
-    path_length = 0
-    curvature_radius = 0
-
-    # 计算路径长度
-    for i in range(1, len(points)):
-        prev_point = points[i-1]
-        curr_point = points[i]
-        path_length += np.sqrt((curr_point[0] - prev_point[0])**2 + (curr_point[1] - prev_point[1])**2)
-
-    # 计算曲率半径
-    if len(points) > 2:
-        p1, p2, p3 = np.array(points[0]), np.array(points[len(points)//2]), np.array(points[-1])
-        A = np.array([p1[:2], p2[:2], p3[:2]])
-        curvature_radius = np.abs(np.linalg.det(np.vstack((A.T, np.ones((1,3))))) / (2 * np.linalg.norm(np.cross(p2[:2] - p1[:2], p3[:2] - p1[:2]))))
-    
-    total_loss = weights['w1'] * path_length + weights['w3'] * curvature_radius
-    return total_loss
+    # 没有时间戳，损失只包含路径长度和曲率两项：w1 * 路径长度 + w3 * 曲率（见 Curve_Scoring.weighted_loss）
+    return score_curve(points, weights=weights)['Loss']
+
+# 目标函数：differential_evolution 以 vectorized=True 调用，一次传入整个种群
+# population 的形状为 (n_params, S)，由曲线参数化（见 Curve_Parameterization.py）转换为 S 条候选曲线
+# 所有曲线点的路口内判断和所有候选曲线的评分都是一次数组运算；路口内不足两个点的曲线损失为无穷大
+# 用类而不是闭包，使目标函数可以被 pickle，交给 differential_evolution 的 workers 进程池
+#   distance_field —— 可选的有向距离场（见 Signed_Distance_Field.py），给出时路口内判断和边界距离都改为查表
+#   clearance      —— 可选，路口内的点与边界的距离不超过 clearance 米的曲线损失为无穷大
+#   time_model     —— 可选的通过时间代理模型（见 Pass_Time_Surrogate.py），给出时用预测的通过时间计入 w2 一项
+# timings 累计生成曲线、路口内判断和评分各自所用的时间（秒），供 Optimizer_Telemetry.py 统计
+class CurveObjective:
+    def __init__(self, intersection_polygon, parameterization, distance_field=None, clearance=None, time_model=None):
+        self.intersection_polygon = intersection_polygon
+        self.parameterization = parameterization
+        self.distance_field = distance_field
+        self.clearance = clearance
+        self.time_model = time_model
+        self.timings = {'curves': 0.0, 'containment': 0.0, 'scoring': 0.0}
+
+    # 评估整个种群，返回 (score_curves 的各项指标, (S,) 的可行标记)
+    # 路口内不足两个点，或给出 clearance 时有点离边界太近的曲线不可行；多目标优化（见 Pareto_Optimizer.py）直接使用各项指标
+    def evaluate(self, population):
+        start = time.perf_counter()
+        curves = self.parameterization.curves(population)
+        x, y = curves[..., 0].ravel(), curves[..., 1].ravel()
+        containment_start = time.perf_counter()
+        if self.distance_field is not None:
+            distance = self.distance_field.lookup(x, y).reshape(curves.shape[:2])
+        elif self.clearance is not None:
+            distance = signed_distance(self.intersection_polygon, x, y).reshape(curves.shape[:2])
+        else:
+            distance = None
+        if distance is not None:
+            inside = distance > 0
+        else:
+            inside = contains_xy(self.intersection_polygon, x, y).reshape(curves.shape[:2])
+        inside |= self.parameterization.keep
+        scoring_start = time.perf_counter()
+        scores = score_curves(curves, mask=inside, weights=weights)
+        if self.time_model is not None:
+            # 曲线的进入点和离开点为路口内的第一个和最后一个点
+            rows = np.arange(len(curves))
+            first = np.argmax(inside, axis=1)
+            last = inside.shape[1] - 1 - np.argmax(inside[:, ::-1], axis=1)
+            chord_length = np.hypot(*(curves[rows, last] - curves[rows, first]).T)
+            scores['TimeDiff'] = self.time_model.predict(scores['PathLength'], chord_length, scores['CurvatureRadius'])
+            scores['Loss'] = weighted_loss(scores['PathLength'], scores['TimeDiff'], scores['Curvature'], weights)
+        feasible = inside.sum(axis=1) >= 2
+        if self.clearance is not None:
+            too_close = (distance > 0) & (distance <= self.clearance) & ~self.parameterization.keep
+            feasible &= ~too_close.any(axis=1)
+        self.timings['curves'] += containment_start - start
+        self.timings['containment'] += scoring_start - containment_start
+        self.timings['scoring'] += time.perf_counter() - scoring_start
+        return scores, feasible
+
+    def __call__(self, population):
+        population = np.asarray(population, dtype=np.float64)
+        scores, feasible = self.evaluate(population)
+        loss = np.where(feasible, scores['Loss'], np.inf)
+        # 单个候选解（例如最后的局部优化，或 workers 模式下逐个评估）返回标量
+        return loss if population.ndim > 1 else float(loss[0])
 
 # 定义优化器
-def optimizer(intersection_polygon, start_point, end_point, n_points=10):
-    def objective_function(coords):
-        points = [(coords[i], coords[i+1]) for i in range(0, len(coords), 2)]
-        points = [point for point in points if intersection_polygon.contains(Point(point[0], point[1]))]
-        if len(points) < 2:
-            return float('inf')
-        return evaluate_curve_quality(points)
-
-    # 定义边界
-    bounds = []
-    for _ in range(n_points):
-        bounds.append((intersection_polygon.bounds[0], intersection_polygon.bounds[2]))  # Longitude bounds
-        bounds.append((intersection_polygon.bounds[1], intersection_polygon.bounds[3]))  # Latitude bounds
-
-    result = differential_evolution(objective_function, bounds, strategy='best1bin', maxiter=1000, popsize=15, tol=0.01)
-    optimized_coords = result.x
-
-    optimized_path = [(optimized_coords[i], optimized_coords[i+1]) for i in range(0, len(optimized_coords), 2)]
-    optimized_path = [point for point in optimized_path if intersection_polygon.contains(Point(point[0], point[1]))]
+#   parameterization —— 曲线参数化，以 (路口多边形, 起点, 终点) 调用；默认为 n_points 个自由控制点（原有方式）
+#   workers          —— differential_evolution 的 workers：为 1 时整个种群一次向量化评估；
+#                       大于 1（或 -1 表示全部 CPU）时种群分给进程池逐个评估，此时不能同时使用 vectorized
+#   seed             —— 随机种子，便于复现
+#   distance_field / clearance —— 见 CurveObjective
+#   warm_start       —— 可选，该转向的历史通过轨迹 [(n, 2), ...]（见 Warm_Start.py），损失最低的若干条作为初始种群
+#   telemetry        —— 可选的 OptimizerTelemetry（见 Optimizer_Telemetry.py），记录每一代的收敛情况，并可在损失停滞时提前结束
+#   engine           —— 优化引擎（见 Optimizer_Engines.py），默认为按 de_settings 设置的 differential_evolution（原有方式）
+#   time_model       —— 可选的通过时间代理模型（见 Pass_Time_Surrogate.py），见 CurveObjective
+def optimizer(intersection_polygon, start_point, end_point, n_points=10, workers=1, seed=None, parameterization=None,
+              distance_field=None, clearance=None, warm_start=None, telemetry=None, engine=None, time_model=None):
+    if parameterization is None:
+        parameterization = partial(FreePoints, n_points=n_points)
+    parameterization = parameterization(intersection_polygon, start_point, end_point)
+    objective_function = CurveObjective(intersection_polygon, parameterization, distance_field, clearance, time_model)
+    init = 'latinhypercube'
+    if warm_start is not None:
+        init = warm_start_population(parameterization, objective_function, warm_start, popsize=de_settings['popsize'], seed=seed)
+    callback = None
+    if telemetry is not None:
+        objective_function = telemetry.attach(objective_function, parameterization.bounds)
+        callback = telemetry.callback
+
+    if engine is None:
+        engine = DifferentialEvolutionEngine(**de_settings, workers=workers)
+    result = engine.minimize(objective_function, parameterization.bounds, seed=seed, init=init, callback=callback)
+    if telemetry is not None:
+        telemetry.finish(result)
+
+    optimized_path = parameterization.curves(result.x)[0]
+    inside = contains_xy(intersection_polygon, optimized_path[:, 0], optimized_path[:, 1]) | parameterization.keep
+    optimized_path = [(x, y) for x, y in optimized_path[inside].tolist()]
 
     return optimized_path, result.fun
 
-# 处理路口数据
-intersection_id = 'INT_94'
-intersection_info = intersection_data[intersection_data['IntersectionID'] == intersection_id]
-if intersection_info.empty:
-    print(f"No data found for Intersection ID: {intersection_id}")
-
-# 定义路口区域的多边形
-intersection_polygon = Polygon(zip(intersection_info.iloc[0]['Longitude'], intersection_info.iloc[0]['Latitude']))
-
 # 定义每个路径的起点和终点坐标范围（需要根据实际数据调整）
-path_directions = {
-    'left-right': [((intersection_polygon.bounds[0], (intersection_polygon.bounds[1] + intersection_polygon.bounds[3]) / 2), 
-                   (intersection_polygon.bounds[2], (intersection_polygon.bounds[1] + intersection_polygon.bounds[3]) / 2))],
-    'right-left': [((intersection_polygon.bounds[2], (intersection_polygon.bounds[1] + intersection_polygon.bounds[3]) / 2), 
-                   (intersection_polygon.bounds[0], (intersection_polygon.bounds[1] + intersection_polygon.bounds[3]) / 2))],
-    'up-right': [(((intersection_polygon.bounds[0] + intersection_polygon.bounds[2]) / 2, intersection_polygon.bounds[3]), 
-                 (intersection_polygon.bounds[2], (intersection_polygon.bounds[1] + intersection_polygon.bounds[3]) / 2))],
-    'right-up': [((intersection_polygon.bounds[2], (intersection_polygon.bounds[1] + intersection_polygon.bounds[3]) / 2), 
-                 ((intersection_polygon.bounds[0] + intersection_polygon.bounds[2]) / 2, intersection_polygon.bounds[3]))],
-    'up-left': [(((intersection_polygon.bounds[0] + intersection_polygon.bounds[2]) / 2, intersection_polygon.bounds[3]), 
-                (intersection_polygon.bounds[0], (intersection_polygon.bounds[1] + intersection_polygon.bounds[3]) / 2))],
-    'left-up': [((intersection_polygon.bounds[0], (intersection_polygon.bounds[1] + intersection_polygon.bounds[3]) / 2), 
-                ((intersection_polygon.bounds[0] + intersection_polygon.bounds[2]) / 2, intersection_polygon.bounds[3]))]
-}
-
-optimized_paths = []
-
-for direction, points in path_directions.items():
-    for start_point, end_point in points:
-        print(f"Optimizing path for direction: {direction}")
-
-        optimized_path, min_loss = optimizer(intersection_polygon, start_point, end_point)
-        optimized_paths.append((direction, optimized_path, min_loss))
-
-# 打印优化后的路径
-for direction, path, loss in optimized_paths:
-    print(f"Direction: {direction}, Loss: {loss}")
-    for coord in path:
-        print(coord)
+# 返回 转向 -> [(起点, 终点)]，六个转向分别为左右、右左、上右、右上、上左、左上
+def movement_endpoints(intersection_polygon):
+    x_min, y_min, x_max, y_max = intersection_polygon.bounds
+    x_mid, y_mid = (x_min + x_max) / 2, (y_min + y_max) / 2
+    return {
+        'left-right': [((x_min, y_mid), (x_max, y_mid))],
+        'right-left': [((x_max, y_mid), (x_min, y_mid))],
+        'up-right': [((x_mid, y_max), (x_max, y_mid))],
+        'right-up': [((x_max, y_mid), (x_mid, y_max))],
+        'up-left': [((x_mid, y_max), (x_min, y_mid))],
+        'left-up': [((x_min, y_mid), (x_mid, y_max))]
+    }
 
 # 绘制优化后的路径
-def plot_optimized_paths(intersection_id, optimized_paths):
-    intersection_info = intersection_data[intersection_data['IntersectionID'] == intersection_id]
-    if intersection_info.empty:
+# intersections 为投影模式的路口边界（路径长度、曲率半径和 buffer 距离都以米为单位），默认加载 intersection_file_path
+def plot_optimized_paths(intersection_id, optimized_paths, intersections=None):
+    if intersections is None:
+        intersections = load_intersections(intersection_file_path, projected=True)
+    if intersection_id not in intersections:
         print(f"No data found for Intersection ID: {intersection_id}")
         return None
 
     plt.figure(figsize=(12, 8))
 
     # 绘制路口边界
-    for i in range(len(intersection_info)):
-        plt.plot(intersection_info.iloc[i]['Longitude'], intersection_info.iloc[i]['Latitude'], marker='o', label=f'{intersection_id} Boundary')
+    for row in intersections.rows(intersection_id):
+        boundary = intersections.row_coordinates(row)
+        plt.plot(boundary[:, 0], boundary[:, 1], marker='o', label=f'{intersection_id} Boundary')
 
     # 绘制所有优化后的路径
     for direction, optimized_path, min_loss in optimized_paths:
-        lons, lats = zip(*optimized_path)
-        plt.plot(lons, lats, marker='x', linestyle='-', label=f'Optimized Path {direction} (Loss: {min_loss:.2f})')
+        xs, ys = zip(*optimized_path)
+        plt.plot(xs, ys, marker='x', linestyle='-', label=f'Optimized Path {direction} (Loss: {min_loss:.2f})')
 
     plt.title(f'Optimized Paths for Intersection: {intersection_id}')
-    plt.xlabel('Longitude')
-    plt.ylabel('Latitude')
+    plt.xlabel('X (m)')
+    plt.ylabel('Y (m)')
     plt.legend()
     plt.grid(True)
     plt.show()
 
-# 绘制所有优化路径
-plot_optimized_paths(intersection_id, optimized_paths)
+# 优化一个路口的六个转向并绘图；路口不存在时只打印提示
+def main(intersection_id='INT_94'):
+    # 处理路口数据
+    intersections = load_intersections(intersection_file_path, projected=True)
+    if intersection_id not in intersections:
+        print(f"No data found for Intersection ID: {intersection_id}")
+        return None
+
+    # 定义路口区域的多边形（取自路口几何缓存，已投影并 prepare）
+    intersection_polygon = load_geometry(intersection_file_path)[intersection_id].projected_polygon
+
+    # 六个转向的优化同时在进程池中进行，总耗时约等于最慢的一个转向
+    # 路口几何、转向、权重和优化器设置都不变时直接取优化结果缓存中的结果
+    from Movement_Scheduler import schedule_movements
+    from Optimizer_Result_Cache import OptimizerResultCache
+    curve_set = schedule_movements(intersection_polygon, intersection_id, cache=OptimizerResultCache())
+    optimized_paths = [(movement.direction, movement.path, movement.loss) for movement in curve_set]
+    cached = sum(movement.cached for movement in curve_set)
+    print(f"{len(optimized_paths)} movements optimized in {curve_set.seconds:.1f} s ({cached} from the result cache)")
+
+    # 打印优化后的路径
+    for direction, path, loss in optimized_paths:
+        print(f"Direction: {direction}, Loss: {loss}")
+        for coord in path:
+            print(coord)
+
+    # 绘制所有优化路径
+    plot_optimized_paths(intersection_id, optimized_paths, intersections)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+
+from Curve_Parameterization import FreePoints
+from Optimizer_Model import de_settings, optimizer, weights
+
+# 优化结果缓存目录：每个结果一个 pickle 文件，文件名为缓存键
+RESULT_CACHE_DIR = 'Optimizer_result_cache'
+
+# 缓存的条目数和总大小（字节）上限，超出时按最近使用时间淘汰最久未用的条目
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 缓存格式的版本号，键的组成或条目内容变化时加一，旧条目自动失效
+CACHE_VERSION = 2
+
+
+# 曲线参数化的可比较描述：类或函数取 模块.名称，functools.partial 再加上预先绑定的参数
+# 默认参数化（None）与 partial(FreePoints, n_points=n_points) 等价，两者得到相同的描述
+def describe_parameterization(parameterization, n_points=10):
+    if parameterization is None:
+        parameterization = functools.partial(FreePoints, n_points=n_points)
+    if isinstance(parameterization, functools.partial):
+        return {
+            'function': describe_parameterization(parameterization.func),
+            'args': [repr(arg) for arg in parameterization.args],
+            'keywords': {key: repr(value) for key, value in sorted(parameterization.keywords.items())},
+        }
+    return f'{parameterization.__module__}.{parameterization.__qualname__}'
+
+
+# 多边形顶点（UTM 米）的 SHA-256，与 IntersectionGeometry.content_hash 一样只依赖边界坐标
+def polygon_hash(intersection_polygon):
+    coordinates = np.ascontiguousarray(intersection_polygon.exterior.coords, dtype=np.float64)
+    return hashlib.sha256(coordinates.tobytes()).hexdigest()
+
+
+# 一次优化的缓存键：路口多边形、转向的起点和终点、曲线参数化、损失权重和优化器设置都相同时才会命中
+# 参数与 Optimizer_Model.optimizer 相同；workers 只影响评估方式，不影响结果，不计入键
+# engine 为 None 时即按 de_settings 设置的 differential_evolution，否则取引擎的 describe()（见 Optimizer_Engines.py）
+# time_model 取模型参数的哈希（见 Pass_Time_Surrogate.PassTimeSurrogate.content_hash），重新训练后不再命中
+def result_key(intersection_polygon, start_point, end_point, n_points=10, seed=None, parameterization=None,
+               distance_field=None, clearance=None, warm_start=None, engine=None, time_model=None):
+    warm_start_hash = None
+    if warm_start is not None:
+        digest = hashlib.sha256()
+        for points in warm_start:
+            digest.update(np.ascontiguousarray(points, dtype=np.float64).tobytes())
+            digest.update(b'|')
+        warm_start_hash = digest.hexdigest()
+
+    description = {
+        'version': CACHE_VERSION,
+        'polygon': polygon_hash(intersection_polygon),
+        'start_point': [float(value) for value in start_point],
+        'end_point': [float(value) for value in end_point],
+        'parameterization': describe_parameterization(parameterization, n_points),
+        'weights': {key: float(value) for key, value in sorted(weights.items())},
+        'de_settings': {key: repr(value) for key, value in sorted(de_settings.items())},
+        'seed': seed,
+        'distance_field': None if distance_field is None else float(distance_field.resolution),
+        'clearance': None if clearance is None else float(clearance),
+        'warm_start': warm_start_hash,
+        'engine': None if engine is None else engine.describe(),
+        'time_model': None if time_model is None else time_model.content_hash,
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+# 磁盘上的优化结果缓存，条目为 (优化后的路径, 最小损失)
+# 命中时更新文件的修改时间，淘汰时按修改时间从旧到新删除，即 LRU
+# 写入先写临时文件再替换，多个工作进程同时读写同一个目录也不会读到不完整的条目
+class OptimizerResultCache:
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    # 所有条目 [(修改时间, 大小, 路径), ...]，从最久未用到最近使用
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return sorted(entries)
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    # 返回 (path, loss)，未命中或条目损坏时返回 None
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return entry['path'], entry['loss']
+
+    def put(self, key, path, loss):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        target = self._path(key)
+        temporary = f'{target}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            pickle.dump({'path': [tuple(point) for point in path], 'loss': float(loss)}, f)
+        os.replace(temporary, target)
+        self.evict()
+
+    # 删除最久未用的条目，直到条目数和总大小都不超过上限；返回删除的条目数
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if len(entries) - removed <= self.max_entries and total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self._entries():
+            self._remove(path)
+
+    def stats(self):
+        entries = self._entries()
+        return {'entries': len(entries), 'bytes': sum(size for _, size, _ in entries)}
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# 带缓存的 Optimizer_Model.optimizer：命中时直接返回缓存的路径和损失，否则优化后写入缓存
+# 返回 (optimized_path, min_loss, cached)
+def cached_optimizer(cache, intersection_polygon, start_point, end_point, n_points=10, workers=1, seed=None,
+                     parameterization=None, distance_field=None, clearance=None, warm_start=None, engine=None,
+                     time_model=None):
+    key = result_key(intersection_polygon, start_point, end_point, n_points, seed, parameterization, distance_field,
+                     clearance, warm_start, engine, time_model)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry[0], entry[1], True
+
+    path, loss = optimizer(intersection_polygon, start_point, end_point, n_points=n_points, workers=workers, seed=seed,
+                           parameterization=parameterization, distance_field=distance_field, clearance=clearance,
+                           warm_start=warm_start, engine=engine, time_model=time_model)
+    cache.put(key, path, loss)
+    return path, loss, False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Show, trim or clear the on-disk optimizer result cache.')
+    parser.add_argument('--cache', default=RESULT_CACHE_DIR)
+    parser.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES)
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES)
+    parser.add_argument('--clear', action='store_true')
+    args = parser.parse_args()
+
+    cache = OptimizerResultCache(args.cache, args.max_entries, args.max_bytes)
+    if args.clear:
+        cache.clear()
+    removed = cache.evict()
+    stats = cache.stats()
+    print(f"{stats['entries']} results ({stats['bytes'] / 1024:.1f} KiB) in {args.cache}, {removed} evicted")
@@ -0,0 +1,174 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from Curve_Parameterization import PARAMETERIZATIONS, parameterization_from_name
+from Intersection_Geometry_Cache import load_geometry
+from Intersection_Loader import INTERSECTION_FILE_PATH
+from Optimizer_Model import movement_endpoints, optimizer
+
+# 每个 路口/转向 的收敛记录文件，扩展名为 .csv 或 .json
+TRACE_FILE_PATH = 'Optimizer_trace_{intersection_id}_{direction}.csv'
+
+# 提前结束的默认设置：patience 代内最优损失的下降不超过 min_delta（相对）和 abs_delta（绝对）中的较大者时结束
+# 绝对阈值用于原有的自由控制点：其损失按比例不断趋近于 0，相对下降始终很大
+DEFAULT_PATIENCE = 30
+DEFAULT_MIN_DELTA = 1e-4
+DEFAULT_ABS_DELTA = 1e-3
+
+TRACE_COLUMNS = ['Generation', 'BestLoss', 'MeanLoss', 'Infeasible', 'Diversity', 'Convergence', 'Evaluations',
+                 'EvaluationsPerSecond', 'Seconds', 'CurvesSeconds', 'ContainmentSeconds', 'ScoringSeconds']
+
+
+# differential_evolution 的收敛记录，交给 Optimizer_Model.optimizer(..., telemetry=...) 使用
+# 每一代记录一行（列见 TRACE_COLUMNS）：
+#   BestLoss / MeanLoss —— 当前种群的最优损失和可行解（损失有限）的平均损失，Infeasible 为不可行解的个数
+#   Diversity           —— 种群多样性：每个参数的标准差除以其取值范围，再对所有参数取平均
+#   Convergence         —— differential_evolution 自身的收敛程度，达到 1 时因 tol 结束
+#   Evaluations         —— 累计评估的候选解个数（vectorized=True 时 nfev 统计的是调用次数，这里按候选解计数）
+#   *Seconds            —— 累计用时，以及目标函数中生成曲线、路口内判断和评分各自的累计用时（见 CurveObjective.timings）
+# patience 为 None 或 0 时不提前结束
+# workers > 1 时目标函数在工作进程中执行，评估次数取 nfev，分项用时无法统计，记为 0
+class OptimizerTelemetry:
+    def __init__(self, patience=None, min_delta=DEFAULT_MIN_DELTA, abs_delta=DEFAULT_ABS_DELTA):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.abs_delta = abs_delta
+        self.generations = []
+        self.summary = {}
+        self.stopped_early = False
+        self.objective_function = None
+        self.evaluations = 0
+
+    # 包装目标函数以统计评估次数，返回包装后的目标函数
+    def attach(self, objective_function, bounds):
+        self.objective_function = objective_function
+        low, high = np.array(bounds, dtype=np.float64).T
+        self.width = np.where(high > low, high - low, 1.0)
+        self.generations = []
+        self.summary = {}
+        self.stopped_early = False
+        self.evaluations = 0
+        self.start = self._last_time = time.perf_counter()
+        self._last_evaluations = 0
+        return self
+
+    def __call__(self, population):
+        loss = self.objective_function(population)
+        self.evaluations += np.size(loss)
+        return loss
+
+    def _timings(self):
+        timings = getattr(self.objective_function, 'timings', None) or {}
+        return {f'{name.capitalize()}Seconds': timings.get(name, 0.0) for name in ('curves', 'containment', 'scoring')}
+
+    # differential_evolution 的 callback，每一代结束时调用；抛出 StopIteration 即提前结束
+    def callback(self, intermediate_result):
+        now = time.perf_counter()
+        energies = intermediate_result.population_energies
+        finite = np.isfinite(energies)
+        evaluations = self.evaluations or int(intermediate_result.nfev)
+        elapsed = now - self._last_time
+
+        self.generations.append({
+            'Generation': int(intermediate_result.nit),
+            'BestLoss': float(intermediate_result.fun),
+            'MeanLoss': float(energies[finite].mean()) if finite.any() else np.inf,
+            'Infeasible': int(np.count_nonzero(~finite)),
+            'Diversity': float(np.mean(np.std(intermediate_result.population, axis=0) / self.width)),
+            'Convergence': float(intermediate_result.convergence),
+            'Evaluations': evaluations,
+            'EvaluationsPerSecond': (evaluations - self._last_evaluations) / elapsed if elapsed > 0 else np.nan,
+            'Seconds': now - self.start,
+            **self._timings(),
+        })
+        self._last_time, self._last_evaluations = now, evaluations
+
+        if self.plateaued():
+            self.stopped_early = True
+            raise StopIteration
+
+    # 最近 patience 代内最优损失的下降不超过 max(min_delta * |损失|, abs_delta)
+    def plateaued(self):
+        if not self.patience or len(self.generations) <= self.patience:
+            return False
+        previous = self.generations[-1 - self.patience]['BestLoss']
+        current = self.generations[-1]['BestLoss']
+        if not np.isfinite(previous):
+            return False
+        return previous - current <= max(self.min_delta * abs(previous), self.abs_delta)
+
+    # differential_evolution 结束后调用，汇总整次优化；最后的局部优化（polish）的评估次数单独统计
+    def finish(self, result):
+        evaluations = self.evaluations or int(result.nfev)
+        generation_evaluations = self.generations[-1]['Evaluations'] if self.generations else 0
+        self.summary = {
+            'Generations': int(result.nit),
+            'Evaluations': evaluations,
+            'PolishEvaluations': evaluations - generation_evaluations,
+            'Loss': float(result.fun),
+            'Seconds': time.perf_counter() - self.start,
+            'StoppedEarly': self.stopped_early,
+            'Message': str(result.message),
+            **self._timings(),
+        }
+        return self.summary
+
+    def to_frame(self):
+        return pd.DataFrame(self.generations, columns=TRACE_COLUMNS)
+
+    # 扩展名为 .json 时写入 {"summary": ..., "generations": [...]}（无穷大记为 null），否则写入每一代一行的 CSV
+    def write_trace(self, trace_path):
+        if trace_path.lower().endswith('.json'):
+            def clean(value):
+                return None if isinstance(value, float) and not np.isfinite(value) else value
+            generations = [{key: clean(value) for key, value in record.items()} for record in self.generations]
+            summary = {key: clean(value) for key, value in self.summary.items()}
+            with open(trace_path, 'w') as f:
+                json.dump({'summary': summary, 'generations': generations}, f, indent=2)
+        else:
+            self.to_frame().to_csv(trace_path, index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Optimize turning movements with per-generation telemetry and plateau-based early stopping.')
+    parser.add_argument('intersection_id', nargs='?', default='INT_94')
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--directions', nargs='*', default=None)
+    parser.add_argument('--n-points', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--parameterization', choices=sorted(PARAMETERIZATIONS), default='free')
+    parser.add_argument('--patience', type=int, default=DEFAULT_PATIENCE, help='0 runs every generation')
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA)
+    parser.add_argument('--abs-delta', type=float, default=DEFAULT_ABS_DELTA)
+    parser.add_argument('--json', action='store_true', help='write the traces as JSON instead of CSV')
+    args = parser.parse_args()
+
+    parameterization = parameterization_from_name(args.parameterization, args.n_points)
+    intersection_polygon = load_geometry(args.intersections)[args.intersection_id].projected_polygon
+    for direction, points in movement_endpoints(intersection_polygon).items():
+        if args.directions is not None and direction not in args.directions:
+            continue
+        start_point, end_point = points[0]
+        telemetry = OptimizerTelemetry(args.patience, args.min_delta, args.abs_delta)
+        optimizer(intersection_polygon, start_point, end_point, n_points=args.n_points, seed=args.seed,
+                  parameterization=parameterization, telemetry=telemetry)
+
+        trace_path = TRACE_FILE_PATH.format(intersection_id=args.intersection_id, direction=direction)
+        if args.json:
+            trace_path = trace_path[:-len('.csv')] + '.json'
+        telemetry.write_trace(trace_path)
+
+        summary = telemetry.summary
+        objective_seconds = summary['CurvesSeconds'] + summary['ContainmentSeconds'] + summary['ScoringSeconds']
+        share = {
+            name: summary[f'{name.capitalize()}Seconds'] / objective_seconds if objective_seconds > 0 else 0.0
+            for name in ('curves', 'containment', 'scoring')
+        }
+        print(f"Direction: {direction}, Loss: {summary['Loss']:.4f}, {summary['Generations']} generations"
+              f"{' (stopped early)' if summary['StoppedEarly'] else ''}, {summary['Evaluations']} evaluations "
+              f"({summary['Evaluations'] / summary['Seconds']:.0f}/s), curves {share['curves']:.0%}, "
+              f"containment {share['containment']:.0%}, scoring {share['scoring']:.0%} -> {trace_path}")
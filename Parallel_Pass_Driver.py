@@ -0,0 +1,97 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from Intersection_Index import IntersectionIndex
+from Intersection_Loader import INTERSECTION_FILE_PATH, load_intersections
+from Pass_Event_Engine import PASS_EVENT_DTYPES, PASS_EVENT_FILE_PATH, extract_file_events, to_pass_ini
+from Truck_Movement_Store import MOVEMENT_FILE_PATHS, STORE_DIR, has_partition
+
+# 每个工作进程各自持有一份路口空间索引，只在进程启动时建立一次
+_intersection_index = None
+
+
+def _init_worker(intersections):
+    global _intersection_index
+    _intersection_index = IntersectionIndex(intersections)
+
+
+# 工作进程：提取一个数据集的所有通过事件，返回 (列名 -> 列表, 采样点数)
+def _extract_file(truck_file_path, store_dir):
+    columns = {name: [] for name in PASS_EVENT_DTYPES}
+    samples = extract_file_events(truck_file_path, _intersection_index, columns, store_dir)
+    return columns, samples
+
+
+# 按数据集并行提取通过事件
+#   workers   —— 工作进程数，默认为 CPU 核数；为 1 时在当前进程中串行执行
+#   chunksize —— 每次分发给一个工作进程的数据集个数
+# executor.map 按输入顺序返回结果，合并后的事件顺序与串行模式完全一致
+def extract_pass_events_parallel(file_paths=MOVEMENT_FILE_PATHS, intersections=None, store_dir=STORE_DIR,
+                                 workers=None, chunksize=1, verbose=True):
+    if intersections is None:
+        intersections = load_intersections(INTERSECTION_FILE_PATH, projected=True)
+    intersections = intersections.to_projected()
+    workers = workers or os.cpu_count() or 1
+
+    existing = []
+    for truck_file_path in file_paths:
+        if not os.path.exists(truck_file_path) and not has_partition(truck_file_path, store_dir):
+            if verbose:
+                print(f"File {truck_file_path} does not exist.")
+            continue
+        existing.append(truck_file_path)
+
+    start = time.perf_counter()
+    if workers <= 1 or len(existing) <= 1:
+        _init_worker(intersections)
+        results = [_extract_file(truck_file_path, store_dir) for truck_file_path in existing]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(existing)), initializer=_init_worker,
+                                 initargs=(intersections,)) as executor:
+            results = list(executor.map(_extract_file, existing, [store_dir] * len(existing), chunksize=chunksize))
+
+    # 按数据集顺序合并各部分结果
+    columns = {name: [] for name in PASS_EVENT_DTYPES}
+    total_samples = 0
+    for file_columns, samples in results:
+        for name in columns:
+            columns[name].extend(file_columns[name])
+        total_samples += samples
+
+    elapsed = time.perf_counter() - start
+    events = pd.DataFrame(columns).astype(PASS_EVENT_DTYPES)
+    stats = {
+        'samples': total_samples,
+        'events': len(events),
+        'seconds': elapsed,
+        'samples_per_second': total_samples / elapsed if elapsed > 0 else float('inf'),
+        'workers': workers,
+    }
+    return events, stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract pass events from all movement files in parallel.')
+    parser.add_argument('files', nargs='*', default=MOVEMENT_FILE_PATHS)
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=1)
+    parser.add_argument('--output', default=PASS_EVENT_FILE_PATH)
+    parser.add_argument('--intersection-id', default=None, help='also write Pass_INI_ALL.csv for this intersection')
+    args = parser.parse_args()
+
+    intersections = load_intersections(args.intersections, projected=True)
+    events, stats = extract_pass_events_parallel(args.files, intersections, args.store_dir,
+                                                 workers=args.workers, chunksize=args.chunksize)
+    events.to_csv(args.output, index=False)
+    if args.intersection_id is not None:
+        to_pass_ini(events[events['IntersectionID'] == args.intersection_id]).to_csv('Pass_INI_ALL.csv', index=False)
+
+    print(f"{stats['events']} pass events saved to {args.output}")
+    print(f"{stats['samples']} samples in {stats['seconds']:.2f} s with {stats['workers']} workers "
+          f"({stats['samples_per_second']:,.0f} samples/s)")
@@ -0,0 +1,254 @@
+import argparse
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from Containment_Engine import contains_xy
+from Curve_Parameterization import PARAMETERIZATIONS, FreePoints, parameterization_from_name
+from Curve_Scoring import DEFAULT_WEIGHTS, weighted_loss
+from Intersection_Geometry_Cache import load_geometry
+from Intersection_Loader import INTERSECTION_FILE_PATH
+from Optimizer_Model import CurveObjective, movement_endpoints
+from Pass_Time_Surrogate import load_surrogate
+
+# 每个 路口/转向 的非支配前沿文件
+FRONT_FILE_PATH = 'Pareto_front_{intersection_id}_{direction}.npz'
+
+# 同时最小化的目标，即 weighted_loss 中的各项；优化的候选曲线没有时间戳，通过时间一项不参与
+# 给出通过时间代理模型（见 Pass_Time_Surrogate.py）时加上预测的通过时间
+OBJECTIVES = ('PathLength', 'Curvature')
+OBJECTIVES_WITH_TIME = ('PathLength', 'TimeDiff', 'Curvature')
+
+
+# 快速非支配排序：返回每个解所在前沿的序号（0 为非支配前沿）
+# objectives 为 (N, n_objectives)，不可行解的各目标为无穷大，彼此互不支配，一起排在所有可行解之后
+def non_dominated_rank(objectives):
+    objectives = np.asarray(objectives, dtype=np.float64)
+    n = len(objectives)
+    # dominates[i, j]：i 的各目标都不差于 j，且至少一个更好
+    no_worse = np.all(objectives[:, None, :] <= objectives[None, :, :], axis=2)
+    better = np.any(objectives[:, None, :] < objectives[None, :, :], axis=2)
+    dominates = no_worse & better
+    dominated_count = dominates.sum(axis=0)
+
+    rank = np.full(n, -1, dtype=np.int64)
+    front = np.flatnonzero(dominated_count == 0)
+    current = 0
+    while len(front):
+        rank[front] = current
+        dominated_count = dominated_count - dominates[front].sum(axis=0)
+        dominated_count[rank >= 0] = -1
+        front = np.flatnonzero(dominated_count == 0)
+        current += 1
+    return rank
+
+
+# 拥挤距离：同一前沿内每个解在各目标上与相邻解的距离之和（按目标的取值范围归一化），边界解为无穷大
+# 每个目标只在该目标取值有限的解之间排序和归一化；有任一目标不是有限值的解（不可行解）拥挤距离为 0，不影响同一前沿内其他解
+def crowding_distance(objectives, rank):
+    objectives = np.asarray(objectives, dtype=np.float64)
+    distance = np.zeros(len(objectives))
+    for front in np.unique(rank):
+        members = np.flatnonzero(rank == front)
+        for column in objectives[members].T:
+            finite = np.flatnonzero(np.isfinite(column))
+            if not len(finite):
+                continue
+            values = column[finite]
+            order = np.argsort(values, kind='stable')
+            span = values[order[-1]] - values[order[0]]
+            distance[members[finite[order[[0, -1]]]]] = np.inf
+            if span > 0 and len(finite) > 2:
+                distance[members[finite[order[1:-1]]]] += (values[order[2:]] - values[order[:-2]]) / span
+        distance[members[~np.isfinite(objectives[members]).all(axis=1)]] = 0.0
+    return distance
+
+
+# 一个转向的非支配前沿：每个解的参数、各目标值和优化后位于路口内的路径
+#   parameters —— (k, n_params)
+#   objectives —— 目标名 -> (k,) 数组（见 OBJECTIVES），按第一个目标从小到大排列
+#   paths      —— [[(x, y), ...], ...]（UTM 米）
+# 任意权重下的最优曲线直接从前沿中选取，不需要重新优化
+class ParetoFront:
+    def __init__(self, intersection_id, direction, parameters, objectives, paths):
+        self.intersection_id = intersection_id
+        self.direction = direction
+        self.parameters = np.asarray(parameters, dtype=np.float64)
+        self.objectives = {name: np.asarray(values, dtype=np.float64) for name, values in objectives.items()}
+        self.paths = paths
+
+    def __len__(self):
+        return len(self.parameters)
+
+    # 各个解在给定权重下的加权损失（与 Curve_Scoring.weighted_loss 相同，可以给出 means/stds 先标准化）
+    def losses(self, weights=DEFAULT_WEIGHTS, means=None, stds=None):
+        n = len(self)
+        return weighted_loss(self.objectives.get('PathLength', np.zeros(n)), self.objectives.get('TimeDiff', np.full(n, np.nan)),
+                             self.objectives.get('Curvature', np.zeros(n)), weights, means, stds)
+
+    # 给定权重下损失最低的解：返回 (path, loss, index)；前沿为空（没有找到可行的曲线）时返回 None
+    def select(self, weights=DEFAULT_WEIGHTS, means=None, stds=None):
+        if len(self) == 0:
+            return None
+        losses = self.losses(weights, means, stds)
+        index = int(np.argmin(losses))
+        return self.paths[index], float(losses[index]), index
+
+    def to_frame(self):
+        frame = pd.DataFrame(self.objectives)
+        frame.insert(0, 'Direction', self.direction)
+        frame.insert(0, 'IntersectionID', self.intersection_id)
+        frame['Points'] = [len(path) for path in self.paths]
+        frame['Path'] = self.paths
+        return frame
+
+    # 路径长度不一，与列式存储（见 Truck_Movement_Store.py）一样拼接后按偏移量保存
+    def save(self, front_path):
+        counts = np.array([len(path) for path in self.paths], dtype=np.int64)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        coordinates = np.array([point for path in self.paths for point in path], dtype=np.float64).reshape(-1, 2)
+        # 路口和转向保存为字符串（None 保存为空字符串），不生成 object 数组，加载时不需要 allow_pickle
+        np.savez(front_path, intersection_id=str(self.intersection_id or ''), direction=str(self.direction or ''),
+                 parameters=self.parameters,
+                 objective_names=np.array(list(self.objectives)),
+                 objectives=np.column_stack(list(self.objectives.values())), path_offsets=offsets, path_coordinates=coordinates)
+
+
+def load_front(front_path):
+    with np.load(front_path) as data:
+        offsets = data['path_offsets']
+        coordinates = data['path_coordinates']
+        paths = [[(x, y) for x, y in coordinates[start:stop].tolist()] for start, stop in zip(offsets[:-1], offsets[1:])]
+        objectives = dict(zip(data['objective_names'].tolist(), data['objectives'].T))
+        intersection_id, direction = str(data['intersection_id']) or None, str(data['direction']) or None
+        return ParetoFront(intersection_id, direction, data['parameters'], objectives, paths)
+
+
+# 模拟二进制交叉（SBX）：parents 为 (2m, n_params)，相邻两行配对，返回同样形状的子代（归一化到 [0, 1] 的参数空间）
+def _sbx_crossover(rng, parents, eta, probability):
+    first, second = parents[0::2], parents[1::2]
+    u = rng.random(first.shape)
+    beta = np.where(u <= 0.5, (2 * u) ** (1 / (eta + 1)), (1 / (2 * (1 - u))) ** (1 / (eta + 1)))
+    crossed = rng.random((len(first), 1)) < probability
+    crossed = crossed & (rng.random(first.shape) < 0.5)
+    child_first = np.where(crossed, 0.5 * ((1 + beta) * first + (1 - beta) * second), first)
+    child_second = np.where(crossed, 0.5 * ((1 - beta) * first + (1 + beta) * second), second)
+    children = np.empty_like(parents)
+    children[0::2], children[1::2] = child_first, child_second
+    return children
+
+
+# 多项式变异：每个参数以 probability 的概率变异（归一化到 [0, 1] 的参数空间）
+def _polynomial_mutation(rng, population, eta, probability):
+    u = rng.random(population.shape)
+    delta = np.where(u < 0.5, (2 * u) ** (1 / (eta + 1)) - 1, 1 - (2 * (1 - u)) ** (1 / (eta + 1)))
+    mutated = rng.random(population.shape) < probability
+    return np.clip(population + mutated * delta, 0.0, 1.0)
+
+
+# NSGA-II：一次运行得到一个转向在 OBJECTIVES 上的非支配前沿，返回 ParetoFront
+#   parameterization —— 曲线参数化（见 Curve_Parameterization.py），默认与 Optimizer_Model.optimizer 相同
+#   popsize          —— 种群大小（取偶数），generations —— 代数
+#   distance_field / clearance / time_model —— 见 Optimizer_Model.CurveObjective；给出 time_model 时目标为 OBJECTIVES_WITH_TIME
+# 二元锦标赛选择（先比较前沿序号，再比较拥挤距离）、SBX 交叉和多项式变异，父代与子代合并后按前沿和拥挤距离保留 popsize 个
+def pareto_optimizer(intersection_polygon, start_point, end_point, intersection_id=None, direction=None, n_points=10,
+                     seed=None, parameterization=None, popsize=100, generations=200, distance_field=None, clearance=None,
+                     crossover_eta=15.0, crossover_probability=0.9, mutation_eta=20.0, time_model=None):
+    if parameterization is None:
+        parameterization = partial(FreePoints, n_points=n_points)
+    parameterization = parameterization(intersection_polygon, start_point, end_point)
+    objective_function = CurveObjective(intersection_polygon, parameterization, distance_field, clearance, time_model)
+    objective_names = OBJECTIVES if time_model is None else OBJECTIVES_WITH_TIME
+    low, high = np.array(parameterization.bounds, dtype=np.float64).T
+    width = np.where(high > low, high - low, 1.0)
+    n_params = parameterization.n_params
+    popsize += popsize % 2
+    rng = np.random.default_rng(seed)
+
+    def evaluate(population):
+        scores, feasible = objective_function.evaluate((low + population * width).T)
+        objectives = np.column_stack([scores[name] for name in objective_names])
+        objectives[~feasible] = np.inf
+        return objectives
+
+    population = rng.random((popsize, n_params))
+    objectives = evaluate(population)
+    rank = non_dominated_rank(objectives)
+    crowding = crowding_distance(objectives, rank)
+
+    for _ in range(generations):
+        # 二元锦标赛选择父代
+        a, b = rng.integers(popsize, size=(2, popsize))
+        a_wins = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (crowding[a] > crowding[b]))
+        parents = population[np.where(a_wins, a, b)]
+
+        children = _sbx_crossover(rng, parents, crossover_eta, crossover_probability)
+        children = _polynomial_mutation(rng, np.clip(children, 0.0, 1.0), mutation_eta, 1.0 / n_params)
+
+        # 父代与子代合并，按 (前沿序号, -拥挤距离) 保留最好的 popsize 个
+        population = np.vstack([population, children])
+        objectives = np.vstack([objectives, evaluate(children)])
+        rank = non_dominated_rank(objectives)
+        crowding = crowding_distance(objectives, rank)
+        keep = np.lexsort((-crowding, rank))[:popsize]
+        population, objectives, rank, crowding = population[keep], objectives[keep], rank[keep], crowding[keep]
+
+    # 非支配前沿中可行、且目标值不重复的解
+    front = np.flatnonzero((rank == 0) & np.isfinite(objectives).all(axis=1))
+    _, unique = np.unique(objectives[front], axis=0, return_index=True)
+    front = front[np.sort(unique)]
+    front = front[np.argsort(objectives[front, 0], kind='stable')]
+
+    parameters = low + population[front] * width
+    # 与 Optimizer_Model.optimizer 一样只保留路口内的点（以及锚定的起点和终点）
+    paths = [
+        [(x, y) for x, y in curve[contains_xy(intersection_polygon, curve[:, 0], curve[:, 1]) | parameterization.keep].tolist()]
+        for curve in parameterization.curves(parameters.T)
+    ]
+    return ParetoFront(intersection_id, direction, parameters,
+                       {name: objectives[front, i] for i, name in enumerate(objective_names)}, paths)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute the Pareto front of curves for each turning movement in one run, '
+                                                 'or answer a weight vector from stored fronts.')
+    parser.add_argument('intersection_id', nargs='?', default='INT_94')
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--directions', nargs='*', default=None)
+    parser.add_argument('--n-points', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=None)
+    # 原有的自由控制点不经过起点和终点，所有目标都会趋近于 0，前沿退化为一个点，这里默认使用三次 Bezier 曲线
+    parser.add_argument('--parameterization', choices=sorted(PARAMETERIZATIONS), default='cubic')
+    parser.add_argument('--popsize', type=int, default=100)
+    parser.add_argument('--generations', type=int, default=200)
+    parser.add_argument('--time-model', default=None, help='pass time surrogate (Pass_Time_Surrogate.py) adding TimeDiff as an objective')
+    parser.add_argument('--query', type=float, nargs=3, metavar=('W1', 'W2', 'W3'), default=None,
+                        help='answer this weight vector from the stored fronts without optimizing')
+    args = parser.parse_args()
+
+    weights = DEFAULT_WEIGHTS if args.query is None else dict(zip(('w1', 'w2', 'w3'), args.query))
+    time_model = None if args.time_model is None else load_surrogate(args.time_model)
+    parameterization = parameterization_from_name(args.parameterization, args.n_points)
+    intersection_polygon = load_geometry(args.intersections)[args.intersection_id].projected_polygon
+    for direction, points in movement_endpoints(intersection_polygon).items():
+        if args.directions is not None and direction not in args.directions:
+            continue
+        front_path = FRONT_FILE_PATH.format(intersection_id=args.intersection_id, direction=direction)
+        if args.query is None:
+            start_point, end_point = points[0]
+            front = pareto_optimizer(intersection_polygon, start_point, end_point, args.intersection_id, direction,
+                                     args.n_points, args.seed, parameterization, args.popsize,
+                                     args.generations, time_model=time_model)
+            front.save(front_path)
+        else:
+            front = load_front(front_path)
+
+        if len(front) == 0:
+            print(f"Direction: {direction}, no feasible curve found -> {front_path}")
+            continue
+        path, loss, index = front.select(weights)
+        ranges = ', '.join(f"{name} {values.min():.2f}-{values.max():.2f}" for name, values in front.objectives.items())
+        print(f"Direction: {direction}, {len(front)} curves on the front ({ranges}), "
+              f"best for {weights}: Loss {loss:.4f} -> {front_path}")
@@ -0,0 +1,202 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import LineString
+
+from Containment_Engine import pass_events
+from Geometry_Kernels import circumradius, range_path_lengths
+from Intersection_Index import IntersectionIndex
+from Intersection_Loader import INTERSECTION_FILE_PATH, load_intersections
+from Projected_Mode import unproject
+from Truck_Dataset import load_truck_dataset
+from Truck_Movement_Store import MOVEMENT_FILE_PATHS, STORE_DIR, has_partition
+
+# 所有路口、所有数据集的通过事件表
+PASS_EVENT_FILE_PATH = 'Pass_INI_events.csv'
+
+# 通过事件表的列及类型：
+#   EntryIndex/ExitIndex —— 该卡车按时间排序后的轨迹中的进入/离开下标
+#   EntryLon ~ ExitLat   —— 与 Pass_INI 文件 Coordinates 列相同的进出点（经纬度）
+#   CurvatureRadius      —— 无法计算时为 NaN（Pass_INI 文件中为 '无法计算'）
+PASS_EVENT_DTYPES = {
+    'File': 'object',
+    'Truck': 'object',
+    'IntersectionID': 'object',
+    'EntryIndex': 'int64',
+    'ExitIndex': 'int64',
+    'EntryTime': 'datetime64[ns]',
+    'ExitTime': 'datetime64[ns]',
+    'EntryLon': 'float64',
+    'EntryLat': 'float64',
+    'ExitLon': 'float64',
+    'ExitLat': 'float64',
+    'PathLength': 'float64',
+    'TimeDiff': 'float64',
+    'CurvatureRadius': 'float64',
+}
+
+
+# 曲率半径：用轨迹被路口边界截取的部分取首、中、尾三点（与 Truck_Pass_INI_save_Future_Analys.py 的算法一致）
+# 返回 (进入点, 离开点, 曲率半径)，坐标为 UTM 米；截取部分不足三点时进出点为采样点，曲率半径为 NaN
+def clipped_curvature(polygon, x, y, entry_idx, exit_idx):
+    entry_point = (float(x[entry_idx]), float(y[entry_idx]))
+    exit_point = (float(x[exit_idx]), float(y[exit_idx]))
+
+    line = LineString(np.column_stack([x[entry_idx:exit_idx+1], y[entry_idx:exit_idx+1]]))
+    intersection = polygon.intersection(line)
+
+    if intersection.geom_type == 'MultiLineString':
+        intersection_coords = []
+        for geom in intersection.geoms:
+            intersection_coords.extend(list(geom.coords))
+    elif intersection.geom_type == 'LineString':
+        intersection_coords = list(intersection.coords)
+    else:
+        intersection_coords = []
+
+    curvature_radius = np.nan
+    if len(intersection_coords) >= 3:
+        entry_point = intersection_coords[0]
+        mid_point = intersection_coords[len(intersection_coords) // 2]
+        exit_point = intersection_coords[-1]
+        curvature_radius = float(circumradius(entry_point, mid_point, exit_point))
+
+    return entry_point, exit_point, curvature_radius
+
+
+# 扫描一个数据集，一次得到所有路口的通过事件，追加到 columns（列名 -> 列表）
+# 返回该数据集的采样点数
+def extract_file_events(truck_file_path, intersection_index, columns, store_dir=STORE_DIR):
+    truck_dataset = load_truck_dataset(truck_file_path, store_dir)
+    x, y = truck_dataset.column('X'), truck_dataset.column('Y')
+    timestamps = truck_dataset.column('TimeStamp')
+
+    # 所有 (采样点, 路口) 对；重叠或嵌套的路口各自独立得到通过事件，与逐个路口提取的结果一致
+    sample_indices, located = intersection_index.locate_all(x, y)
+    truck_of_sample = np.searchsorted(truck_dataset.offsets, sample_indices, side='right') - 1
+
+    # 先收集所有通过事件（下标为整个数据集中的行号），再批量计算路径长度和通过时间
+    # 按 卡车 -> 路口 分组，每组内的采样点按行号排列
+    order = np.lexsort((sample_indices, located, truck_of_sample))
+    sample_indices, located, truck_of_sample = sample_indices[order], located[order], truck_of_sample[order]
+    group_starts = np.flatnonzero(np.r_[True, (np.diff(truck_of_sample) != 0) | (np.diff(located) != 0)])
+    group_ends = np.r_[group_starts[1:], len(sample_indices)]
+
+    trucks, polygon_indices, truck_starts, entry_rows, exit_rows = [], [], [], [], []
+    for group_start, group_end in zip(group_starts, group_ends):
+        truck_row, polygon_index = truck_of_sample[group_start], located[group_start]
+        start, stop = truck_dataset.offsets[truck_row], truck_dataset.offsets[truck_row + 1]
+        inside = np.zeros(stop - start, dtype=bool)
+        inside[sample_indices[group_start:group_end] - start] = True
+
+        entry_indices, exit_indices = pass_events(inside)
+        trucks.extend([truck_dataset.trucks[truck_row]] * len(entry_indices))
+        polygon_indices.extend([polygon_index] * len(entry_indices))
+        truck_starts.extend([start] * len(entry_indices))
+        entry_rows.extend((entry_indices + start).tolist())
+        exit_rows.extend((exit_indices + start).tolist())
+
+    entry_rows = np.asarray(entry_rows, dtype=np.int64)
+    exit_rows = np.asarray(exit_rows, dtype=np.int64)
+
+    # 路径长度（平面距离，米）和通过时间（秒）
+    path_lengths = range_path_lengths(x, y, entry_rows, exit_rows + 1)
+    time_diffs = (timestamps[exit_rows] - timestamps[entry_rows]) / np.timedelta64(1, 's')
+
+    for i, (truck_id, polygon_index) in enumerate(zip(trucks, polygon_indices)):
+        entry_row, exit_row = entry_rows[i], exit_rows[i]
+        entry_point, exit_point, curvature_radius = clipped_curvature(
+            intersection_index.polygons[polygon_index], x, y, entry_row, exit_row)
+        entry_lon, entry_lat = unproject(*entry_point)
+        exit_lon, exit_lat = unproject(*exit_point)
+
+        columns['File'].append(os.path.basename(truck_file_path))
+        columns['Truck'].append(truck_id)
+        columns['IntersectionID'].append(intersection_index.ids[polygon_index])
+        columns['EntryIndex'].append(int(entry_row - truck_starts[i]))
+        columns['ExitIndex'].append(int(exit_row - truck_starts[i]))
+        columns['EntryTime'].append(timestamps[entry_row])
+        columns['ExitTime'].append(timestamps[exit_row])
+        columns['EntryLon'].append(entry_lon)
+        columns['EntryLat'].append(entry_lat)
+        columns['ExitLon'].append(exit_lon)
+        columns['ExitLat'].append(exit_lat)
+        columns['PathLength'].append(float(path_lengths[i]))
+        columns['TimeDiff'].append(float(time_diffs[i]))
+        columns['CurvatureRadius'].append(curvature_radius)
+
+    return int(truck_dataset.offsets[-1])
+
+
+# 扫描所有数据集，返回 (通过事件表, 统计信息)
+# 事件按 数据集 -> 卡车 -> 路口 -> 进入时间 的顺序排列
+def extract_pass_events(file_paths=MOVEMENT_FILE_PATHS, intersections=None, store_dir=STORE_DIR, verbose=True):
+    if intersections is None:
+        intersections = load_intersections(INTERSECTION_FILE_PATH, projected=True)
+    intersection_index = IntersectionIndex(intersections.to_projected())
+
+    columns = {name: [] for name in PASS_EVENT_DTYPES}
+    total_samples = 0
+    start = time.perf_counter()
+
+    for truck_file_path in file_paths:
+        if not os.path.exists(truck_file_path) and not has_partition(truck_file_path, store_dir):
+            if verbose:
+                print(f"File {truck_file_path} does not exist.")
+            continue
+        total_samples += extract_file_events(truck_file_path, intersection_index, columns, store_dir)
+
+    elapsed = time.perf_counter() - start
+    events = pd.DataFrame(columns).astype(PASS_EVENT_DTYPES)
+    stats = {
+        'samples': total_samples,
+        'events': len(events),
+        'seconds': elapsed,
+        'samples_per_second': total_samples / elapsed if elapsed > 0 else float('inf'),
+    }
+    return events, stats
+
+
+# 转换为原有 Pass_INI 文件的格式：Truck, Coordinates, PathLength, TimeDiff, CurvatureRadius
+def to_pass_ini(events):
+    coordinates = [
+        [(entry_lon, entry_lat), (exit_lon, exit_lat)]
+        for entry_lon, entry_lat, exit_lon, exit_lat in zip(
+            events['EntryLon'].tolist(), events['EntryLat'].tolist(), events['ExitLon'].tolist(), events['ExitLat'].tolist())
+    ]
+    curvature_radius = [
+        '无法计算' if np.isnan(value) else value for value in events['CurvatureRadius'].tolist()
+    ]
+    return pd.DataFrame({
+        'Truck': events['Truck'].tolist(),
+        'Coordinates': coordinates,
+        'PathLength': events['PathLength'].tolist(),
+        'TimeDiff': events['TimeDiff'].tolist(),
+        'CurvatureRadius': curvature_radius,
+    })
+
+
+def read_pass_events(file_path=PASS_EVENT_FILE_PATH):
+    dtypes = {name: dtype for name, dtype in PASS_EVENT_DTYPES.items() if not dtype.startswith('datetime')}
+    # round_trip：保证浮点数读回后与写出前完全一致
+    events = pd.read_csv(file_path, dtype=dtypes, parse_dates=['EntryTime', 'ExitTime'], float_precision='round_trip')
+    return events.astype(PASS_EVENT_DTYPES)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract pass events for every intersection from all movement files in one scan.')
+    parser.add_argument('files', nargs='*', default=MOVEMENT_FILE_PATHS)
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--output', default=PASS_EVENT_FILE_PATH)
+    args = parser.parse_args()
+
+    intersections = load_intersections(args.intersections, projected=True)
+    events, stats = extract_pass_events(args.files, intersections, args.store_dir)
+    events.to_csv(args.output, index=False)
+
+    print(f"{stats['events']} pass events at {events['IntersectionID'].nunique()} intersections saved to {args.output}")
+    print(f"{stats['samples']} samples in {stats['seconds']:.2f} s ({stats['samples_per_second']:,.0f} samples/s)")
@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from Containment_Engine import contains_xy
+from Curve_Scoring import score_ragged
+from File_Hash import file_hash
+from Geometry_Kernels import ragged_index, ragged_sum
+from Intersection_Geometry_Cache import load_geometry
+from Intersection_Loader import INTERSECTION_FILE_PATH
+from Pass_Event_Engine import PASS_EVENT_FILE_PATH, read_pass_events
+from Truck_Dataset import load_truck_dataset
+from Truck_Movement_Store import STORE_DIR
+
+# 训练数据（通过事件表，见 Pass_Event_Engine.py）和训练好的模型文件
+PASS_FILE_PATHS = [PASS_EVENT_FILE_PATH]
+SURROGATE_FILE_PATH = 'Pass_time_surrogate.npz'
+
+# 模型文件格式的版本号，特征的算法或保存的内容变化时加一，旧模型文件视为不存在
+MODEL_VERSION = 2
+
+# 用 Pass_INI 文件训练时的错误信息
+PASS_INI_NOT_SUPPORTED = ("Pass_INI files only record the entry and exit points; train on the pass event table "
+                          "(Pass_Event_Engine.py) so the features use the samples inside the intersection")
+
+# 模型的输入特征，历史通过数据和候选曲线都只用路口内的点、用同样的方式（Curve_Scoring.score_ragged）计算：
+#   PathLength —— 路径长度（米）
+#   ChordLength —— 进入点到离开点的直线距离（米）
+#   Curvature  —— 首、中、尾三点外接圆的曲率 1 / CurvatureRadius（三点共线时为 0）
+#   TurnAngle  —— 外接圆上从进入点到离开点的圆心角（弧度），即按圆弧近似的转向角度
+#   Tortuosity —— 路径长度与直线距离之比
+FEATURES = ['PathLength', 'ChordLength', 'Curvature', 'TurnAngle', 'Tortuosity']
+
+DEFAULT_ALPHA = 1.0
+
+
+# 由路径长度、直线距离和曲率半径计算特征，返回 (N, len(FEATURES))；曲率半径或直线距离为 NaN 时特征也为 NaN
+def curve_features(path_length, chord_length, curvature_radius):
+    path_length = np.asarray(path_length, dtype=np.float64)
+    chord_length = np.asarray(chord_length, dtype=np.float64)
+    curvature_radius = np.asarray(curvature_radius, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        curvature = np.where(curvature_radius > 0, 1 / curvature_radius, 0.0)
+        curvature[np.isnan(curvature_radius)] = np.nan
+        turn_angle = 2 * np.arcsin(np.clip(chord_length * curvature / 2, 0.0, 1.0))
+        tortuosity = np.where(chord_length > 0, path_length / chord_length, 1.0)
+    return np.column_stack([path_length, chord_length, curvature, turn_angle, tortuosity])
+
+
+# 从通过事件表得到 (特征, 通过时间)
+# 事件表中的 PathLength、CurvatureRadius 和进出点包含路口外的进入前一点和离开点，
+# 而候选曲线只用路口内的点（见 Optimizer_Model.CurveObjective），所以按 File、Truck、EntryIndex ~ ExitIndex 取回原始轨迹，
+# 只用其中位于路口内的点重新计算特征；路口内不足两点或缺少通过时间的事件不参与训练
+# Pass_INI 文件只记录进出点，无法得到路口内的点，不能用于训练
+def pass_features(events, intersection_file_path=INTERSECTION_FILE_PATH, store_dir=STORE_DIR):
+    if 'Coordinates' in events:
+        raise ValueError(PASS_INI_NOT_SUPPORTED)
+    geometry = load_geometry(intersection_file_path)
+
+    features, targets = [], []
+    for truck_file_path, file_events in events.groupby('File', sort=False):
+        truck_dataset = load_truck_dataset(truck_file_path, store_dir)
+        truck_starts = np.array([truck_dataset.rows(truck_id).start for truck_id in file_events['Truck']], dtype=np.int64)
+        index, offsets = ragged_index(truck_starts + file_events['EntryIndex'].to_numpy(dtype=np.int64),
+                                      truck_starts + file_events['ExitIndex'].to_numpy(dtype=np.int64) + 1)
+        x, y = truck_dataset.column('X')[index], truck_dataset.column('Y')[index]
+
+        # 每个事件的点只与该事件的路口比较
+        event_ids = np.repeat(file_events['IntersectionID'].to_numpy(), np.diff(offsets))
+        inside = np.zeros(len(index), dtype=bool)
+        for intersection_id in file_events['IntersectionID'].unique():
+            samples = event_ids == intersection_id
+            inside[samples] = contains_xy(geometry[intersection_id].projected_polygon, x[samples], y[samples])
+
+        counts = ragged_sum(inside, offsets[:-1], offsets[1:]).astype(np.int64)
+        stops = np.cumsum(counts)
+        starts = stops - counts
+        x_inside, y_inside = x[inside], y[inside]
+        scores = score_ragged(x_inside, y_inside, starts, stops)
+        chord_length = np.full(len(counts), np.nan)
+        has_two = counts > 1
+        chord_length[has_two] = np.hypot(x_inside[stops[has_two] - 1] - x_inside[starts[has_two]],
+                                         y_inside[stops[has_two] - 1] - y_inside[starts[has_two]])
+
+        features.append(curve_features(scores['PathLength'], chord_length, scores['CurvatureRadius']))
+        targets.append(pd.to_numeric(file_events['TimeDiff'], errors='coerce').to_numpy(dtype=np.float64))
+
+    if not features:
+        return np.empty((0, len(FEATURES))), np.empty(0)
+    features, time_diff = np.concatenate(features), np.concatenate(targets)
+    valid = np.isfinite(features).all(axis=1) & np.isfinite(time_diff)
+    return features[valid], time_diff[valid]
+
+
+# 通过时间的代理模型：对标准化后的特征做岭回归，预测值限制在训练数据的通过时间范围 target_range 内
+# 线性模型外推时可能给出接近 0 甚至为负的通过时间，优化器会去追逐这些不可能的曲线，限制后外推最多得到历史上最快的通过时间
+# 预测只是一次矩阵乘法，可以在向量化的目标函数中对整个种群一次调用（见 Optimizer_Model.CurveObjective 的 time_model）
+#   metrics     —— 训练时在留出集上的误差（MAE、RMSE、R2）
+#   source_hash —— 训练数据文件和路口数据集的 SHA-256，数据变化时 load_surrogate 重新训练
+class PassTimeSurrogate:
+    def __init__(self, coef, intercept, means, stds, target_range=(0.0, np.inf), alpha=DEFAULT_ALPHA, metrics=None,
+                 source_hash=''):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.stds = np.asarray(stds, dtype=np.float64)
+        self.target_range = tuple(float(value) for value in target_range)
+        self.alpha = float(alpha)
+        self.metrics = metrics or {}
+        self.source_hash = source_hash
+
+    # 模型参数的 SHA-256，用于优化结果缓存的键（见 Optimizer_Result_Cache.py）
+    @property
+    def content_hash(self):
+        return hashlib.sha256(np.concatenate([self.coef, [self.intercept], self.means, self.stds,
+                                              self.target_range]).tobytes()).hexdigest()
+
+    def predict_features(self, features):
+        features = np.asarray(features, dtype=np.float64)
+        return np.clip(((features - self.means) / self.stds) @ self.coef + self.intercept, *self.target_range)
+
+    # 批量预测通过时间（秒）
+    def predict(self, path_length, chord_length, curvature_radius):
+        return self.predict_features(curve_features(path_length, chord_length, curvature_radius))
+
+    def save(self, model_path=SURROGATE_FILE_PATH):
+        np.savez(model_path, version=MODEL_VERSION, features=np.array(FEATURES), coef=self.coef, intercept=self.intercept,
+                 means=self.means, stds=self.stds, target_range=np.array(self.target_range), alpha=self.alpha,
+                 metric_names=np.array(list(self.metrics)),
+                 metric_values=np.array(list(self.metrics.values()), dtype=np.float64), source_hash=self.source_hash)
+
+
+# 岭回归的闭式解：(X'X + alpha I) w = X'y，截距不参与正则化；返回 (coef, intercept, means, stds, target_range)
+def fit_ridge(features, targets, alpha=DEFAULT_ALPHA):
+    means = features.mean(axis=0)
+    stds = features.std(axis=0)
+    stds[stds == 0] = 1.0
+    standardized = (features - means) / stds
+    intercept = targets.mean()
+    coef = np.linalg.solve(standardized.T @ standardized + alpha * np.eye(features.shape[1]),
+                           standardized.T @ (targets - intercept))
+    return coef, intercept, means, stds, (targets.min(), targets.max())
+
+
+def _metrics(model, features, targets):
+    predicted = model.predict_features(features)
+    residual = targets - predicted
+    total = np.sum((targets - targets.mean()) ** 2)
+    return {
+        'MAE': float(np.mean(np.abs(residual))),
+        'RMSE': float(np.sqrt(np.mean(residual ** 2))),
+        'R2': float(1 - np.sum(residual ** 2) / total) if total > 0 else float('nan'),
+    }
+
+
+def _source_hash(pass_file_paths, intersection_file_path=INTERSECTION_FILE_PATH):
+    paths = list(pass_file_paths) + [intersection_file_path]
+    return hashlib.sha256(''.join(file_hash(path) for path in paths).encode()).hexdigest()
+
+
+# 从通过事件表训练代理模型：先留出 holdout 比例的样本评估误差，再用全部样本拟合最终的模型
+def train_surrogate(pass_file_paths=PASS_FILE_PATHS, alpha=DEFAULT_ALPHA, holdout=0.2, seed=0,
+                    intersection_file_path=INTERSECTION_FILE_PATH, store_dir=STORE_DIR):
+    if any('Coordinates' in pd.read_csv(path, nrows=0).columns for path in pass_file_paths):
+        raise ValueError(PASS_INI_NOT_SUPPORTED)
+    frames = [read_pass_events(path) for path in pass_file_paths]
+    features, targets = pass_features(pd.concat(frames, ignore_index=True), intersection_file_path, store_dir)
+    if len(targets) < 2:
+        raise ValueError(f"Not enough passes with a valid TimeDiff to train on: {len(targets)}")
+
+    metrics = {'Samples': float(len(targets))}
+    n_holdout = int(len(targets) * holdout)
+    if n_holdout > 0 and len(targets) - n_holdout >= 2:
+        order = np.random.default_rng(seed).permutation(len(targets))
+        test, train = order[:n_holdout], order[n_holdout:]
+        model = PassTimeSurrogate(*fit_ridge(features[train], targets[train], alpha), alpha)
+        metrics.update(_metrics(model, features[test], targets[test]))
+        # 对照：总是预测训练集平均通过时间时的误差
+        metrics['BaselineMAE'] = float(np.mean(np.abs(targets[test] - targets[train].mean())))
+
+    return PassTimeSurrogate(*fit_ridge(features, targets, alpha), alpha, metrics,
+                             _source_hash(pass_file_paths, intersection_file_path))
+
+
+# 加载代理模型；给出 pass_file_paths 时，模型文件不存在、版本不同或训练数据已变化则重新训练并覆盖模型文件
+def load_surrogate(model_path=SURROGATE_FILE_PATH, pass_file_paths=None, alpha=DEFAULT_ALPHA,
+                   intersection_file_path=INTERSECTION_FILE_PATH, store_dir=STORE_DIR):
+    if os.path.exists(model_path):
+        with np.load(model_path) as data:
+            if 'version' in data and int(data['version']) == MODEL_VERSION and list(data['features']) == FEATURES:
+                model = PassTimeSurrogate(data['coef'], data['intercept'], data['means'], data['stds'], data['target_range'],
+                                          data['alpha'], dict(zip(data['metric_names'].tolist(), data['metric_values'].tolist())),
+                                          str(data['source_hash']))
+                if pass_file_paths is None or model.source_hash == _source_hash(pass_file_paths, intersection_file_path):
+                    return model
+    if pass_file_paths is None:
+        raise FileNotFoundError(f"No pass time surrogate (version {MODEL_VERSION}) at {model_path}; "
+                                f"train one with Pass_Time_Surrogate.py")
+
+    model = train_surrogate(pass_file_paths, alpha, intersection_file_path=intersection_file_path, store_dir=store_dir)
+    model.save(model_path)
+    return model
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the pass time surrogate from the pass event table and save the model.')
+    parser.add_argument('pass_files', nargs='*', default=PASS_FILE_PATHS)
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--model', default=SURROGATE_FILE_PATH)
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA)
+    parser.add_argument('--holdout', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model = train_surrogate(args.pass_files, args.alpha, args.holdout, args.seed, args.intersections, args.store_dir)
+    model.save(args.model)
+    metrics = model.metrics
+    print(f"Trained on {int(metrics['Samples'])} passes from {', '.join(args.pass_files)} -> {args.model}")
+    if 'MAE' in metrics:
+        print(f"Holdout: MAE {metrics['MAE']:.3f} s (baseline {metrics['BaselineMAE']:.3f} s), "
+              f"RMSE {metrics['RMSE']:.3f} s, R2 {metrics['R2']:.3f}")
+    for name, coef in zip(FEATURES, model.coef):
+        print(f"  {name}: {coef:+.4f} s per standard deviation")
+    print(f"Predictions clamped to the training pass times {model.target_range[0]:.2f}-{model.target_range[1]:.2f} s")
+
+    # 批量预测的速度
+    rng = np.random.default_rng(args.seed)
+    n_curves = 100000
+    path_length = rng.uniform(50, 150, n_curves)
+    chord_length = path_length * rng.uniform(0.7, 1.0, n_curves)
+    curvature_radius = rng.uniform(10, 1000, n_curves)
+    start = time.perf_counter()
+    model.predict(path_length, chord_length, curvature_radius)
+    seconds = time.perf_counter() - start
+    print(f"Prediction: {seconds / n_curves * 1e6:.3f} us per curve in a batch of {n_curves}")
@@ -0,0 +1,141 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from Containment_Engine import contains_xy
+from Curve_Scoring import DEFAULT_WEIGHTS, MIN_EDGE_CLEARANCE, MIN_PATH_LENGTH, score_ragged
+from Geometry_Kernels import ragged_reduce, ragged_sum
+from Intersection_Geometry_Cache import load_geometry
+from Intersection_Loader import INTERSECTION_FILE_PATH
+from Signed_Distance_Field import SignedDistanceField
+from Truck_Dataset import load_truck_dataset
+from Truck_Movement_Store import MOVEMENT_FILE_PATHS, STORE_DIR, has_partition
+
+# 全体车辆损失分布的输出文件
+POPULATION_LOSS_FILE_PATH = 'Population_loss_{intersection_id}.csv'
+
+# 不满足限制条件时的原因，与 Population_distribution_Analysis.py 原有的提示一致
+NOT_ENOUGH_POINTS = "Not enough points within intersection polygon"
+TOO_CLOSE = "Path is too close to intersection edge"
+TOO_SHORT = "Path length is too short"
+
+
+# 一次评估一个数据集中所有卡车的曲线质量（每辆卡车在路口内的所有点组成一条曲线）
+# 整列只做一次点在多边形内的判断，再按卡车的行区间做不等长归约，不逐车、不逐点循环
+# buffered_polygon 为向内缩进 MIN_EDGE_CLEARANCE 的多边形，通常直接取自路口几何缓存
+# 给出 distance_field（见 Signed_Distance_Field.py）时，路口内判断和边界距离限制都改为查表
+# 返回 DataFrame：Truck, Points, PathLength, TimeDiff, CurvatureRadius, Curvature, Loss, Error（满足限制条件时 Error 为空，否则 Loss 为 NaN）
+def score_population(truck_dataset, intersection_polygon, buffered_polygon=None, weights=DEFAULT_WEIGHTS,
+                     means=None, stds=None, min_path_length=MIN_PATH_LENGTH, distance_field=None):
+    if buffered_polygon is None and distance_field is None:
+        buffered_polygon = intersection_polygon.buffer(-MIN_EDGE_CLEARANCE)
+
+    x, y = truck_dataset.column('X'), truck_dataset.column('Y')
+    if distance_field is not None:
+        distance = distance_field.lookup(x, y)
+        inside = distance > 0
+    else:
+        inside = contains_xy(intersection_polygon, x, y)
+
+    # 每辆卡车在路口内的点在压缩后数组中的区间
+    counts = ragged_sum(inside, truck_dataset.offsets[:-1], truck_dataset.offsets[1:]).astype(np.int64)
+    stops = np.cumsum(counts)
+    starts = stops - counts
+
+    x_inside, y_inside = x[inside], y[inside]
+    scores = score_ragged(x_inside, y_inside, starts, stops, truck_dataset.column('TimeStamp')[inside],
+                          weights=weights, means=means, stds=stds)
+
+    # 限制条件：所有点都在缩进后的多边形内，且路径足够长
+    if distance_field is not None:
+        clear = distance[inside] > MIN_EDGE_CLEARANCE
+    else:
+        clear = contains_xy(buffered_polygon, x_inside, y_inside)
+    all_clear = ragged_reduce(np.minimum, clear, starts, stops, empty=0.0) > 0
+
+    error = np.full(len(counts), '', dtype=object)
+    error[scores['PathLength'] < min_path_length] = TOO_SHORT
+    error[~all_clear] = TOO_CLOSE
+    error[counts < 2] = NOT_ENOUGH_POINTS
+
+    loss = np.where(error == '', scores['Loss'], np.nan)
+    return pd.DataFrame({
+        'Truck': truck_dataset.trucks,
+        'Points': counts,
+        'PathLength': scores['PathLength'],
+        'TimeDiff': scores['TimeDiff'],
+        'CurvatureRadius': scores['CurvatureRadius'],
+        'Curvature': scores['Curvature'],
+        'Loss': loss,
+        'Error': error,
+    })
+
+
+# 评估全部历史数据集中所有卡车在某个路口的曲线质量，返回 (按数据集顺序合并的结果, 统计信息)
+#   resolution —— 给出时先建立该分辨率（米）的有向距离场，之后所有数据集都用查表代替精确判断
+def score_population_files(intersection_id, file_paths=MOVEMENT_FILE_PATHS, intersection_file_path=INTERSECTION_FILE_PATH,
+                           store_dir=STORE_DIR, weights=DEFAULT_WEIGHTS, means=None, stds=None, resolution=None, verbose=True):
+    geometry = load_geometry(intersection_file_path)[intersection_id]
+    intersection_polygon, buffered_polygon = geometry.projected_polygon, geometry.buffer(MIN_EDGE_CLEARANCE)
+    distance_field = SignedDistanceField(intersection_polygon, resolution) if resolution else None
+
+    results = []
+    total_samples = 0
+    start = time.perf_counter()
+    for truck_file_path in file_paths:
+        if not os.path.exists(truck_file_path) and not has_partition(truck_file_path, store_dir):
+            if verbose:
+                print(f"File {truck_file_path} does not exist.")
+            continue
+        truck_dataset = load_truck_dataset(truck_file_path, store_dir)
+        file_results = score_population(truck_dataset, intersection_polygon, buffered_polygon, weights, means, stds,
+                                        distance_field=distance_field)
+        file_results.insert(0, 'File', os.path.basename(truck_file_path))
+        results.append(file_results)
+        total_samples += int(truck_dataset.offsets[-1])
+
+    elapsed = time.perf_counter() - start
+    if results:
+        population = pd.concat(results, ignore_index=True)
+    else:
+        population = pd.DataFrame(columns=['File', 'Truck', 'Points', 'PathLength', 'TimeDiff', 'CurvatureRadius', 'Curvature', 'Loss', 'Error'])
+    stats = {
+        'samples': total_samples,
+        'curves': len(population),
+        'valid': int(population['Loss'].notna().sum()),
+        'seconds': elapsed,
+    }
+    return population, stats
+
+
+# 用历史通过数据（Pass_INI 文件）的均值和标准差标准化损失函数的各项，曲率由 CurvatureRadius 取倒数得到
+def pass_statistics(pass_file_path):
+    pass_data = pd.read_csv(pass_file_path)
+    pass_data['Curvature'] = 1 / pd.to_numeric(pass_data['CurvatureRadius'], errors='coerce')
+    names = ['PathLength', 'TimeDiff', 'Curvature']
+    return {name: pass_data[name].mean() for name in names}, {name: pass_data[name].std() for name in names}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score every truck at one intersection across all movement files.')
+    parser.add_argument('intersection_id')
+    parser.add_argument('files', nargs='*', default=MOVEMENT_FILE_PATHS)
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--pass-file', default=None, help='Pass_INI file used to standardize the loss terms')
+    parser.add_argument('--sdf-resolution', type=float, default=None, help='use a signed distance field at this resolution (m)')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    means, stds = pass_statistics(args.pass_file) if args.pass_file else (None, None)
+    population, stats = score_population_files(args.intersection_id, args.files, args.intersections, args.store_dir,
+                                               means=means, stds=stds, resolution=args.sdf_resolution)
+    output = args.output or POPULATION_LOSS_FILE_PATH.format(intersection_id=args.intersection_id)
+    population.to_csv(output, index=False)
+
+    print(population['Loss'].describe())
+    print(f"{stats['valid']} of {stats['curves']} curves valid, saved to {output}")
+    print(f"{stats['samples']} samples in {stats['seconds']:.2f} s")
@@ -0,0 +1,21 @@
+from pyproj import Transformer
+
+# 投影模式：所有几何计算都在 WGS 84 / UTM Zone 50S（车辆数据 X/Y 的坐标系）下以米为单位进行，
+# 只需把路口多边形投影一次，不再逐点把车辆坐标转换为经纬度
+PROJECTED_CRS = 'epsg:32750'
+GEOGRAPHIC_CRS = 'epsg:4326'
+
+# always_xy=True：输入输出均为 (经度, 纬度) / (X, Y) 顺序
+_to_projected = Transformer.from_crs(GEOGRAPHIC_CRS, PROJECTED_CRS, always_xy=True)
+_to_geographic = Transformer.from_crs(PROJECTED_CRS, GEOGRAPHIC_CRS, always_xy=True)
+
+
+# 经纬度 -> UTM X/Y（米）
+def project(lon, lat):
+    return _to_projected.transform(lon, lat)
+
+
+# UTM X/Y（米）-> 经纬度
+def unproject(x, y):
+    return _to_geographic.transform(x, y)
+
@@ -1,38 +1,22 @@
 import pandas as pd
+import numpy as np
+from Intersection_Loader import parse_linestrings
 
 # 加载数据集
 file_path = 'B4_intersections.csv'  # 请将此路径替换为您自己的文件路径
 data = pd.read_csv(file_path, header=None, names=["IntersectionID", "Coordinates"])
 
-# 处理 Coordinates 列
-data['Coordinates'] = data['Coordinates'].str.replace('LINESTRING\(', '', regex=True).str.replace('\)', '', regex=True)
+# 处理 Coordinates 列，输出文件保留原始的坐标文本
+data['Coordinates'] = data['Coordinates'].str.replace(r'LINESTRING\(', '', regex=True).str.replace(r'\)', '', regex=True)
 
-# 定义一个函数，将坐标分割为单独的纬度和经度列表
-def split_coordinates(coord_string):
-    latitudes = []
-    longitudes = []
-    for coord in coord_string.split(','):
-        try:
-            lat, lon = map(float, coord.split())
-            latitudes.append(lat)
-            longitudes.append(lon)
-        except ValueError:
-            # 跳过不符合格式的坐标
-            continue
-    return latitudes, longitudes
+# 一次性解析所有行的坐标，offsets 与 data 的行一一对应（没有有效坐标的行坐标个数为 0）
+coords, offsets = parse_linestrings(data['Coordinates'].to_numpy())
+non_empty = np.diff(offsets) > 0
 
-# 应用函数以拆分坐标
-data['Latitude'], data['Longitude'] = zip(*data['Coordinates'].apply(split_coordinates))
-
-# 移除空的列表
-data = data[data['Latitude'].map(len) > 0]
-
-# 判断是否是闭合曲线
-def is_closed_curve(latitudes, longitudes):
-    return latitudes[0] == latitudes[-1] and longitudes[0] == longitudes[-1]
-
-# 筛选出闭合曲线的数据
-valid_intersections = data[data.apply(lambda row: is_closed_curve(row['Latitude'], row['Longitude']), axis=1)]
+# 筛选出闭合曲线的数据（首尾坐标相同），空的列表直接移除
+closed = np.zeros(len(data), dtype=bool)
+closed[non_empty] = np.all(coords[offsets[:-1][non_empty]] == coords[offsets[1:][non_empty] - 1], axis=1)
+valid_intersections = data[closed]
 
 # 将筛选出的数据保存到新的 CSV 文件中
 valid_intersections[['IntersectionID', 'Coordinates']].to_csv('B4_intersections_valid.csv', index=False)
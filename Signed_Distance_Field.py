@@ -0,0 +1,121 @@
+import argparse
+
+import numpy as np
+
+from Containment_Engine import contains_xy
+from Curve_Scoring import MIN_EDGE_CLEARANCE
+from Geometry_Kernels import boundary_distance
+from Intersection_Geometry_Cache import load_geometry
+from Intersection_Loader import INTERSECTION_FILE_PATH
+
+# 默认网格分辨率（米）和路口包围盒向外扩展的距离（米）
+DEFAULT_RESOLUTION = 0.5
+DEFAULT_MARGIN = 10.0
+
+
+# 精确的有向距离：到多边形边界的最短距离，路口内为正、路口外为负（UTM 米）
+def signed_distance(polygon, x, y):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    distance = boundary_distance(np.asarray(polygon.exterior.coords), x.ravel(), y.ravel())
+    inside = contains_xy(polygon, x.ravel(), y.ravel())
+    return np.where(inside, distance, -distance).reshape(x.shape)
+
+
+# 路口的有向距离场：在包围盒（向外扩展 margin 米）上按 resolution 米的网格预先计算有向距离，查询时双线性插值
+# 点在路口内、与边界的距离都变成数组查表，可以直接用于向量化的目标函数
+#   values —— (ny, nx) 的网格，values[j, i] 为 (x0 + i * resolution, y0 + j * resolution) 处的有向距离
+class SignedDistanceField:
+    def __init__(self, polygon, resolution=DEFAULT_RESOLUTION, margin=DEFAULT_MARGIN):
+        x_min, y_min, x_max, y_max = polygon.bounds
+        self.resolution = float(resolution)
+        self.x0 = x_min - margin
+        self.y0 = y_min - margin
+        nx = int(np.ceil((x_max + margin - self.x0) / self.resolution)) + 1
+        ny = int(np.ceil((y_max + margin - self.y0) / self.resolution)) + 1
+        grid_x, grid_y = np.meshgrid(self.x0 + np.arange(nx) * self.resolution, self.y0 + np.arange(ny) * self.resolution)
+        self.values = signed_distance(polygon, grid_x, grid_y)
+
+    # 双线性插值；网格范围外的点取最近的网格边缘值，再减去超出网格的距离（仍为负，即在路口外）
+    def lookup(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        ny, nx = self.values.shape
+        fx = (x - self.x0) / self.resolution
+        fy = (y - self.y0) / self.resolution
+        cx = np.clip(fx, 0, nx - 1)
+        cy = np.clip(fy, 0, ny - 1)
+        i = np.minimum(cx.astype(np.int64), nx - 2)
+        j = np.minimum(cy.astype(np.int64), ny - 2)
+        tx = cx - i
+        ty = cy - j
+
+        v = self.values
+        value = ((1 - tx) * (1 - ty) * v[j, i] + tx * (1 - ty) * v[j, i + 1]
+                 + (1 - tx) * ty * v[j + 1, i] + tx * ty * v[j + 1, i + 1])
+        return value - np.hypot(fx - cx, fy - cy) * self.resolution
+
+    # 点是否在路口内（对应 contains_xy）
+    def contains(self, x, y):
+        return self.lookup(x, y) > 0
+
+    # 点是否与路口边界保持至少 clearance 米（对应在 buffer(-clearance) 后的多边形内）
+    def clear(self, x, y, clearance=MIN_EDGE_CLEARANCE):
+        return self.lookup(x, y) > clearance
+
+
+# 在路口包围盒（向外扩展 margin 米）内随机取点，与 shapely 的精确结果比较
+# 返回误差统计：有向距离的平均/最大绝对误差，以及路口内判断和边界距离限制判断不一致的比例
+def approximation_error(field, polygon, buffered_polygon=None, clearance=MIN_EDGE_CLEARANCE, n_samples=100000,
+                        margin=DEFAULT_MARGIN, seed=0):
+    if buffered_polygon is None:
+        buffered_polygon = polygon.buffer(-clearance)
+    x_min, y_min, x_max, y_max = polygon.bounds
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(x_min - margin, x_max + margin, n_samples)
+    y = rng.uniform(y_min - margin, y_max + margin, n_samples)
+
+    error = np.abs(field.lookup(x, y) - signed_distance(polygon, x, y))
+    return {
+        'samples': n_samples,
+        'mean_abs_error': float(error.mean()),
+        'max_abs_error': float(error.max()),
+        'containment_mismatch': float(np.mean(field.contains(x, y) != contains_xy(polygon, x, y))),
+        'clearance_mismatch': float(np.mean(field.clear(x, y, clearance) != contains_xy(buffered_polygon, x, y))),
+    }
+
+
+# 为路口几何缓存中的路口建立有向距离场，返回 IntersectionID -> SignedDistanceField
+# 已经加载了路口几何（例如用不同的缩进距离）时通过 geometry 传入，不再重新加载，也不会以不同的设置覆盖几何缓存
+def build_fields(intersection_file_path=INTERSECTION_FILE_PATH, intersection_ids=None, resolution=DEFAULT_RESOLUTION,
+                 margin=DEFAULT_MARGIN, geometry=None):
+    if geometry is None:
+        geometry = load_geometry(intersection_file_path)
+    if intersection_ids is None:
+        intersection_ids = list(geometry)
+    return {
+        intersection_id: SignedDistanceField(geometry[intersection_id].projected_polygon, resolution, margin)
+        for intersection_id in intersection_ids
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build signed distance fields and report their error against exact shapely results.')
+    parser.add_argument('intersection_ids', nargs='*', default=None)
+    parser.add_argument('--intersections', default=INTERSECTION_FILE_PATH)
+    parser.add_argument('--resolution', type=float, default=DEFAULT_RESOLUTION)
+    parser.add_argument('--margin', type=float, default=DEFAULT_MARGIN)
+    parser.add_argument('--clearance', type=float, default=MIN_EDGE_CLEARANCE)
+    parser.add_argument('--samples', type=int, default=100000)
+    args = parser.parse_args()
+
+    geometry = load_geometry(args.intersections, clearances=(MIN_EDGE_CLEARANCE, args.clearance))
+    fields = build_fields(args.intersections, args.intersection_ids or None, args.resolution, args.margin, geometry)
+    for intersection_id, field in fields.items():
+        bundle = geometry[intersection_id]
+        errors = approximation_error(field, bundle.projected_polygon, bundle.buffer(args.clearance), args.clearance,
+                                     args.samples, args.margin)
+        print(f"{intersection_id}: grid {field.values.shape[1]}x{field.values.shape[0]} at {field.resolution} m, "
+              f"mean |error| {errors['mean_abs_error']:.4f} m, max |error| {errors['max_abs_error']:.4f} m, "
+              f"containment mismatch {errors['containment_mismatch']:.4%}, "
+              f"clearance mismatch {errors['clearance_mismatch']:.4%}")
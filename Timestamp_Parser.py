@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+# FrontRunner 时间戳格式，例如 '01 Jan 2024 12:34:56:789'
+TIMESTAMP_FORMAT = '%d %b %Y %H:%M:%S:%f'
+TIMESTAMP_WIDTH = 24
+
+# 月份缩写查找表：三个 ASCII 字节拼成一个整数后排序，用 searchsorted 查找
+_MONTH_NAMES = [b'Jan', b'Feb', b'Mar', b'Apr', b'May', b'Jun', b'Jul', b'Aug', b'Sep', b'Oct', b'Nov', b'Dec']
+_MONTH_KEYS = np.array([(m[0] << 16) | (m[1] << 8) | m[2] for m in _MONTH_NAMES], dtype=np.int64)
+_MONTH_ORDER = np.argsort(_MONTH_KEYS)
+_MONTH_KEYS_SORTED = _MONTH_KEYS[_MONTH_ORDER]
+_MONTH_NUMBERS_SORTED = _MONTH_ORDER + 1
+
+# 固定宽度格式中分隔符的位置
+_SEPARATORS = {2: ord(' '), 6: ord(' '), 11: ord(' '), 14: ord(':'), 17: ord(':'), 20: ord(':')}
+_DIGITS = [0, 1, 7, 8, 9, 10, 12, 13, 15, 16, 18, 19, 21, 22, 23]
+
+
+# 公历日期 -> 距 1970-01-01 的天数（Howard Hinnant 的 days_from_civil 算法，向量化）
+def days_from_civil(year, month, day):
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+# 将整列 FrontRunner 时间戳解析为 int64 毫秒（Unix 纪元）
+# 按固定宽度的字节切片解析；不符合固定宽度格式的行回退到 pd.to_datetime，无法解析的行为 NaT 对应的整数
+def parse_timestamps(values):
+    values = np.asarray(values, dtype=object)
+    n = len(values)
+    result = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return result
+
+    # 多留一个字节，用于检查字符串是否恰好为固定宽度
+    raw = np.asarray(values, dtype=f'S{TIMESTAMP_WIDTH + 1}').view(np.uint8).reshape(n, TIMESTAMP_WIDTH + 1)
+
+    valid = raw[:, TIMESTAMP_WIDTH] == 0
+    for position, separator in _SEPARATORS.items():
+        valid &= raw[:, position] == separator
+    digits = raw[:, _DIGITS].astype(np.int64) - ord('0')
+    valid &= np.all((digits >= 0) & (digits <= 9), axis=1)
+
+    key = (raw[:, 3].astype(np.int64) << 16) | (raw[:, 4].astype(np.int64) << 8) | raw[:, 5]
+    position = np.minimum(np.searchsorted(_MONTH_KEYS_SORTED, key), len(_MONTH_KEYS_SORTED) - 1)
+    valid &= _MONTH_KEYS_SORTED[position] == key
+    month = _MONTH_NUMBERS_SORTED[position]
+
+    day = digits[:, 0] * 10 + digits[:, 1]
+    year = digits[:, 2] * 1000 + digits[:, 3] * 100 + digits[:, 4] * 10 + digits[:, 5]
+    hour = digits[:, 6] * 10 + digits[:, 7]
+    minute = digits[:, 8] * 10 + digits[:, 9]
+    second = digits[:, 10] * 10 + digits[:, 11]
+    millisecond = digits[:, 12] * 100 + digits[:, 13] * 10 + digits[:, 14]
+
+    days = days_from_civil(year, month, day)
+    result[:] = (((days * 24 + hour) * 60 + minute) * 60 + second) * 1000 + millisecond
+
+    # 回退路径：非固定宽度（例如毫秒位数不同）的行交给 pandas
+    if not valid.all():
+        fallback = pd.to_datetime(pd.Series(values[~valid]), format=TIMESTAMP_FORMAT, errors='coerce')
+        result[~valid] = fallback.to_numpy().astype('datetime64[ms]').view(np.int64)
+    return result
+
+
+# int64 毫秒 -> datetime64[ns]，便于与 pandas 的 TimeStamp 列互换
+def to_datetime64(milliseconds):
+    return np.asarray(milliseconds, dtype=np.int64).view('datetime64[ms]').astype('datetime64[ns]')
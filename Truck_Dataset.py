@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from Timestamp_Parser import parse_timestamps, to_datetime64
+from Truck_Movement_Store import STORE_DIR, has_partition, partition_name
+
+
+# 按 (Truck, TimeStamp) 稳定排序一次后的车辆移动数据
+#   trucks  —— 卡车 ID，按首次出现的顺序排列（与 truck_data['Truck'].unique() 一致）
+#   offsets —— 第 i 辆卡车的数据为所有列的 [offsets[i]:offsets[i+1]] 区间
+#   columns —— 列名 -> 排序后的 NumPy 数组（不含 Truck 列）
+# dataset[truck_id] 返回该卡车各列的视图，不复制数据
+class TruckDataset:
+    def __init__(self, trucks, offsets, columns):
+        self.trucks = np.asarray(trucks)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.columns = dict(columns)
+        self._rows = {truck_id: row for row, truck_id in enumerate(self.trucks.tolist())}
+
+    @classmethod
+    def from_frame(cls, truck_data, truck_column='Truck', time_column='TimeStamp'):
+        codes, trucks = pd.factorize(truck_data[truck_column], use_na_sentinel=False)
+
+        # 时间戳如果还是原始字符串，只为排序解析一次
+        timestamps = truck_data[time_column]
+        if timestamps.dtype == object or pd.api.types.is_string_dtype(timestamps):
+            timestamps = parse_timestamps(timestamps)
+        order = np.lexsort((np.asarray(timestamps), codes))
+
+        counts = np.bincount(codes, minlength=len(trucks))
+        offsets = np.zeros(len(trucks) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        columns = {c: truck_data[c].to_numpy()[order] for c in truck_data.columns if c != truck_column}
+        return cls(np.asarray(trucks), offsets, columns)
+
+    # 直接读取列式存储中的分区，数据已按 (Truck, TimeStamp) 排好序，无需再排序
+    @classmethod
+    def from_store(cls, truck_file_path, store_dir=STORE_DIR, columns=('TimeStamp', 'X', 'Y')):
+        with np.load(os.path.join(store_dir, f'{partition_name(truck_file_path)}.npz')) as npz:
+            trucks = npz['trucks']
+            offsets = npz['offsets']
+            data = {c: npz[c] for c in columns}
+        if 'TimeStamp' in data:
+            data['TimeStamp'] = data['TimeStamp'].view('datetime64[ns]')
+        return cls(trucks, offsets, data)
+
+    def __len__(self):
+        return len(self.trucks)
+
+    def __iter__(self):
+        return iter(self.trucks.tolist())
+
+    def __contains__(self, truck_id):
+        return truck_id in self._rows
+
+    def __getitem__(self, truck_id):
+        rows = self.rows(truck_id)
+        return {name: values[rows] for name, values in self.columns.items()}
+
+    def items(self):
+        for truck_id in self:
+            yield truck_id, self[truck_id]
+
+    # 某辆卡车在所有列中的行区间
+    def rows(self, truck_id):
+        row = self._rows[truck_id]
+        return slice(self.offsets[row], self.offsets[row + 1])
+
+    def column(self, name, truck_id=None):
+        if truck_id is None:
+            return self.columns[name]
+        return self.columns[name][self.rows(truck_id)]
+
+    # 添加派生列（例如经纬度），values 需与已排序的行顺序一致
+    def add_column(self, name, values):
+        values = np.asarray(values)
+        if len(values) != self.offsets[-1]:
+            raise ValueError(f"Column {name} has {len(values)} rows, expected {self.offsets[-1]}")
+        self.columns[name] = values
+
+    # 每辆卡车的行数
+    def counts(self):
+        return np.diff(self.offsets)
+
+
+# 加载单个数据集为 TruckDataset：列式存储中有最新的分区则直接读取，否则（没有分区或 CSV 已修改）解析 CSV
+def load_truck_dataset(truck_file_path, store_dir=STORE_DIR):
+    if has_partition(truck_file_path, store_dir):
+        return TruckDataset.from_store(truck_file_path, store_dir)
+
+    truck_data = pd.read_csv(truck_file_path)
+    truck_data['TimeStamp'] = to_datetime64(parse_timestamps(truck_data['TimeStamp']))
+    return TruckDataset.from_frame(truck_data)
@@ -0,0 +1,254 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from Timestamp_Parser import parse_timestamps, to_datetime64
+
+# 原始车辆移动数据集（CSV）和转换后的列式存储目录
+MOVEMENT_FILE_PATHS = [f'B4_truck_movements_{i:02d}.csv' for i in range(1, 55)]
+MOVEMENT_FILE_PATTERN = 'B4_truck_movements_*.csv'
+STORE_DIR = 'B4_truck_movements_store'
+PARTITION_INDEX = 'partitions.csv'
+
+# 存储中的数据列；'File' 是虚拟列，由分区信息还原
+COLUMNS = ['File', 'Truck', 'TimeStamp', 'X', 'Y']
+
+
+def partition_name(truck_file_path):
+    return os.path.splitext(os.path.basename(truck_file_path))[0]
+
+
+# 读取一个原始 CSV，时间戳解析为 int64 纳秒，并按 (Truck, TimeStamp) 稳定排序
+# 卡车按首次出现的顺序排列，与 truck_data['Truck'].unique() 的顺序一致
+def read_movement_csv(truck_file_path):
+    truck_data = pd.read_csv(truck_file_path)
+    timestamps = to_datetime64(parse_timestamps(truck_data['TimeStamp'])).view(np.int64)
+    codes, trucks = pd.factorize(truck_data['Truck'], use_na_sentinel=False)
+    order = np.lexsort((timestamps, codes))
+
+    trucks = np.asarray(trucks)
+    if trucks.dtype == object:
+        trucks = trucks.astype(str)
+
+    counts = np.bincount(codes, minlength=len(trucks))
+    offsets = np.zeros(len(trucks) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return {
+        'trucks': trucks,
+        'offsets': offsets,
+        'TimeStamp': timestamps[order],
+        'X': truck_data['X'].to_numpy(dtype=np.float64)[order],
+        'Y': truck_data['Y'].to_numpy(dtype=np.float64)[order],
+    }
+
+
+# 每辆卡车的分区统计信息，用于读取时按卡车、时间窗口和范围剪枝
+def partition_stats(name, arrays):
+    starts, ends = arrays['offsets'][:-1], arrays['offsets'][1:]
+    stats = pd.DataFrame({
+        'File': name,
+        'Truck': arrays['trucks'],
+        'Start': starts,
+        'End': ends,
+    })
+    for column, key in (('TimeStamp', 'T'), ('X', 'X'), ('Y', 'Y')):
+        values = arrays[column]
+        non_empty = ends > starts
+        low = np.full(len(starts), np.nan if values.dtype.kind == 'f' else 0, dtype=values.dtype)
+        high = low.copy()
+        low[non_empty] = np.minimum.reduceat(values, starts[non_empty])
+        high[non_empty] = np.maximum.reduceat(values, starts[non_empty])
+        stats[f'{key}Min'] = low
+        stats[f'{key}Max'] = high
+    return stats
+
+
+# 源 CSV 的 (大小, 修改时间 ns)，记录在分区信息中，用于判断分区是否过期；文件不存在时返回 None
+def source_signature(truck_file_path):
+    try:
+        stat = os.stat(truck_file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+# 一次性将原始 CSV 转换为列式存储：每个源文件一个未压缩的 npz，内部按卡车分区
+# 分区已存在且源 CSV 的大小和修改时间与转换时相同才会跳过，CSV 修改后重新转换
+def convert_movements(file_paths=MOVEMENT_FILE_PATHS, store_dir=STORE_DIR, overwrite=False):
+    os.makedirs(store_dir, exist_ok=True)
+    index_path = os.path.join(store_dir, PARTITION_INDEX)
+    index = read_partition_index(store_dir) if os.path.exists(index_path) else None
+
+    frames = []
+    for truck_file_path in file_paths:
+        name = partition_name(truck_file_path)
+        target = os.path.join(store_dir, f'{name}.npz')
+        if not os.path.exists(truck_file_path):
+            print(f"File {truck_file_path} does not exist.")
+            continue
+        if not overwrite and index is not None and _is_current(index, truck_file_path, store_dir):
+            frames.append(index[index['File'] == name])
+            continue
+
+        arrays = read_movement_csv(truck_file_path)
+        np.savez(target, **arrays)
+        stats = partition_stats(name, arrays)
+        stats['SourceSize'], stats['SourceMtime'] = source_signature(truck_file_path)
+        frames.append(stats)
+        print(f"Converted: {truck_file_path} -> {target}")
+
+    # 保留未在本次转换列表中的已有分区
+    if index is not None:
+        converted = {frame['File'].iloc[0] for frame in frames if len(frame)}
+        frames.insert(0, index[~index['File'].isin(converted)])
+
+    index = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    index.to_csv(index_path, index=False)
+    return index
+
+
+def read_partition_index(store_dir=STORE_DIR):
+    return pd.read_csv(os.path.join(store_dir, PARTITION_INDEX),
+                       dtype={'File': str, 'Truck': str, 'SourceSize': 'Int64', 'SourceMtime': 'Int64'})
+
+
+# 按文件名模式查找数据集：当前目录中的 CSV，以及 CSV 已删除、只保留在列式存储中的分区；按文件名排序
+# 与固定的 MOVEMENT_FILE_PATHS 不同，新增的数据集（例如 B4_truck_movements_55.csv）会被自动发现
+def find_movement_files(pattern=MOVEMENT_FILE_PATTERN, store_dir=STORE_DIR):
+    file_paths = {os.path.basename(path): path for path in glob.glob(pattern)}
+    directory = os.path.dirname(pattern)
+    stored = glob.glob(os.path.join(store_dir, partition_name(pattern) + '.npz'))
+    for path in stored:
+        name = partition_name(path) + '.csv'
+        file_paths.setdefault(name, os.path.join(directory, name))
+    return [file_paths[name] for name in sorted(file_paths)]
+
+
+def _is_current(index, truck_file_path, store_dir):
+    name = partition_name(truck_file_path)
+    if not os.path.exists(os.path.join(store_dir, f'{name}.npz')):
+        return False
+    signature = source_signature(truck_file_path)
+    # 源 CSV 已不存在时，存储是唯一的数据来源
+    if signature is None:
+        return True
+    # 旧版本的分区信息没有记录源文件的大小和修改时间，视为过期
+    if 'SourceSize' not in index or 'SourceMtime' not in index:
+        return False
+    partitions = index[index['File'] == name]
+    if partitions.empty or partitions[['SourceSize', 'SourceMtime']].iloc[0].isna().any():
+        return False
+    return (int(partitions['SourceSize'].iloc[0]), int(partitions['SourceMtime'].iloc[0])) == signature
+
+
+# 列式存储中是否有该文件的最新分区：npz 存在，且源 CSV 不存在或大小、修改时间与转换时相同
+# 返回 False 时各处读取都回退到解析 CSV，重新运行 convert_movements 即可更新分区
+def has_partition(truck_file_path, store_dir=STORE_DIR):
+    if not os.path.exists(os.path.join(store_dir, PARTITION_INDEX)):
+        return False
+    return _is_current(read_partition_index(store_dir), truck_file_path, store_dir)
+
+
+def _to_ns(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return pd.Timestamp(value).value
+
+
+# 从列式存储读取数据
+#   columns     —— 需要读取的列（列投影），默认全部
+#   files       —— 源文件名或路径列表
+#   trucks      —— 卡车 ID 列表
+#   time_window —— (开始, 结束)，闭区间，接受 pd.Timestamp 可解析的值或 int64 纳秒
+#   bbox        —— (x_min, y_min, x_max, y_max)，UTM 坐标
+# TimeStamp 列以 datetime64[ns] 返回（底层仍是 int64 纳秒，不复制）
+def read_movements(store_dir=STORE_DIR, columns=None, files=None, trucks=None, time_window=None, bbox=None):
+    columns = list(COLUMNS if columns is None else columns)
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}")
+
+    # 分区剪枝
+    index = read_partition_index(store_dir)
+    keep = index['End'] > index['Start']
+    if files is not None:
+        keep &= index['File'].isin([partition_name(f) for f in files])
+    if trucks is not None:
+        keep &= index['Truck'].isin([str(t) for t in trucks])
+    if time_window is not None:
+        t_start, t_end = _to_ns(time_window[0]), _to_ns(time_window[1])
+        keep &= (index['TMax'] >= t_start) & (index['TMin'] <= t_end)
+    if bbox is not None:
+        x_min, y_min, x_max, y_max = bbox
+        keep &= (index['XMax'] >= x_min) & (index['XMin'] <= x_max) & (index['YMax'] >= y_min) & (index['YMin'] <= y_max)
+    index = index[keep]
+
+    # 谓词需要用到但未被投影的列也要读取
+    load_columns = [c for c in ('TimeStamp', 'X', 'Y') if c in columns]
+    if time_window is not None and 'TimeStamp' not in load_columns:
+        load_columns.append('TimeStamp')
+    if bbox is not None:
+        load_columns += [c for c in ('X', 'Y') if c not in load_columns]
+
+    pieces = {c: [] for c in COLUMNS}
+    # 保持文件在索引中的顺序
+    for name in pd.unique(index['File']):
+        partitions = index[index['File'] == name]
+        starts = partitions['Start'].to_numpy()
+        ends = partitions['End'].to_numpy()
+        counts = ends - starts
+        rows = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+
+        with np.load(os.path.join(store_dir, f'{name}.npz')) as npz:
+            stored_trucks = npz['trucks']
+            truck_rows = np.searchsorted(npz['offsets'], starts, side='right') - 1
+            data = {c: npz[c][rows] for c in load_columns}
+
+        mask = np.ones(len(rows), dtype=bool)
+        if time_window is not None:
+            mask &= (data['TimeStamp'] >= t_start) & (data['TimeStamp'] <= t_end)
+        if bbox is not None:
+            mask &= (data['X'] >= x_min) & (data['X'] <= x_max) & (data['Y'] >= y_min) & (data['Y'] <= y_max)
+
+        if 'Truck' in columns:
+            pieces['Truck'].append(np.repeat(stored_trucks[truck_rows], counts)[mask])
+        if 'File' in columns:
+            pieces['File'].append(np.full(mask.sum(), name, dtype=object))
+        for c in load_columns:
+            pieces[c].append(data[c][mask])
+
+    result = {}
+    for c in columns:
+        if pieces[c]:
+            values = np.concatenate(pieces[c])
+        else:
+            values = np.zeros(0, dtype={'TimeStamp': np.int64, 'X': np.float64, 'Y': np.float64}.get(c, object))
+        if c == 'TimeStamp':
+            values = values.view('datetime64[ns]')
+        result[c] = values
+    return pd.DataFrame(result, columns=columns)
+
+
+# 读取单个数据集：列式存储中有最新的分区则直接读取，否则（没有分区或 CSV 已修改）回退到解析 CSV
+def load_movement_file(truck_file_path, store_dir=STORE_DIR, columns=None):
+    if has_partition(truck_file_path, store_dir):
+        return read_movements(store_dir, columns=columns or ['Truck', 'TimeStamp', 'X', 'Y'], files=[truck_file_path])
+
+    truck_data = pd.read_csv(truck_file_path)
+    truck_data['TimeStamp'] = to_datetime64(parse_timestamps(truck_data['TimeStamp']))
+    return truck_data if columns is None else truck_data[columns]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert B4_truck_movements_XX.csv files to the columnar store.')
+    parser.add_argument('files', nargs='*', default=MOVEMENT_FILE_PATHS)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args()
+
+    index = convert_movements(args.files, args.store_dir, overwrite=args.overwrite)
+    print(f"{len(index)} truck partitions in {args.store_dir}")
@@ -1,72 +1,40 @@
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
-from shapely.geometry import Point, Polygon
-from pyproj import Transformer
-
-# 定义转换器，将 WGS 84 UTM Zone 50S 转换为 WGS 84
-transformer = Transformer.from_crs("epsg:32750", "epsg:4326")
+from Intersection_Loader import load_intersections
+from Truck_Dataset import TruckDataset
+from Containment_Engine import contains_xy
+from Intersection_Index import IntersectionIndex
 
 # 加载路口数据集
 intersection_file_path = 'B4_intersections_unique_valid.csv'
-intersection_data = pd.read_csv(intersection_file_path, header=None, names=["IntersectionID", "Coordinates"])
-
-# 处理 Coordinates 列
-intersection_data['Coordinates'] = intersection_data['Coordinates'].str.replace('LINESTRING\(', '', regex=True).str.replace('\)', '', regex=True)
-
-# 定义一个函数，将坐标分割为单独的经度和纬度列表
-def split_coordinates(coord_string):
-    latitudes = []
-    longitudes = []
-    for coord in coord_string.split(','):
-        try:
-            lon, lat = map(float, coord.split())
-            latitudes.append(lat)
-            longitudes.append(lon)
-        except ValueError:
-            continue
-    return latitudes, longitudes
-
-# 应用函数以拆分坐标
-intersection_data['Latitude'], intersection_data['Longitude'] = zip(*intersection_data['Coordinates'].apply(split_coordinates))
-
-# 移除空的列表
-intersection_data = intersection_data[intersection_data['Latitude'].map(len) > 0]
+# 投影模式：路口边界只投影一次到 UTM（米），之后直接与车辆的 X/Y 比较
+intersections = load_intersections(intersection_file_path, projected=True)
 
 # 加载车辆移动数据集
 truck_file_path = 'B4_truck_movements_01.csv'
 truck_data = pd.read_csv(truck_file_path)
 
-# 将车辆移动数据集中的坐标从 UTM 转换为经纬度
-truck_data['Latitude'], truck_data['Longitude'] = transformer.transform(truck_data['X'].values, truck_data['Y'].values)
+# 按 (Truck, TimeStamp) 排序一次，之后每辆卡车的轨迹都是零拷贝的数组视图
+truck_dataset = TruckDataset.from_frame(truck_data)
+
+# 建立所有路口的空间索引，一次扫描把每个采样点分配到所在路口
+intersection_index = IntersectionIndex(intersections)
+truck_rows = np.repeat(np.arange(len(truck_dataset)), truck_dataset.counts())
+passed = intersection_index.passed_matrix(truck_rows, truck_dataset.column('X'), truck_dataset.column('Y'), len(truck_dataset))
 
 # 定义一个字典来存储每辆卡车通过的路口信息
+# 卡车按其经过的第一个路口排序（与原先按路口逐个检查时的插入顺序一致）
 truck_intersection_pass = {}
-
-# 遍历每个路口
-for intersection_id in intersection_data['IntersectionID'].unique():
-    intersection_info = intersection_data[intersection_data['IntersectionID'] == intersection_id]
-    if intersection_info.empty:
-        continue
-
-    # 创建路口的多边形
-    polygon = Polygon(zip(intersection_info.iloc[0]['Longitude'], intersection_info.iloc[0]['Latitude']))
-
-    # 检查每辆卡车是否通过该路口
-    for truck_id in truck_data['Truck'].unique():
-        truck_movements = truck_data[truck_data['Truck'] == truck_id]
-        truck_path = [Point(lon, lat) for lon, lat in zip(truck_movements['Longitude'], truck_movements['Latitude'])]
-        
-        passed_through_intersection = any(polygon.contains(point) for point in truck_path)
-        
-        if passed_through_intersection:
-            if truck_id not in truck_intersection_pass:
-                truck_intersection_pass[truck_id] = []
-            truck_intersection_pass[truck_id].append(intersection_id)
+passed_rows = np.flatnonzero(passed.any(axis=1))
+first_intersection = passed[passed_rows].argmax(axis=1)
+for row in passed_rows[np.lexsort((passed_rows, first_intersection))]:
+    truck_intersection_pass[truck_dataset.trucks[row]] = intersection_index.ids[passed[row]].tolist()
 
 # 将结果写入CSV文件
 output_data = {'Truck': [], 'IntersectionID': []}
-for truck_id, intersections in truck_intersection_pass.items():
-    for intersection_id in intersections:
+for truck_id, intersection_ids in truck_intersection_pass.items():
+    for intersection_id in intersection_ids:
         output_data['Truck'].append(truck_id)
         output_data['IntersectionID'].append(intersection_id)
 
@@ -74,39 +42,34 @@ output_df = pd.DataFrame(output_data)
 output_df.to_csv('truck_intersection_pass.csv', index=False)
 
 # 可视化函数
-def plot_intersection_and_trucks(intersection_id):
-    intersection_info = intersection_data[intersection_data['IntersectionID'] == intersection_id]
-    if intersection_info.empty:
+def plot_intersection_and_trucks(intersection_id, truck_dataset=truck_dataset):
+    if intersection_id not in intersections:
         print(f"No data found for Intersection ID: {intersection_id}")
         return
 
     plt.figure(figsize=(12, 8))
 
     # 绘制路口边界
-    for i in range(len(intersection_info)):
-        plt.plot(intersection_info.iloc[i]['Longitude'], intersection_info.iloc[i]['Latitude'], marker='o', label=f'{intersection_id} Boundary')
+    for row in intersections.rows(intersection_id):
+        boundary = intersections.row_coordinates(row)
+        plt.plot(boundary[:, 0], boundary[:, 1], marker='o', label=f'{intersection_id} Boundary')
 
     # 创建路口的多边形
-    polygon = Polygon(zip(intersection_info.iloc[0]['Longitude'], intersection_info.iloc[0]['Latitude']))
+    polygon = intersections.polygon(intersection_id)
 
     # 绘制通过路口的车辆轨迹
-    for truck_id in truck_data['Truck'].unique():
-        truck_movements = truck_data[truck_data['Truck'] == truck_id]
-        truck_path = [Point(lon, lat) for lon, lat in zip(truck_movements['Longitude'], truck_movements['Latitude'])]
+    for truck_id in truck_dataset:
+        truck_movements = truck_dataset[truck_id]
+        x, y = truck_movements['X'], truck_movements['Y']
         
-        passed_through_intersection = []
-        for point in truck_path:
-            if polygon.contains(point):
-                passed_through_intersection.append(point)
+        passed_through_intersection = contains_xy(polygon, x, y)
         
-        if passed_through_intersection:
-            lons = [point.x for point in passed_through_intersection]
-            lats = [point.y for point in passed_through_intersection]
-            plt.plot(lons, lats, marker='o', linestyle='-', label=f'Truck {truck_id}')
+        if passed_through_intersection.any():
+            plt.plot(x[passed_through_intersection], y[passed_through_intersection], marker='o', linestyle='-', label=f'Truck {truck_id}')
 
     plt.title(f'Intersection and Truck Movements Visualization: {intersection_id}')
-    plt.xlabel('Longitude')
-    plt.ylabel('Latitude')
+    plt.xlabel('X (m)')
+    plt.ylabel('Y (m)')
     plt.legend()
     plt.grid(True)
     plt.show()
@@ -0,0 +1,80 @@
+import os
+import time
+
+import numpy as np
+from shapely.geometry import Point
+
+from Geometry_Kernels import haversine_segment_lengths, path_length
+from Intersection_Loader import load_intersections
+from Projected_Mode import unproject
+from Truck_Dataset import load_truck_dataset
+
+# 对比投影模式（UTM 米 + 平面距离）与原有经纬度模式（逐点转换 + haversine）的通过事件和路径长度
+intersection_file_path = 'B4_intersections_unique_valid.csv'
+intersection_id = 'INT_94'
+file_paths = [f'B4_truck_movements_{i:02d}.csv' for i in range(1, 55)]
+
+# 与 Pass_INI 脚本相同的进出判定：进入点为第一个在路口内的点的前一个点，离开点为第一个离开的点
+def find_passes(polygon, xs, ys):
+    passes = []
+    entry_idx = None
+    for idx, (x, y) in enumerate(zip(xs, ys)):
+        if polygon.contains(Point(x, y)):
+            if entry_idx is None:
+                entry_idx = max(0, idx - 1)
+        elif entry_idx is not None:
+            passes.append((entry_idx, idx))
+            entry_idx = None
+    return passes
+
+
+geographic_polygon = load_intersections(intersection_file_path).polygon(intersection_id)
+projected_polygon = load_intersections(intersection_file_path, projected=True).polygon(intersection_id)
+
+geographic_seconds = 0.0
+projected_seconds = 0.0
+pass_mismatches = 0
+length_errors = []
+
+for truck_file_path in file_paths:
+    if not os.path.exists(truck_file_path):
+        print(f"File {truck_file_path} does not exist.")
+        continue
+
+    truck_dataset = load_truck_dataset(truck_file_path)
+
+    for truck_id in truck_dataset:
+        truck_movements = truck_dataset[truck_id]
+        x, y = truck_movements['X'], truck_movements['Y']
+
+        start = time.perf_counter()
+        lons, lats = unproject(x, y)
+        geographic_passes = find_passes(geographic_polygon, lons, lats)
+        geographic_lengths = [
+            float(haversine_segment_lengths(lons[entry_idx:exit_idx+1], lats[entry_idx:exit_idx+1]).sum())
+            for entry_idx, exit_idx in geographic_passes
+        ]
+        geographic_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        projected_passes = find_passes(projected_polygon, x, y)
+        projected_lengths = [
+            path_length(x[entry_idx:exit_idx+1], y[entry_idx:exit_idx+1])
+            for entry_idx, exit_idx in projected_passes
+        ]
+        projected_seconds += time.perf_counter() - start
+
+        if projected_passes != geographic_passes:
+            pass_mismatches += 1
+            print(f"Truck {truck_id} in {truck_file_path}: {len(geographic_passes)} passes (lat/lon) vs {len(projected_passes)} (projected)")
+            continue
+
+        for expected, actual in zip(geographic_lengths, projected_lengths):
+            if expected > 0:
+                length_errors.append(abs(actual - expected) / expected)
+
+if length_errors:
+    length_errors = np.asarray(length_errors)
+    print(f"Passes compared: {len(length_errors)}, trucks with different passes: {pass_mismatches}")
+    print(f"Path length relative error: max {length_errors.max():.2e}, mean {length_errors.mean():.2e}")
+    print(f"Lat/lon mode: {geographic_seconds:.3f} s, projected mode: {projected_seconds:.3f} s")
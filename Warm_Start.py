@@ -0,0 +1,63 @@
+import numpy as np
+
+from Pass_Event_Engine import PASS_EVENT_FILE_PATH, read_pass_events
+from Truck_Dataset import load_truck_dataset
+from Truck_Movement_Store import STORE_DIR
+
+# 种群中来自历史通过轨迹的比例，其余为包围盒内的均匀随机样本，保持种群多样性
+HISTORICAL_FRACTION = 0.5
+
+
+# 某个路口的所有历史通过轨迹：返回 [(n, 2) 的 UTM 坐标, ...]，每条为进入下标到离开下标（含）的采样点
+# 通过事件表（见 Pass_Event_Engine.py）记录了每次通过在卡车轨迹中的下标，据此从原始数据集取出完整轨迹
+def historical_passes(intersection_id, events=None, events_path=PASS_EVENT_FILE_PATH, store_dir=STORE_DIR):
+    if events is None:
+        events = read_pass_events(events_path)
+    events = events[events['IntersectionID'] == intersection_id]
+
+    passes = []
+    for file_name, file_events in events.groupby('File', sort=False):
+        truck_dataset = load_truck_dataset(file_name, store_dir)
+        x, y = truck_dataset.column('X'), truck_dataset.column('Y')
+        for truck_id, entry_index, exit_index in zip(file_events['Truck'], file_events['EntryIndex'], file_events['ExitIndex']):
+            if truck_id not in truck_dataset:
+                continue
+            rows = truck_dataset.rows(truck_id)
+            start = rows.start + entry_index
+            passes.append(np.column_stack([x[start:rows.start + exit_index + 1], y[start:rows.start + exit_index + 1]]))
+    return passes
+
+
+# 按进出点把历史轨迹分配到最接近的转向：返回 转向 -> [轨迹, ...]
+# endpoints 为 转向 -> [(起点, 终点)]（见 Optimizer_Model.movement_endpoints）
+def assign_movements(passes, endpoints):
+    directions = list(endpoints)
+    starts = np.array([endpoints[direction][0][0] for direction in directions], dtype=np.float64)
+    ends = np.array([endpoints[direction][0][1] for direction in directions], dtype=np.float64)
+
+    movements = {direction: [] for direction in directions}
+    for points in passes:
+        if len(points) < 2:
+            continue
+        cost = np.hypot(*(starts - points[0]).T) + np.hypot(*(ends - points[-1]).T)
+        movements[directions[int(np.argmin(cost))]].append(points)
+    return movements
+
+
+# differential_evolution 的初始种群 (popsize * n_params, n_params)
+# 历史轨迹先转换为参数向量并用目标函数评分，取损失最低的若干条（最多占 fraction），其余用均匀随机样本补足
+def warm_start_population(parameterization, objective_function, passes, popsize=15, fraction=HISTORICAL_FRACTION, seed=None):
+    rng = np.random.default_rng(seed)
+    low, high = np.array(parameterization.bounds, dtype=np.float64).T
+    n_members = popsize * parameterization.n_params
+
+    historical = np.zeros((0, parameterization.n_params))
+    if passes:
+        fitted = np.clip(np.array([parameterization.fit(points) for points in passes]), low, high)
+        loss = np.asarray(objective_function(fitted.T))
+        order = np.argsort(loss, kind='stable')
+        order = order[np.isfinite(loss[order])][:int(n_members * fraction)]
+        historical = fitted[order]
+
+    random = rng.uniform(low, high, size=(n_members - len(historical), parameterization.n_params))
+    return np.vstack([historical, random])